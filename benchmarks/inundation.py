@@ -0,0 +1,337 @@
+"""
+Inundation engine benchmark on synthetic volcanic cones.
+
+Each cone has 8 channels incised along d8 rays from the summit, flow direction is
+the steepest descent of the dem so it is consistent with the channels. Lahars start
+in the south channel and run to the cone edge, which is blank.
+
+For every cone size and volume it times `create_lahar_inundation`, `calc_cross_section`
+along the channel and `_batch_lahar_inundation` of 4 points, and records wall time,
+inundated cells and peak memory (python & numpy allocations, measured by a second
+run under tracemalloc). Results are appended to a json history and compared with
+the previous run of the same backend.
+
+    python benchmarks/inundation.py
+    python benchmarks/inundation.py --sizes 1024,2048 --backend numba
+
+a 16384 cone needs about 4 GB of memory.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import tempfile
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import rasterio
+from affine import Affine
+
+import pearpy
+from pearpy.distal_inundation import (
+    DEMData,
+    PlanimetricData,
+    StartPoint,
+    _batch_lahar_inundation,
+    calc_cross_planimetric,
+    calc_cross_section,
+    create_lahar_inundation,
+    cross_area_dtype,
+    pad_rasters,
+    resolve_backend,
+)
+from pearpy.traversal import D8_CODES, FlowGrid
+
+SIZES: List[int] = [1024, 2048, 4096, 8192, 16384]
+VOLUMES: List[int] = [10000, 100000, 1000000, 10000000]
+CELL_WIDTH = 10.0
+# cross sections timed along the channel
+CROSS_SECTIONS = 200
+HISTORY = Path(__file__).parent / "history.json"
+
+# d8 code, row & column step
+D8 = (
+    (1, 0, 1),
+    (2, 1, 1),
+    (4, 1, 0),
+    (8, 1, -1),
+    (16, 0, -1),
+    (32, -1, -1),
+    (64, -1, 0),
+    (128, -1, 1),
+)
+
+
+def cone_elevation(rows: np.ndarray, cols: np.ndarray, size: int) -> np.ndarray:
+    """elevation of a cone with channels along d8 rays from the summit"""
+    center = (size - 1) / 2
+    y = rows - center
+    x = cols - center
+    radius = np.hypot(x, y)
+    elevation = 3000.0 - 0.25 * CELL_WIDTH * radius
+    # distance to the nearest channel, rays every 45 degree
+    angle = np.arctan2(y, x)
+    offset = np.abs((angle + np.pi / 8) % (np.pi / 4) - np.pi / 8)
+    distance = radius * np.sin(offset)
+    width = max(size / 64, 4.0)
+    depth = 40.0 * np.minimum(radius / (size / 8), 1.0)
+    elevation -= depth * np.clip(1 - (distance / width) ** 2, 0, None)
+    return elevation.astype(np.float32)
+
+
+def cone(size: int, block: int = 1024) -> Tuple[np.ndarray, np.ndarray]:
+    """dem & d8 flow direction of a cone, computed by blocks of rows.
+    cells without lower neighbour flow nowhere (0) and the outer 2 cells are blank (255)
+    """
+    dem = np.empty((size, size), dtype=np.float32)
+    direction = np.empty((size, size), dtype=np.uint8)
+    cols = np.arange(size, dtype=np.float64)
+    for top in range(0, size, block):
+        bottom = min(top + block, size)
+        rows = np.arange(top - 1, bottom + 1, dtype=np.float64)
+        elevation = cone_elevation(rows[:, None], cols[None, :], size)
+        padded = np.pad(elevation, ((0, 0), (1, 1)), constant_values=np.inf)
+        center = elevation[1:-1]
+        drop = np.zeros(center.shape, dtype=np.float32)
+        codes = np.zeros(center.shape, dtype=np.uint8)
+        for code, row, col in D8:
+            neighbour = padded[
+                1 + row : 1 + row + center.shape[0], 1 + col : 1 + col + size
+            ]
+            slope = (center - neighbour) / (np.sqrt(2) if row and col else 1)
+            steeper = slope > drop
+            drop[steeper] = slope[steeper]
+            codes[steeper] = code
+        dem[top:bottom] = center
+        direction[top:bottom] = codes
+    direction[:2] = direction[-2:] = 255
+    direction[:, :2] = direction[:, -2:] = 255
+    return dem, direction
+
+
+def start_points(size: int, volume: int) -> List[StartPoint]:
+    """points in the south, east, north & west channels, the south one first"""
+    center = (size - 1) // 2
+    distance = size // 8
+    points = []
+    for row, col in ((distance, 0), (0, distance), (-distance, 0), (0, -distance)):
+        start_point = StartPoint([center + col, center + row], volume)
+        start_point.row, start_point.col = center + row, center + col
+        points.append(start_point)
+    return points
+
+
+def measure(function: Callable[[], Any]) -> Tuple[float, int, Any]:
+    """wall time of a run and peak traced memory of a second run
+
+    Returns
+    -------
+    Tuple[float, int, Any]
+        seconds, peak bytes & result of the timed run
+    """
+    start = perf_counter()
+    result = function()
+    seconds = perf_counter() - start
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return seconds, peak, result
+
+
+def bench_inundation(
+    dem: DEMData, direction: np.ndarray, volume: int, backend: str
+) -> Dict[str, Any]:
+    start_point = start_points(dem.array.shape[0] - 2 * dem.halo, volume)[0]
+    seconds, peak, (planimetrics, _) = measure(
+        lambda: create_lahar_inundation(start_point, dem, direction, 95.0, backend)
+    )
+    return {
+        "seconds": seconds,
+        "cells": int(planimetrics.covered[0]),
+        "peak_bytes": peak,
+    }
+
+
+def bench_cross_section(
+    dem: DEMData, direction: np.ndarray, volume: int
+) -> Dict[str, Any]:
+    """at most `CROSS_SECTIONS` cross sections down the south channel until the blank
+    edge, seconds per cross section
+    """
+    grid = FlowGrid(dem.array, direction, dem.halo, dem.near_blank)
+    start_point = start_points(grid.shape[0], volume)[0]
+    cross_section_areas, _ = calc_cross_planimetric([volume], 95.0)
+
+    def run() -> Tuple[PlanimetricData, int]:
+        planimetrics = PlanimetricData(
+            value=[0 for _ in cross_section_areas],
+            array=np.ones((1, 1), dtype=np.int32),
+            cross_area=cross_section_areas,
+            shape=grid.shape,
+            row_offset=start_point.row,
+            col_offset=start_point.col,
+            dtype=cross_area_dtype(dem.array.dtype),
+        )
+        index = grid.index(start_point.row, start_point.col)
+        count = 0
+        while count < CROSS_SECTIONS and grid.direction[index] in D8_CODES:
+            flow_direction = int(grid.direction[index])
+            planimetrics = calc_cross_section(
+                dem, grid, flow_direction, index, planimetrics
+            )
+            index = grid.step(index, flow_direction)
+            count += 1
+        return planimetrics, count
+
+    seconds, peak, (planimetrics, count) = measure(run)
+    return {
+        "seconds": seconds / count,
+        "cells": int(planimetrics.covered[0]),
+        "peak_bytes": peak,
+    }
+
+
+def bench_batch(folder: Path, size: int, volume: int, backend: str) -> Dict[str, Any]:
+    """4 points saved as cog, including reading the rasters"""
+    output = folder / f"output_{volume}"
+    output.mkdir(exist_ok=True)
+
+    def run() -> List[StartPoint]:
+        points = start_points(size, volume)
+        _batch_lahar_inundation(
+            str(folder / "conefill.tif"),
+            points,
+            95.0,
+            str(output),
+            "cog",
+            backend=backend,
+            force=True,
+        )
+        return points
+
+    seconds, peak, _ = measure(run)
+    return {"seconds": seconds, "cells": None, "peak_bytes": peak}
+
+
+def write_rasters(folder: Path, dem: np.ndarray, direction: np.ndarray) -> None:
+    transform = Affine(CELL_WIDTH, 0, 0, 0, -CELL_WIDTH, dem.shape[0] * CELL_WIDTH)
+    for name, array in (("conefill", dem), ("conedir", direction)):
+        with rasterio.open(
+            folder / f"{name}.tif",
+            "w",
+            driver="GTiff",
+            count=1,
+            dtype=array.dtype,
+            width=array.shape[1],
+            height=array.shape[0],
+            transform=transform,
+            tiled=True,
+        ) as output:
+            output.write(array, 1)
+
+
+def commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def previous_run(history: List[Dict[str, Any]], backend: str) -> Dict[Tuple, float]:
+    """seconds of each case in the last run of the backend"""
+    for run in reversed(history):
+        if run["backend"] == backend:
+            return {
+                (case["stage"], case["size"], case["volume"]): case["seconds"]
+                for case in run["cases"]
+            }
+    return {}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument(
+        "--sizes", default=",".join(map(str, SIZES)), help="comma separated cone sizes"
+    )
+    parser.add_argument(
+        "--volumes", default=",".join(map(str, VOLUMES)), help="comma separated volumes"
+    )
+    parser.add_argument("--backend", default="python", choices=("python", "numba"))
+    parser.add_argument("--history", default=str(HISTORY), help="json history file")
+    arguments = parser.parse_args()
+
+    sizes = [int(size) for size in arguments.sizes.split(",")]
+    volumes = [int(float(volume)) for volume in arguments.volumes.split(",")]
+    backend = resolve_backend(arguments.backend)
+    history_path = Path(arguments.history)
+    history: List[Dict[str, Any]] = []
+    if history_path.exists():
+        history = json.loads(history_path.read_text())
+    previous = previous_run(history, backend)
+
+    cases: List[Dict[str, Any]] = []
+    print(
+        f"{'stage':>14} {'size':>6} {'volume':>9} {'seconds':>10} {'cells':>9} "
+        f"{'peak MB':>9} {'vs last':>8}"
+    )
+    for size in sizes:
+        dem_array, direction_array = cone(size)
+        dem, direction = pad_rasters(
+            DEMData(
+                array=dem_array,
+                cell_diagonal=CELL_WIDTH * np.sqrt(2),
+                cell_width=CELL_WIDTH,
+            ),
+            direction_array,
+        )
+        with tempfile.TemporaryDirectory() as folder:
+            write_rasters(Path(folder), dem_array, direction_array)
+            del dem_array, direction_array
+            for volume in volumes:
+                for stage, result in (
+                    ("inundation", bench_inundation(dem, direction, volume, backend)),
+                    ("cross_section", bench_cross_section(dem, direction, volume)),
+                    ("batch", bench_batch(Path(folder), size, volume, backend)),
+                ):
+                    case = {"stage": stage, "size": size, "volume": volume, **result}
+                    cases.append(case)
+                    last = previous.get((stage, size, volume))
+                    ratio = f"{result['seconds'] / last:.2f}x" if last else "-"
+                    print(
+                        f"{stage:>14} {size:>6} {volume:>9} {result['seconds']:>10.4g} "
+                        f"{result['cells'] if result['cells'] is not None else '-':>9} "
+                        f"{result['peak_bytes'] / 1024 ** 2:>9.1f} {ratio:>8}"
+                    )
+        del dem, direction
+
+    history.append(
+        {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "version": pearpy.__version__,
+            "commit": commit(),
+            "backend": backend,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "cases": cases,
+        }
+    )
+    history_path.write_text(json.dumps(history, indent=1))
+    print(f"history saved at {history_path}")
+
+
+if __name__ == "__main__":
+    main()
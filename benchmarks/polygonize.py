@@ -0,0 +1,67 @@
+"""
+Polygonization time of multi_vector output for the same lahar on growing dem extents.
+
+The lahar covers the same cells on every dem, so windowed polygonization should take
+the same time whatever the dem size, while polygonizing the whole raster grows with it.
+
+    python benchmarks/polygonize.py
+"""
+
+import tempfile
+from pathlib import Path
+from time import perf_counter
+from typing import List
+
+import numpy as np
+from affine import Affine
+from geosardine.raster import polygonize
+
+from pearpy.distal_inundation import PlanimetricData, save_polygons
+
+DEM_SIZES: List[int] = [500, 1000, 2000, 4000]
+LAHAR_SIZE = 300
+
+
+def lahar(size: int) -> PlanimetricData:
+    """nested levels of a lahar in the middle of a dem with `size` rows & columns"""
+    rows, cols = np.mgrid[0:LAHAR_SIZE, 0:LAHAR_SIZE]
+    distance = np.hypot(rows - LAHAR_SIZE / 2, (cols - LAHAR_SIZE / 2) * 3)
+    window = np.ones((LAHAR_SIZE, LAHAR_SIZE), dtype=np.int32)
+    for level, radius in enumerate((140, 90, 40), 2):
+        window[distance < radius] = level
+    offset = (size - LAHAR_SIZE) // 2
+    return PlanimetricData(
+        value=[0, 0, 0],
+        array=window,
+        cross_area=[1.0, 1.0, 1.0],
+        shape=(size, size),
+        row_offset=offset,
+        col_offset=offset,
+    )
+
+
+def main() -> None:
+    schema = {"crs": None, "transform": Affine(10.0, 0, 0, 0, -10.0, 0)}
+    print(f"{'dem size':>10} {'whole raster (s)':>18} {'windowed (s)':>14}")
+    with tempfile.TemporaryDirectory() as folder:
+        for size in DEM_SIZES:
+            planimetrics = lahar(size)
+
+            start = perf_counter()
+            inundation = planimetrics.materialise()
+            polygonize(
+                inundation,
+                schema["transform"],
+                inundation != 1,
+                lambda x: x["properties"]["raster_val"],
+            )
+            whole = perf_counter() - start
+
+            start = perf_counter()
+            save_polygons(planimetrics, Path(folder) / f"lahar_{size}.shp", schema)
+            windowed = perf_counter() - start
+            print(f"{size:>10} {whole:>18.3f} {windowed:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
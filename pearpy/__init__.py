@@ -4,11 +4,40 @@ Pearpy can do:
     1. surface hidrology generator
     2. generate lahar inundation area using confidence limit
     3. lahar generated can be vector or raster
+
+Functions are imported on first use, `import pearpy` does not load the geospatial stack.
 """
 
+import importlib
+from typing import TYPE_CHECKING, Any, Dict, List
+
 __version__ = "0.1.0"
 
-from pearpy.distal_inundation import batch_lahar_inundation
-from pearpy.starting_point import find_starting_points
+if TYPE_CHECKING:
+    from pearpy.distal_inundation import batch_lahar_inundation, iter_lahar_inundation
+    from pearpy.starting_point import find_starting_points
+
+# module of each lazily imported attribute
+_lazy_attributes: Dict[str, str] = {
+    "batch_lahar_inundation": "pearpy.distal_inundation",
+    "iter_lahar_inundation": "pearpy.distal_inundation",
+    "find_starting_points": "pearpy.starting_point",
+    # submodules which used to be imported with the package
+    "distal_inundation": "pearpy.distal_inundation",
+    "starting_point": "pearpy.starting_point",
+}
+
+__all__ = ["find_starting_points", "batch_lahar_inundation", "iter_lahar_inundation"]
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _lazy_attributes:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(_lazy_attributes[name])
+    value = module if module.__name__ == f"{__name__}.{name}" else getattr(module, name)
+    globals()[name] = value
+    return value
+
 
-__all__ = ["find_starting_points", "batch_lahar_inundation"]
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_lazy_attributes))
@@ -1,9 +1,31 @@
 from pathlib import Path
+from typing import Optional, TextIO
 
 import click
 
-from .distal_inundation import batch_lahar_inundation
-from .starting_point import find_starting_points, save2txt
+# geospatial modules are imported by the command which runs, --help stays fast
+from .constants import backends, fitting_methods, output_types
+from .events import Metrics, json_lines, write_report
+from .memory import MemoryTracker
+from .profiling import StageProfiler
+
+
+def run_metrics(events: Optional[TextIO], profile: bool, memory: bool) -> Metrics:
+    """metrics of a command from --events, --profile & --memory"""
+    return Metrics(
+        json_lines(events) if events is not None else None,
+        profiler=StageProfiler() if profile else None,
+        memory=MemoryTracker() if memory else None,
+    )
+
+
+def save_run(metrics: Metrics, folder: Path) -> None:
+    """save profile & memory report of a command into output folder"""
+    if metrics.profiler is not None:
+        print(f"Profile saved at {metrics.profiler.save(folder / 'profile')}")
+    if metrics.memory is not None:
+        metrics.memory.close()
+        print(f"Report saved at {write_report(metrics, folder / 'report.json')}")
 
 
 @click.group()
@@ -17,15 +39,51 @@ def main() -> None:
 @click.argument("earlier_dsm")
 @click.argument("later_dsm")
 @click.option("--output-format", default="txt-laharz", help="output data format")
+@click.option(
+    "--events",
+    type=click.File("w"),
+    default=None,
+    help="write stage durations and counters as json lines to a file, - for stdout",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    help=(
+        "profile every stage, profiles & summary of hot functions are saved in a "
+        "profile folder next to the output"
+    ),
+)
+@click.option(
+    "--memory",
+    is_flag=True,
+    help=(
+        "track peak memory of every stage and starting point, saved with durations and "
+        "counters in report.json next to the output"
+    ),
+)
 def starting_points(
-    stream: str, earlier_dsm: str, later_dsm: str, out_format: str
+    stream: str,
+    earlier_dsm: str,
+    later_dsm: str,
+    output_format: str = "txt-laharz",
+    events: Optional[TextIO] = None,
+    profile: bool = False,
+    memory: bool = False,
 ) -> None:
     """
     Generate initial points for Laharz by using STREAM , DSM, DSM-DIFF raster
     """
-    starting_points = find_starting_points(stream, earlier_dsm, later_dsm)
+    from .starting_point import find_starting_points, save2txt
+
     stream_path: Path = Path(stream)
-    if out_format == "txt-laharz":
+    metrics = run_metrics(events, profile, memory)
+    try:
+        starting_points = find_starting_points(
+            stream, earlier_dsm, later_dsm, metrics=metrics
+        )
+    finally:
+        save_run(metrics, stream_path.parent)
+    if output_format == "txt-laharz":
         save2txt(
             starting_points, stream_path.parent.joinpath(f"{stream_path.stem}.txt")
         )
@@ -43,24 +101,177 @@ def starting_points(
 )
 @click.option(
     "--output_folder",
-    type="str",
+    type=str,
     default="",
     help="output location, default: same parent folder of input raster",
 )
+@click.option(
+    "--output_type",
+    type=click.Choice(output_types),
+    default="multi_vector",
+    help="shapefile or geotiff per point, or one gpkg / fgb file of every point",
+)
+@click.option(
+    "--backend",
+    type=click.Choice(backends),
+    default="python",
+    help="inundation backend, numba needs numba to be installed",
+)
+@click.option(
+    "--workers",
+    type=int,
+    default=1,
+    help="number of processes to generate inundation zones in parallel",
+)
+@click.option(
+    "--writers",
+    type=int,
+    default=1,
+    help="threads saving results while the next point is computed, 0 to save in turn",
+)
+@click.option(
+    "--fitting",
+    type=click.Choice(fitting_methods),
+    default="bisection",
+    help="how volume is reduced until the inundation fits in the raster",
+)
+@click.option(
+    "--fit_tolerance",
+    type=int,
+    default=20,
+    help="volume precision of the fitting",
+)
+@click.option(
+    "--fit_iterations",
+    type=int,
+    default=None,
+    help=(
+        "maximum inundation runs per point when fitting the volume, "
+        "by default 30 for bisection and secant, unlimited for linear"
+    ),
+)
+@click.option(
+    "--volumes",
+    type=str,
+    default="",
+    help=(
+        "comma separated volumes inundated once as nested levels for every point, e.g. "
+        "1e5,1e6"
+    ),
+)
+@click.option(
+    "--cache_folder",
+    type=click.Path(file_okay=False),
+    default="",
+    help=(
+        "folder of cached inundation results, reused when rasters, point, volume and "
+        "confidence limit are unchanged"
+    ),
+)
+@click.option(
+    "--cache_size",
+    type=int,
+    default=1024,
+    help=(
+        "maximum size of the result cache in MB, least recently used results are "
+        "removed"
+    ),
+)
+@click.option(
+    "--events",
+    type=click.File("w"),
+    default=None,
+    help="write stage durations and counters as json lines to a file, - for stdout",
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    help=(
+        "inundate every point again instead of skipping points saved by a previous run"
+    ),
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    help=(
+        "profile every stage, profiles & summary of hot functions are saved in a "
+        "profile folder next to the output"
+    ),
+)
+@click.option(
+    "--memory",
+    is_flag=True,
+    help=(
+        "track peak memory of every stage and starting point, saved with durations and "
+        "counters in report.json next to the output"
+    ),
+)
+@click.option(
+    "--heatmap",
+    is_flag=True,
+    help=(
+        "count visits of every cell by the traversal, saved as heatmap.tif with totals "
+        "per point in heatmap.csv"
+    ),
+)
 def lahar_inundation(
     input_raster: str,
-    input_coordinates: str,
+    coordinate_file: str,
     confidence_limit: float,
-    input_volume: str = "-1",
+    volume: str = "-1",
     output_folder: str = "",
+    output_type: str = "multi_vector",
+    backend: str = "python",
+    workers: int = 1,
+    writers: int = 1,
+    fitting: str = "bisection",
+    fit_tolerance: int = 20,
+    fit_iterations: Optional[int] = None,
+    volumes: str = "",
+    cache_folder: str = "",
+    cache_size: int = 1024,
+    events: Optional[TextIO] = None,
+    force: bool = False,
+    profile: bool = False,
+    memory: bool = False,
+    heatmap: bool = False,
 ) -> None:
     """
     Create lahar inundation zone per each point in COORDINATE_FILE
     based on INPUT_RASTER by using CONFIDENCE_LIMIT
     """
-    batch_lahar_inundation(
-        input_raster, input_coordinates, confidence_limit, input_volume, output_folder
+    from .distal_inundation import (
+        VolumeFitting,
+        batch_lahar_inundation,
+        inundation_output_folder,
     )
+    from .result_cache import ResultCache
+
+    metrics = run_metrics(events, profile, memory)
+    try:
+        batch_lahar_inundation(
+            input_raster,
+            coordinate_file,
+            confidence_limit,
+            float(volume),
+            output_folder,
+            output_type,
+            backend=backend,
+            workers=workers,
+            fitting=VolumeFitting(fitting, fit_tolerance, fit_iterations),
+            volumes=[int(float(v)) for v in volumes.split(",") if v.strip()] or None,
+            writers=writers,
+            force=force,
+            cache=(
+                ResultCache(cache_folder, cache_size * 1024 ** 2)
+                if cache_folder
+                else None
+            ),
+            metrics=metrics,
+            heatmap=heatmap,
+        )
+    finally:
+        save_run(metrics, inundation_output_folder(input_raster, output_folder))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,607 @@
+"""
+Compiled lahar inundation kernel.
+
+This is a line-by-line port of `create_lahar_inundation` and `calc_cross_section`
+in `pearpy.distal_inundation` written for numba's nopython mode. It keeps the same
+arithmetic order and data types as the python implementation so both backends
+produce identical planimetric arrays. numba is optional, `HAS_NUMBA` tells whether
+the kernel can be used.
+"""
+
+from typing import Any, Callable, Tuple
+
+import numpy as np
+
+from .traversal import (
+    CHECKER,
+    CROSS_SEQUENCE,
+    CROSS_SEQUENCE_LENGTH,
+    IS_D8,
+    LEFT,
+    RIGHT,
+    grow_window,
+)
+
+try:
+    from numba import njit
+
+    HAS_NUMBA = True
+except ImportError:  # pragma: no cover - depends on environment
+    HAS_NUMBA = False
+
+    def njit(*args: Any, **kwargs: Any) -> Callable[..., Any]:
+        """fallback decorator when numba is not installed"""
+
+        def decorator(function: Callable[..., Any]) -> Callable[..., Any]:
+            return function
+
+        return decorator
+
+
+STATUS_DONE = 0
+STATUS_VOLUME_TOO_BIG = 1
+STATUS_FINISHED_AT_BLANK = 2
+STATUS_BAD_DIRECTION = 3
+
+NO_DATA = 99999.0
+
+_grow_window = njit(nogil=True, cache=True)(grow_window)
+
+
+@njit(nogil=True, cache=True)
+def _is_halo(index: int, width: int, height: int, halo: int) -> bool:
+    row = index // width
+    col = index % width
+    return row < halo or row >= height - halo or col < halo or col >= width - halo
+
+
+@njit(nogil=True, cache=True)
+def _append_point(
+    index: int,
+    cross_count: int,
+    planimetric: np.ndarray,
+    window: np.ndarray,
+    value: np.ndarray,
+    covered: np.ndarray,
+    width: int,
+    height: int,
+    halo: int,
+) -> np.ndarray:
+    """port of append_point2array, returns planimetric window which may be grown.
+    `window` holds the window first row & column, `value` & `covered` count cells
+    of each value & level, all updated in place
+    """
+    row = index // width - halo
+    col = index % width - halo
+    window_height, window_width = planimetric.shape
+    if not (
+        window[0] <= row < window[0] + window_height
+        and window[1] <= col < window[1] + window_width
+    ):
+        top, left, grown_height, grown_width = _grow_window(
+            row,
+            col,
+            window[0],
+            window[1],
+            window_height,
+            window_width,
+            height - 2 * halo,
+            width - 2 * halo,
+        )
+        grown = np.ones((grown_height, grown_width), dtype=planimetric.dtype)
+        row_start = window[0] - top
+        col_start = window[1] - left
+        grown[
+            row_start : row_start + window_height,
+            col_start : col_start + window_width,
+        ] = planimetric
+        planimetric = grown
+        window[0] = top
+        window[1] = left
+
+    row -= window[0]
+    col -= window[1]
+    cross_area_count = cross_count + 1
+    dem_value = planimetric[row, col]
+    if dem_value == 1:
+        planimetric[row, col] = cross_area_count
+        value[cross_area_count - 2] += 1
+        for i in range(cross_area_count - 1):
+            covered[i] += 1
+    elif dem_value < cross_area_count:
+        planimetric[row, col] = cross_area_count
+        value[dem_value - 2] -= 1
+        value[cross_area_count - 2] += 1
+        for i in range(dem_value - 1, cross_area_count - 1):
+            covered[i] += 1
+    return planimetric
+
+
+@njit(nogil=True, cache=True)
+def _reduce_cross(
+    first_elevation: Any,
+    second_elevation: Any,
+    cell_dimension: float,
+    cell_count: int,
+    cross: np.ndarray,
+    cross_count: int,
+    cast: np.ndarray,
+) -> int:
+    """reduce every cross area in place and drop the non positive ones.
+    `cast` is a scratch array with the dtype numpy gives to the reduction,
+    it is used to follow numpy scalar casting.
+    """
+    cast[0] = first_elevation - second_elevation
+    difference = cast[0]
+    cast[0] = cell_dimension * cell_count
+    reduction = difference * cast[0]
+
+    for i in range(cross_count):
+        cross[i] = cross[i] - reduction
+
+    if cross_count > 1:
+        kept = 0
+        for i in range(cross_count):
+            if cross[i] > 0:
+                cross[kept] = cross[i]
+                kept += 1
+        cross_count = kept
+    return cross_count
+
+
+@njit(nogil=True, cache=True)
+def _cross_section(
+    dem: np.ndarray,
+    width: int,
+    height: int,
+    halo: int,
+    offset: np.ndarray,
+    cell_width: float,
+    cell_diagonal: float,
+    flow_direction: int,
+    right_index: int,
+    planimetric: np.ndarray,
+    window: np.ndarray,
+    value: np.ndarray,
+    covered: np.ndarray,
+    cross: np.ndarray,
+    cross_count: int,
+    cross_ori: np.ndarray,
+    ori_count: int,
+    cast: np.ndarray,
+    counters: np.ndarray,
+    visits: np.ndarray,
+) -> Tuple[int, np.ndarray]:
+    """port of calc_cross_section, returns the restored cross area count
+    and planimetric window. cross sections and lateral cells are added to `counters`,
+    cells compared in each step are counted in `visits` unless it is empty
+    """
+    cell_dimension = cell_width
+    if (
+        flow_direction == 8
+        or flow_direction == 128
+        or flow_direction == 2
+        or flow_direction == 32
+    ):
+        cell_dimension = cell_diagonal
+
+    left_code = LEFT[flow_direction]
+    right_code = RIGHT[flow_direction]
+    left_index = right_index + offset[left_code]
+    if _is_halo(right_index, width, height, halo) or _is_halo(
+        left_index, width, height, halo
+    ):
+        return cross_count, planimetric
+    counters[1] += 1
+
+    left_elevation = dem[left_index]
+    right_elevation = dem[right_index]
+
+    fill_elevation = right_elevation
+    count = 0
+    cell_count = 0
+
+    while count < 1000000000 and cross_count > 0 and cross[0] > 0:
+        if visits.size:
+            visits[left_index] += 1
+            visits[right_index] += 1
+        if left_elevation == fill_elevation:
+            planimetric = _append_point(
+                left_index,
+                cross_count,
+                planimetric,
+                window,
+                value,
+                covered,
+                width,
+                height,
+                halo,
+            )
+            left_index += offset[left_code]
+            left_elevation = dem[left_index]
+            cell_count += 1
+        elif right_elevation == fill_elevation:
+            planimetric = _append_point(
+                right_index,
+                cross_count,
+                planimetric,
+                window,
+                value,
+                covered,
+                width,
+                height,
+                halo,
+            )
+            right_index += offset[right_code]
+            right_elevation = dem[right_index]
+            cell_count += 1
+
+        elif right_elevation < fill_elevation:
+            cross_count = _reduce_cross(
+                fill_elevation,
+                right_elevation,
+                cell_dimension,
+                1,
+                cross,
+                cross_count,
+                cast,
+            )
+            cell_count += 1
+            if cross_count > 0 and cross[0] > 0:
+                planimetric = _append_point(
+                    right_index,
+                    cross_count,
+                    planimetric,
+                    window,
+                    value,
+                    covered,
+                    width,
+                    height,
+                    halo,
+                )
+                right_index += offset[right_code]
+                right_elevation = dem[right_index]
+
+        elif left_elevation < fill_elevation:
+            cross_count = _reduce_cross(
+                fill_elevation,
+                left_elevation,
+                cell_dimension,
+                1,
+                cross,
+                cross_count,
+                cast,
+            )
+            cell_count += 1
+            if cross_count > 0 and cross[0] > 0:
+                planimetric = _append_point(
+                    left_index,
+                    cross_count,
+                    planimetric,
+                    window,
+                    value,
+                    covered,
+                    width,
+                    height,
+                    halo,
+                )
+                left_index += offset[left_code]
+                left_elevation = dem[left_index]
+
+        elif right_elevation == left_elevation:
+            cross_count = _reduce_cross(
+                right_elevation,
+                fill_elevation,
+                cell_dimension,
+                cell_count,
+                cross,
+                cross_count,
+                cast,
+            )
+
+            if cross_count > 0 and cross[0] > 0:
+                fill_elevation = right_elevation
+                planimetric = _append_point(
+                    left_index,
+                    cross_count,
+                    planimetric,
+                    window,
+                    value,
+                    covered,
+                    width,
+                    height,
+                    halo,
+                )
+                left_index += offset[left_code]
+                left_elevation = dem[left_index]
+
+                planimetric = _append_point(
+                    right_index,
+                    cross_count,
+                    planimetric,
+                    window,
+                    value,
+                    covered,
+                    width,
+                    height,
+                    halo,
+                )
+                right_index += offset[right_code]
+                right_elevation = dem[right_index]
+                cell_count += 2
+
+        elif right_elevation > left_elevation:
+            cross_count = _reduce_cross(
+                left_elevation,
+                fill_elevation,
+                cell_dimension,
+                cell_count,
+                cross,
+                cross_count,
+                cast,
+            )
+            cell_count += 1
+            if cross_count > 0 and cross[0] > 0:
+                fill_elevation = left_elevation
+                planimetric = _append_point(
+                    left_index,
+                    cross_count,
+                    planimetric,
+                    window,
+                    value,
+                    covered,
+                    width,
+                    height,
+                    halo,
+                )
+                left_index += offset[left_code]
+                left_elevation = dem[left_index]
+
+        elif right_elevation < left_elevation:
+            cross_count = _reduce_cross(
+                right_elevation,
+                fill_elevation,
+                cell_dimension,
+                cell_count,
+                cross,
+                cross_count,
+                cast,
+            )
+            cell_count += 1
+            if cross_count > 0 and cross[0] > 0:
+                fill_elevation = right_elevation
+                planimetric = _append_point(
+                    right_index,
+                    cross_count,
+                    planimetric,
+                    window,
+                    value,
+                    covered,
+                    width,
+                    height,
+                    halo,
+                )
+                # the python implementation stores this elevation as left elevation
+                right_index += offset[right_code]
+                left_elevation = dem[right_index]
+
+        if left_elevation == NO_DATA or right_elevation == NO_DATA:
+            for i in range(cross_count):
+                cross[i] = -99999
+
+        count += 1
+
+    counters[2] += count
+    for i in range(ori_count):
+        cross[i] = cross_ori[i]
+    return ori_count, planimetric
+
+
+@njit(nogil=True, cache=True)
+def create_lahar_inundation(
+    dem: np.ndarray,
+    direction: np.ndarray,
+    near_blank: np.ndarray,
+    width: int,
+    cell_width: float,
+    cell_diagonal: float,
+    offset: np.ndarray,
+    halo: int,
+    index: int,
+    cross: np.ndarray,
+    planimetric_areas: np.ndarray,
+    cast: np.ndarray,
+    counters: np.ndarray,
+    visits: np.ndarray,
+) -> Tuple[int, int, np.ndarray, np.ndarray, int, np.ndarray, int, int]:
+    """Create lahar inundation area, compiled version of
+    `pearpy.distal_inundation.create_lahar_inundation`
+
+    Parameters
+    ----------
+    dem : np.ndarray
+        raveled filled dem padded by a no data halo
+    direction : np.ndarray
+        raveled d8 flow direction padded by a blank halo
+    near_blank : np.ndarray
+        raveled cells where the lahar stops, see `pearpy.traversal.near_blank_cells`
+    width : int
+        padded raster width
+    cell_width : float
+        cell width
+    cell_diagonal : float
+        cell diagonal
+    offset : np.ndarray
+        flat index offset of each d8 code, see `pearpy.traversal.offset_table`
+    halo : int
+        halo width, at least `pearpy.traversal.MIN_HALO`
+    index : int
+        starting cell flat index
+    cross : np.ndarray
+        cross section areas sorted descending, its dtype follows numpy scalar casting
+        of the dem
+    planimetric_areas : np.ndarray
+        planimetric areas sorted descending as float64
+    cast : np.ndarray
+        one element scratch array with the dtype of cross section reduction
+    counters : np.ndarray
+        int64 traversed cells, cross sections & lateral cells,
+        see `pearpy.traversal.TRAVERSAL_COUNTERS`, incremented in place
+    visits : np.ndarray
+        uint32 visits of every padded cell by downstream steps and cross section
+        comparisons, incremented in place. empty to skip tracing
+
+    Returns
+    -------
+    Tuple[int, int, np.ndarray, np.ndarray, int, np.ndarray, int, int]
+        status, last cell flat index, planimetric value per level,
+        planimetric extent and its length, planimetric window
+        and its first row & column
+    """
+    level_count = len(cross)
+    value = np.zeros(level_count, dtype=np.int64)
+    # cells inside each level, kept up to date by `_append_point`
+    covered = np.zeros(level_count, dtype=np.int64)
+    cross_ori = cross.copy()
+    ori_count = level_count
+    cross_count = level_count
+
+    extent = planimetric_areas.copy()
+    extent_count = level_count
+
+    height = direction.size // width
+    # the window starts at the starting point and grows with the lahar
+    planimetric = np.ones((1, 1), dtype=np.int32)
+    window = np.array([index // width - halo, index % width - halo], dtype=np.int64)
+
+    cell_traverse_count = 0
+    current_flow_direction = direction[index]
+    if visits.size:
+        visits[index] += 1
+
+    while cell_traverse_count < 90000000 and current_flow_direction != 0:
+        if current_flow_direction < 0 or current_flow_direction > 255:
+            return (
+                STATUS_BAD_DIRECTION,
+                index,
+                value,
+                extent,
+                extent_count,
+                planimetric,
+                window[0],
+                window[1],
+            )
+        if not IS_D8[current_flow_direction]:
+            return (
+                STATUS_BAD_DIRECTION,
+                index,
+                value,
+                extent,
+                extent_count,
+                planimetric,
+                window[0],
+                window[1],
+            )
+
+        for i in range(CROSS_SEQUENCE_LENGTH[current_flow_direction]):
+            cross_count, planimetric = _cross_section(
+                dem,
+                width,
+                height,
+                halo,
+                offset,
+                cell_width,
+                cell_diagonal,
+                CROSS_SEQUENCE[current_flow_direction, i],
+                index,
+                planimetric,
+                window,
+                value,
+                covered,
+                cross,
+                cross_count,
+                cross_ori,
+                ori_count,
+                cast,
+                counters,
+                visits,
+            )
+        checker_code = CHECKER[current_flow_direction]
+        if checker_code:
+            cross_count, planimetric = _cross_section(
+                dem,
+                width,
+                height,
+                halo,
+                offset,
+                cell_width,
+                cell_diagonal,
+                current_flow_direction,
+                index + offset[checker_code],
+                planimetric,
+                window,
+                value,
+                covered,
+                cross,
+                cross_count,
+                cross_ori,
+                ori_count,
+                cast,
+                counters,
+                visits,
+            )
+
+        for i in range(extent_count):
+            extent[i] = planimetric_areas[i] - covered[i] * cell_width * cell_width
+
+        if extent_count > 1:
+            i = 0
+            while i < extent_count:
+                if extent[i] < 0:
+                    ori_count -= 1
+                    cross_count = ori_count
+                    extent_count -= 1
+                i += 1
+        if extent[0] < 0:
+            break
+
+        index += offset[current_flow_direction]
+        current_flow_direction = direction[index]
+        cell_traverse_count += 1
+        counters[0] += 1
+        if visits.size:
+            visits[index] += 1
+
+        if near_blank[index]:
+            return (
+                STATUS_VOLUME_TOO_BIG,
+                index,
+                value,
+                extent,
+                extent_count,
+                planimetric,
+                window[0],
+                window[1],
+            )
+        if current_flow_direction == 255:
+            return (
+                STATUS_FINISHED_AT_BLANK,
+                index,
+                value,
+                extent,
+                extent_count,
+                planimetric,
+                window[0],
+                window[1],
+            )
+
+    return (
+        STATUS_DONE,
+        index,
+        value,
+        extent,
+        extent_count,
+        planimetric,
+        window[0],
+        window[1],
+    )
@@ -0,0 +1,187 @@
+"""
+Confidence limit of lahar cross section and planimetric area.
+
+Area is predicted from volume by a log-log regression on a calibration dataset
+(`pearpy.textfile`). The regression statistics only depend on the dataset, so they are
+computed once by `ConfidenceModel` and reused for every volume.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from math import log10, sqrt
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+from .textfile import py_xxplanb, py_xxsecta, py_xxttabl
+
+confidence2index: Dict[str, int] = {
+    "50.0": 1,
+    "70.0": 2,
+    "80.0": 3,
+    "90.0": 4,
+    "95.0": 5,
+    "97.5": 6,
+    "99.0": 7,
+}
+
+
+@dataclass(frozen=True)
+class Regression:
+    """log volume - log area regression statistics of a calibration dataset"""
+
+    coefficient: float
+    se_model: float
+    mean_log_volume: float
+    mean_diff_total: float
+    one_over_n: float
+    t_table: Tuple[float, ...]
+
+    @classmethod
+    def from_fills(
+        cls,
+        fills: List[Tuple[str, int, int]],
+        intercept: float,
+        coefficient: float,
+    ) -> "Regression":
+        """calculate regression statistics
+
+        Parameters
+        ----------
+        fills : List[Tuple[str, int, int]]
+            calibration dataset, name, volume & area
+        intercept : float
+            intercept of log area
+        coefficient : float
+            area coefficient
+
+        Returns
+        -------
+        Regression
+            regression statistics
+        """
+        residual_sum = 0.0
+        total_log_volume = 0.0
+
+        for (_, volume, area) in fills:
+            log_vol = log10(volume)
+            total_log_volume += log_vol
+
+            log_area_y = log10(area)
+            log_area_pred = (log_vol * 0.666666666667) + intercept
+            diff = (log_area_y - log_area_pred) * (log_area_y - log_area_pred)
+            residual_sum += diff
+
+        se_model = sqrt(residual_sum / (len(fills) - 1))
+        mean_log_volume = total_log_volume / len(fills)
+
+        mean_diff_total = 0.0
+        for (_, volume, area) in fills:
+            diff_log_mean = log10(volume) - mean_log_volume
+            mean_diff_total += diff_log_mean ** 2
+
+        return cls(
+            coefficient,
+            se_model,
+            mean_log_volume,
+            mean_diff_total,
+            1.0 / len(fills),
+            tuple(py_xxttabl[len(fills) - 2]),
+        )
+
+    def bounds(
+        self, volumes: np.ndarray, confidence_limit: float
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """upper & lower area of volumes
+
+        Parameters
+        ----------
+        volumes : np.ndarray
+            volumes
+        confidence_limit : float
+            confidence limit, one of `confidence2index`
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            upper & lower area
+        """
+        volumes = np.asarray(volumes, dtype=np.float64)
+        t_value = self.t_table[confidence2index[str(confidence_limit)]]
+
+        log_regress_area = np.log10(
+            np.round((volumes ** 0.66666666666667) * self.coefficient)
+        )
+        diff_mean_sq = (np.log10(volumes) - self.mean_log_volume) ** 2
+
+        sem = self.se_model * np.sqrt(
+            self.one_over_n + (diff_mean_sq / self.mean_diff_total)
+        )
+        sep = np.sqrt((self.se_model ** 2) + (sem ** 2))
+
+        area_up = 10 ** ((t_value * sep) + log_regress_area)
+        area_dn = 10 ** (log_regress_area - (t_value * sep))
+        return area_up, area_dn
+
+
+@dataclass(frozen=True)
+class ConfidenceAreas:
+    """confidence limit of cross section and planimetric area"""
+
+    cross_section_up: np.ndarray
+    cross_section_down: np.ndarray
+    planimetric_up: np.ndarray
+    planimetric_down: np.ndarray
+
+
+@dataclass(frozen=True)
+class ConfidenceModel:
+    """cross section and planimetric regression of a calibration dataset"""
+
+    cross_section: Regression
+    planimetric: Regression
+
+    @classmethod
+    def from_fills(
+        cls,
+        cross_section_fills: List[Tuple[str, int, int]] = py_xxsecta,
+        planimetric_fills: List[Tuple[str, int, int]] = py_xxplanb,
+    ) -> "ConfidenceModel":
+        """build model from calibration dataset, by default the LAHARZ dataset"""
+        return cls(
+            Regression.from_fills(cross_section_fills, -1.301, 0.05),
+            Regression.from_fills(planimetric_fills, 2.301, 200.0),
+        )
+
+    def areas(
+        self, volumes: Union[np.ndarray, List[float]], confidence_limit: float
+    ) -> ConfidenceAreas:
+        """confidence limit of cross section and planimetric area for many volumes
+
+        Parameters
+        ----------
+        volumes : Union[np.ndarray, List[float]]
+            volumes
+        confidence_limit : float
+            confidence limit, one of `confidence2index`
+
+        Returns
+        -------
+        ConfidenceAreas
+            upper & lower areas with the same shape as volumes
+        """
+        cross_section_up, cross_section_down = self.cross_section.bounds(
+            volumes, confidence_limit
+        )
+        planimetric_up, planimetric_down = self.planimetric.bounds(
+            volumes, confidence_limit
+        )
+        return ConfidenceAreas(
+            cross_section_up, cross_section_down, planimetric_up, planimetric_down
+        )
+
+
+@lru_cache(maxsize=None)
+def default_model() -> ConfidenceModel:
+    """model of the LAHARZ calibration dataset, built once"""
+    return ConfidenceModel.from_fills()
@@ -0,0 +1,15 @@
+"""
+Choices of lahar inundation options.
+
+They are kept apart from `pearpy.distal_inundation` so the command line interface
+can list them without importing the geospatial stack.
+"""
+
+from typing import Dict, Final, Tuple
+
+backends: Final[Tuple[str, ...]] = ("python", "numba")
+fitting_methods: Final[Tuple[str, ...]] = ("bisection", "secant", "linear")
+output_types: Final[Tuple[str, ...]] = ("multi_vector", "raster", "cog", "gpkg", "fgb")
+# output types written by every starting point into one file, by fiona driver
+vector_sinks: Final[Dict[str, str]] = {"gpkg": "GPKG", "fgb": "FlatGeobuf"}
+cog_compressions: Final[Tuple[str, ...]] = ("deflate", "zstd")
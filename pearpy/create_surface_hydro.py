@@ -1,11 +1,22 @@
 import time
+from functools import lru_cache
 from pathlib import Path
-from typing import Callable, Optional, Tuple, Union
+from typing import TYPE_CHECKING, Callable, Optional, Tuple, Union
 
-import whitebox
-from geosardine import Raster
+from .events import Metrics
 
-wbt = whitebox.WhiteboxTools()
+if TYPE_CHECKING:
+    import whitebox
+
+
+@lru_cache(maxsize=None)
+def whitebox_tools() -> "whitebox.WhiteboxTools":
+    """whitebox tools shared by the package, created on first use instead of at import
+    because whitebox looks for (and may download) its binary
+    """
+    import whitebox
+
+    return whitebox.WhiteboxTools()
 
 
 def _create_surface_hydro(
@@ -16,6 +27,7 @@ def _create_surface_hydro(
     out_stream_raster: Path,
     stream_value: int,
     progress_callback: Optional[Callable[[int, int], None]] = None,
+    metrics: Optional[Metrics] = None,
 ) -> None:
     """Create surface hydrology data which is needed to generate inundation area.
 
@@ -35,6 +47,8 @@ def _create_surface_hydro(
         stream threshold to extract stream
     progress_callback : Optional[Callable[[int, int], None]], optional
         to send progress, by default None
+    metrics : Optional[Metrics], optional
+        receives duration of each whitebox tool as a stage, by default None
 
     Returns
     -------
@@ -42,20 +56,30 @@ def _create_surface_hydro(
     """
     if progress_callback is not None:
         progress_callback(0, 0)
-
-    wbt.fill_depressions(input_dem, out_filled)
-    wbt.d8_pointer(out_filled, out_direction, esri_pntr=True)
-    wbt.d8_flow_accumulation(out_direction, out_accumulation, pntr=True, esri_pntr=True)
-    wbt.extract_streams(
-        out_accumulation, out_stream_raster, stream_value, zero_background=True
-    )
-
-    wbt.raster_streams_to_vector(
-        out_stream_raster,
-        out_direction,
-        out_stream_raster.parent.absolute() / f"{out_stream_raster.stem}.shp",
-        esri_pntr=True,
-    )
+    if metrics is None:
+        metrics = Metrics()
+    wbt = whitebox_tools()
+
+    with metrics.stage("fill_depressions"):
+        wbt.fill_depressions(input_dem, out_filled)
+    with metrics.stage("d8_pointer"):
+        wbt.d8_pointer(out_filled, out_direction, esri_pntr=True)
+    with metrics.stage("d8_flow_accumulation"):
+        wbt.d8_flow_accumulation(
+            out_direction, out_accumulation, pntr=True, esri_pntr=True
+        )
+    with metrics.stage("extract_streams"):
+        wbt.extract_streams(
+            out_accumulation, out_stream_raster, stream_value, zero_background=True
+        )
+
+    with metrics.stage("raster_streams_to_vector"):
+        wbt.raster_streams_to_vector(
+            out_stream_raster,
+            out_direction,
+            out_stream_raster.parent.absolute() / f"{out_stream_raster.stem}.shp",
+            esri_pntr=True,
+        )
 
 
 def generate_output_filenames(
@@ -90,6 +114,7 @@ def create_surface_hydro(
     output_directory: Union[str, Path],
     stream_value: int,
     progress_callback: Optional[Callable[[int, int], None]] = None,
+    metrics: Optional[Metrics] = None,
 ) -> None:
     """Wrapper to create surface hydrology file
 
@@ -103,6 +128,8 @@ def create_surface_hydro(
         stream threshold to extract stream
     progress_callback : Optional[Callable[[int, int], None]], optional
         to send progress, by default None
+    metrics : Optional[Metrics], optional
+        receives duration of each whitebox tool, by default None
     """
     output_path = Path(output_directory)
     input_dem = Path(input_dem)
@@ -112,4 +139,5 @@ def create_surface_hydro(
         *generate_output_filenames(output_path, input_dem, stream_value),
         stream_value,
         progress_callback,
+        metrics,
     )
@@ -1,71 +1,71 @@
+import json
+import multiprocessing
+import sqlite3
+import threading
+import traceback
+import warnings
 from collections import OrderedDict
-from dataclasses import dataclass, field
-from math import log10, sqrt
+from concurrent.futures import (
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
+from contextlib import closing
+from dataclasses import asdict, dataclass, field
+from functools import partial
+from math import inf, sqrt
 from pathlib import Path
-from typing import Callable, Dict, Final, List, Optional, Tuple, Union
+from time import perf_counter
+from typing import Any, Callable, Dict, Final, Iterator, List, Optional, Tuple, Union
 
 import fiona
 import numpy as np
 import rasterio
+from affine import Affine
 from geosardine.raster import polygonize
 from tqdm.autonotebook import tqdm
 
+try:
+    from multiprocessing.shared_memory import SharedMemory
+except ImportError:  # python 3.7
+    SharedMemory = None
+
+from rasterio.dtypes import get_minimum_dtype
+from rasterio.windows import Window
+from rasterio.windows import transform as window_transform
+from shapely.geometry import MultiPolygon, mapping, shape
+
 from pearpy.custom_types import RasterioMeta
 
-from .textfile import py_xxplanb, py_xxsecta, py_xxttabl
-
-cardinal_first = {32: (16, 64), 128: (64, 1), 2: (1, 4), 8: (4, 16)}
-cardinal_second = {1: (128, 2), 4: (2, 8), 16: (8, 32), 64: (32, 128)}
-
-checker_board: Dict[int, Callable[[int, int], Tuple[int, int]]] = {
-    8: lambda r, c: (r + 1, c),
-    32: lambda r, c: (r, c - 1),
-    128: lambda r, c: (r - 1, c),
-    2: lambda r, c: (r, c + 1),
-}
-
-confidence2index = {
-    "50.0": 1,
-    "70.0": 2,
-    "80.0": 3,
-    "90.0": 4,
-    "95.0": 5,
-    "97.5": 6,
-    "99.0": 7,
-}
-
-left_cell: Dict[int, Callable[[int, int], Tuple[int, int]]] = {
-    1: lambda r, c: (r - 1, c),
-    2: lambda r, c: (r - 1, c + 1),
-    4: lambda r, c: (r, c + 1),
-    8: lambda r, c: (r + 1, c + 1),
-    16: lambda r, c: (r + 1, c),
-    32: lambda r, c: (r + 1, c - 1),
-    64: lambda r, c: (r, c - 1),
-    128: lambda r, c: (r - 1, c - 1),
-}
-
-move_downstream: Dict[int, Callable[[int, int], Tuple[int, int]]] = {
-    1: lambda r, c: (r, c + 1),
-    2: lambda r, c: (r + 1, c + 1),
-    4: lambda r, c: (r + 1, c),
-    8: lambda r, c: (r + 1, c - 1),
-    16: lambda r, c: (r, c - 1),
-    32: lambda r, c: (r - 1, c - 1),
-    64: lambda r, c: (r - 1, c),
-    128: lambda r, c: (r - 1, c + 1),
-}
-
-next_cell: Dict[int, Tuple[int, int]] = {
-    1: (-1, 0),
-    2: (-1, 1),
-    4: (0, 1),
-    8: (1, 1),
-    16: (1, 0),
-    32: (1, -1),
-    64: (0, -1),
-    128: (-1, -1),
-}
+from .confidence import ConfidenceModel, confidence2index, default_model
+from .constants import (
+    backends,
+    cog_compressions,
+    fitting_methods,
+    output_types,
+    vector_sinks,
+)
+from .events import Event, Metrics
+from .memory import MemoryTracker
+from .result_cache import ResultCache
+from .traversal import (
+    CHECKER,
+    CROSS_SEQUENCE,
+    CROSS_SEQUENCE_LENGTH,
+    D8_CODES,
+    LEFT,
+    MIN_HALO,
+    RIGHT,
+    TRAVERSAL_COUNTERS,
+    FlowGrid,
+    grow_window,
+    near_blank_cells,
+    pad,
+)
+
+no_data: Final[float] = 99999.0
+minimum_volume: Final[int] = 32
 
 
 class CrossSectionTooLong(Exception):
@@ -76,36 +76,214 @@ class CrossSectionTooLong(Exception):
 
 @dataclass
 class DEMData:
-    """contain dem array and its cell size"""
+    """contain dem array and its cell size,
+    `halo` is the width of no data cells padded around the array and
+    `near_blank` marks padded cells where the lahar stops, see `near_blank_cells`
+    """
 
     array: np.ndarray
     cell_diagonal: float
     cell_width: float
+    halo: int = 0
+    near_blank: Optional[np.ndarray] = field(default=None, repr=False)
 
 
-@dataclass
 class PlanimetricData:
-    """Planimetric area information and function"""
+    """Planimetric area information and function.
+    `array` is a window of the raster which grows when the lahar reaches outside of it,
+    cells outside of the window are 1. `shape` is the raster shape and
+    `row_offset` & `col_offset` are the position of the window.
+    `value` counts cells of each array value (level + 2) and `covered` counts cells
+    inside each level, both are updated per cell by `append_point2array`.
+    `cross_area` holds the cross area of every level, only the first `cross_count`
+    levels are active. `cross_area_ori` holds the cross area at the start of
+    a cross section, its first `ori_count` levels are active.
+    """
 
-    value: List[float]
-    array: np.ndarray
-    cross_area: List[float]
-    cross_area_ori: List[float] = field(default_factory=list)
-    previous_count: int = 0
-    last_count: int = 0
+    __slots__ = (
+        "value",
+        "array",
+        "cross_area",
+        "cross_area_ori",
+        "cross_count",
+        "ori_count",
+        "previous_count",
+        "last_count",
+        "shape",
+        "row_offset",
+        "col_offset",
+        "covered",
+    )
 
-    def __post_init__(self) -> None:
-        """create a copy of original to reset the data after move downward"""
+    def __init__(
+        self,
+        value: List[float],
+        array: np.ndarray,
+        cross_area: Union[List[float], np.ndarray],
+        previous_count: int = 0,
+        last_count: int = 0,
+        shape: Tuple[int, int] = (0, 0),
+        row_offset: int = 0,
+        col_offset: int = 0,
+        dtype: Any = np.float64,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        value : List[float]
+            cell count of each array value
+        array : np.ndarray
+            planimetric window
+        cross_area : Union[List[float], np.ndarray]
+            cross area of each level, sorted descending
+        previous_count : int, optional
+            by default 0
+        last_count : int, optional
+            by default 0
+        shape : Tuple[int, int], optional
+            raster shape, by default the window shape
+        row_offset : int, optional
+            window first row, by default 0
+        col_offset : int, optional
+            window first column, by default 0
+        dtype : Any, optional
+            cross area dtype, see `cross_area_dtype`, by default np.float64
+        """
+        self.value = value
+        self.array = array
+        self.cross_area = np.array(cross_area, dtype=dtype)
+        # original to reset the data after move downward
         self.cross_area_ori = self.cross_area.copy()
+        self.cross_count = len(self.cross_area)
+        self.ori_count = self.cross_count
+        self.previous_count = previous_count
+        self.last_count = last_count
+        self.shape = array.shape if shape == (0, 0) else shape
+        self.row_offset = row_offset
+        self.col_offset = col_offset
+        # a cell with value v is inside level 0 to v - 2
+        self.covered = np.cumsum(np.array(value, dtype=np.int64)[::-1])[::-1].copy()
 
     def restore(self) -> None:
         """reset the data after move downward"""
-        self.cross_area = self.cross_area_ori.copy()
+        self.cross_area[: self.ori_count] = self.cross_area_ori[: self.ori_count]
+        self.cross_count = self.ori_count
 
     def pop_cross(self) -> None:
         """pop cross area"""
-        self.cross_area.pop()
-        self.cross_area_ori = self.cross_area
+        self.ori_count -= 1
+        self.cross_count = self.ori_count
+
+    def reduce_cross(
+        self,
+        first_elevation: float,
+        second_elevation: float,
+        cell_dimension: float,
+        cell_count: int = 1,
+    ) -> None:
+        """reduce cross area of every active level in place,
+        levels which are no longer positive are dropped if there are more than one
+
+        Parameters
+        ----------
+        first_elevation : float
+            first elevation
+        second_elevation : float
+            second elevation
+        cell_dimension : float
+            width
+        cell_count : int, optional
+            filled cell count, by default 1
+        """
+        count = self.cross_count
+        self.cross_area[:count] -= (first_elevation - second_elevation) * (
+            cell_dimension * cell_count
+        )
+        if count > 1:
+            # cross areas are sorted descending, so positive ones come first
+            while count and self.cross_area[count - 1] <= 0:
+                count -= 1
+            self.cross_count = count
+
+    def is_filling(self) -> bool:
+        """whether the biggest active cross area is not filled yet"""
+        return self.cross_count > 0 and self.cross_area[0] > 0
+
+    def reserve(self, row: int, col: int) -> None:
+        """grow the window until it contains the cell"""
+        height, width = self.array.shape
+        if (
+            self.row_offset <= row < self.row_offset + height
+            and self.col_offset <= col < self.col_offset + width
+        ):
+            return
+        top, left, height, width = grow_window(
+            row, col, self.row_offset, self.col_offset, height, width, *self.shape
+        )
+        array = np.ones((height, width), dtype=self.array.dtype)
+        previous_height, previous_width = self.array.shape
+        row_start = self.row_offset - top
+        col_start = self.col_offset - left
+        array[
+            row_start : row_start + previous_height,
+            col_start : col_start + previous_width,
+        ] = self.array
+        self.array = array
+        self.row_offset = top
+        self.col_offset = left
+
+    def crop(self) -> Tuple[np.ndarray, int, int]:
+        """smallest part of the window which contains every inundated cell,
+        the whole window if there is no inundated cell
+
+        Returns
+        -------
+        Tuple[np.ndarray, int, int]
+            cropped planimetric array, its first row & column in the raster
+        """
+        inundated = self.array != 1
+        rows = np.flatnonzero(inundated.any(axis=1))
+        if not rows.size:
+            return self.array, self.row_offset, self.col_offset
+        cols = np.flatnonzero(inundated.any(axis=0))
+        return (
+            self.array[rows[0] : rows[-1] + 1, cols[0] : cols[-1] + 1],
+            self.row_offset + int(rows[0]),
+            self.col_offset + int(cols[0]),
+        )
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """every attribute as numpy array, see `from_arrays`"""
+        return {name: np.asarray(getattr(self, name)) for name in self.__slots__}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "PlanimetricData":
+        """planimetric data from `to_arrays`"""
+        planimetrics = cls.__new__(cls)
+        for name in ("array", "cross_area", "cross_area_ori", "covered"):
+            setattr(planimetrics, name, arrays[name])
+        for name in (
+            "cross_count",
+            "ori_count",
+            "previous_count",
+            "last_count",
+            "row_offset",
+            "col_offset",
+        ):
+            setattr(planimetrics, name, int(arrays[name]))
+        planimetrics.value = arrays["value"].tolist()
+        planimetrics.shape = tuple(arrays["shape"].tolist())
+        return planimetrics
+
+    def materialise(self) -> np.ndarray:
+        """planimetric array of the whole raster"""
+        array = np.ones(self.shape, dtype=self.array.dtype)
+        height, width = self.array.shape
+        array[
+            self.row_offset : self.row_offset + height,
+            self.col_offset : self.col_offset + width,
+        ] = self.array
+        return array
 
 
 def calc_area(
@@ -149,59 +327,10 @@ def calc_confidence_limit(
     Tuple[float, float]
         volumes
     """
-
-    an_intercept = 2.301
-    dec_intercept = 200.0
-    fills = py_xxplanb
-    if is_cross_section:
-        an_intercept = -1.301
-        dec_intercept = 0.05
-        fills = py_xxsecta
-
-    residual_sum = 0.0
-    total_log_volume = 0.0
-
-    for (_, volume, area) in fills:
-        log_vol = log10(volume)
-        total_log_volume += log_vol
-
-        log_area_y = log10(area)
-        log_area_pred = (log_vol * 0.666666666667) + an_intercept
-        diff = (log_area_y - log_area_pred) * (log_area_y - log_area_pred)
-        residual_sum += diff
-
-    se_model = sqrt(residual_sum / (len(fills) - 1))
-    mean_log_volume = total_log_volume / len(fills)
-
-    mean_diff_total = 0.0
-    one_over_n = 1.0 / len(fills)
-
-    for (_, volume, area) in fills:
-        log_vol = log10(volume)
-        diff_log_mean = log_vol - mean_log_volume
-        diff_squared = diff_log_mean ** 2
-
-        mean_diff_total += diff_squared
-
-    crossttabll = py_xxttabl[len(fills) - 2]
-    cross_section_data = crossttabll[confidence2index[str(confidence_limit)]]
-
-    area_up: float = 0.0
-    area_dn: float = 0.0
-    if cross_section_data is not None:
-        log_user_volume = log10(user_volume)
-        user_regress_area = round((user_volume ** 0.66666666666667) * dec_intercept)
-
-        diff_mean = log_user_volume - mean_log_volume
-        diff_mean_sq = diff_mean ** 2
-
-        sem = se_model * sqrt(one_over_n + (diff_mean_sq / mean_diff_total))
-        sep = sqrt((se_model ** 2) + (sem ** 2))
-
-        area_up = 10 ** ((cross_section_data * sep) + log10(user_regress_area))
-        area_dn = 10 ** (log10(user_regress_area) - (cross_section_data * sep))
-
-    return area_up, area_dn
+    model = default_model()
+    regression = model.cross_section if is_cross_section else model.planimetric
+    area_up, area_dn = regression.bounds(np.array([user_volume]), confidence_limit)
+    return float(area_up[0]), float(area_dn[0])
 
 
 def calc_cell_dimension(dem: rasterio.DatasetReader) -> Tuple[float, float]:
@@ -222,18 +351,77 @@ def calc_cell_dimension(dem: rasterio.DatasetReader) -> Tuple[float, float]:
     return width, diagonal
 
 
+def pad_rasters(
+    dem: DEMData, direction_array: np.ndarray, halo: int = MIN_HALO
+) -> Tuple[DEMData, np.ndarray]:
+    """pad dem and flow direction by a halo, dem halo is no data and direction halo
+    is blank (255). cross section and downstream walk stop in the halo, so they never
+    leave the raster. cells near blank are computed once here and reused by every
+    starting point.
+
+    Parameters
+    ----------
+    dem : DEMData
+        dem array and its cell size, without halo
+    direction_array : np.ndarray
+        d8 flow direction as numpy array, without halo
+    halo : int, optional
+        halo width in cells, by default MIN_HALO
+
+    Returns
+    -------
+    Tuple[DEMData, np.ndarray]
+        padded dem & flow direction
+    """
+    dem_array = dem.array
+    if not np.issubdtype(dem_array.dtype, np.floating):
+        # no data doesn't fit in integer elevation
+        dem_array = dem_array.astype(np.float64)
+    padded_direction = pad(direction_array, halo, 255)
+    padded_dem = DEMData(
+        array=pad(dem_array, halo, no_data),
+        cell_diagonal=dem.cell_diagonal,
+        cell_width=dem.cell_width,
+        halo=halo,
+        near_blank=near_blank_cells(padded_direction),
+    )
+    return padded_dem, padded_direction
+
+
+# unpadded dem & direction arrays of the last call of `_pad_once` and their padding
+_last_padded: Dict[str, Any] = {}
+
+
+def _pad_once(dem: DEMData, direction_array: np.ndarray) -> Tuple[DEMData, np.ndarray]:
+    """`pad_rasters` which reuses the padding of the last rasters, so points inundated
+    one by one on unpadded rasters pad them and count near blank cells once.
+    arrays are matched by identity, they must not be changed in place between calls
+    """
+    last = _last_padded.get("rasters")
+    if (
+        last is None
+        or last[0] is not dem.array
+        or last[1] is not direction_array
+        or (last[2].cell_width, last[2].cell_diagonal)
+        != (dem.cell_width, dem.cell_diagonal)
+    ):
+        last = (dem.array, direction_array, *pad_rasters(dem, direction_array))
+        _last_padded["rasters"] = last
+    return last[2], last[3]
+
+
 def append_point2array(
-    row: int, col: int, planimetrics: PlanimetricData
+    index: int, grid: FlowGrid, planimetrics: PlanimetricData
 ) -> PlanimetricData:
     """
     add or reduce the cross area
 
     Parameters
     ----------
-    row : int
-        cell row
-    col : int
-        cell column
+    index : int
+        cell flat index
+    grid : FlowGrid
+        padded dem & flow direction
     planimetrics : PlanimetricData
         planimetric (cros and long section) data
 
@@ -242,110 +430,93 @@ def append_point2array(
     PlanimetricData
         planimetric (cros and long section) data
     """
-    cross_area_count = len(planimetrics.cross_area) + 1
+    cross_area_count = planimetrics.cross_count + 1
+    row, col = grid.rowcol(index)
+    planimetrics.reserve(row, col)
+    row -= planimetrics.row_offset
+    col -= planimetrics.col_offset
     dem_value = planimetrics.array[row, col]
 
     if dem_value == 1:
         planimetrics.array[row, col] = cross_area_count
         planimetrics.value[cross_area_count - 2] += 1
+        planimetrics.covered[: cross_area_count - 1] += 1
     elif dem_value < cross_area_count:
         planimetrics.array[row, col] = cross_area_count
         planimetrics.value[dem_value - 2] -= 1
         planimetrics.value[cross_area_count - 2] += 1
+        planimetrics.covered[dem_value - 1 : cross_area_count - 1] += 1
 
     return planimetrics
 
 
 def get_next_cell(
-    row: int,
-    col: int,
-    cell_side: int,
-    flow_direction: int,
-    dem_array: np.ndarray,
-    no_data: float = 99999.0,
-) -> Tuple[int, int, Union[int, float]]:
-    """get next cell whether left or downward
+    index: int, code: int, grid: FlowGrid
+) -> Tuple[int, Union[int, float]]:
+    """get next cell whether left or right
 
     Parameters
     ----------
-    row : int
-    col : int
-    cell_side : int
-    flow_direction : int
-    dem_array : np.ndarray
-    no_data : float, optional
-        no data, by default 99999.0
+    index : int
+        cell flat index
+    code : int
+        d8 code of the move
+    grid : FlowGrid
+        padded dem & flow direction
 
     Returns
     -------
-    Tuple[int, int, Union[int, float]]
-        row, col, elevation
-
-    Raises
-    ------
-    ValueError
-        Flow doesn't follow d8 flow style
+    Tuple[int, Union[int, float]]
+        index, elevation. elevation is no data in the halo
     """
-    if flow_direction in [1, 2, 4, 8, 16, 32, 64, 128]:
-        row_operator, col_operator = next_cell[flow_direction]
-    else:
-        raise ValueError(f"Bad flow direction {flow_direction}")
+    next_index = grid.step(index, code)
+    return next_index, grid.dem[next_index]
 
-    original_x, original_y = row, col
-    row += cell_side * row_operator
-    col += cell_side * col_operator
 
-    try:
-        elevation = dem_array[row, col]
-    except IndexError:
-        row, col = original_x, original_y
-        elevation = no_data
+def visit_array(dem: DEMData) -> np.ndarray:
+    """zero cell visits of a padded dem, counted by `create_lahar_inundation`.
+    a uint32 per cell, as big as half of a float64 dem
+
+    Parameters
+    ----------
+    dem : DEMData
+        dem padded by `pad_rasters`
 
-    return row, col, elevation
+    Returns
+    -------
+    np.ndarray
+        flat visits of every padded cell
+    """
+    return np.zeros(dem.array.size, dtype=np.uint32)
 
 
-def create_cross_area(
-    first_elevation: float,
-    second_elevation: float,
-    cell_dimension: float,
-    cross_areas: List[float],
-    cell_count: int = 1,
-) -> List[float]:
-    """calculate the area of cross section of lahar inundation
+def cross_area_dtype(dem_dtype: Any) -> np.dtype:
+    """dtype which numpy gives when a cross area is reduced by an elevation difference,
+    so reducing a cross area array in place gives the same value as reducing a scalar
 
     Parameters
     ----------
-    first_elevation : float
-        first elevation
-    second_elevation : float
-        second elevation
-    cell_dimension : float
-        width
-    cross_areas : List[float]
-        list of cross areas
-    cell_count : int, optional
-        [description], by default 1
+    dem_dtype : Any
+        dem dtype
 
     Returns
     -------
-    List[float]
-        [description]
+    np.dtype
+        cross area dtype
     """
-    cross_areas = [
-        area - ((first_elevation - second_elevation) * (cell_dimension * cell_count))
-        for area in cross_areas
-    ]
-    if len(cross_areas) > 1:
-        # Remove negative value
-        cross_areas = list(filter(lambda x: x > 0, cross_areas))
-    return cross_areas
+    elevation = np.dtype(dem_dtype).type(0)
+    reduction = (elevation - elevation) * 1.0
+    return np.result_type(0 - reduction)
 
 
 def calc_cross_section(
     dem: DEMData,
+    grid: FlowGrid,
     flow_direction: int,
-    row_col: Tuple[int, int],
+    index: int,
     planimetrics: PlanimetricData,
+    counters: Optional[np.ndarray] = None,
+    visits: Optional[np.ndarray] = None,
 ) -> PlanimetricData:
     """Calculate cross section
 
@@ -353,12 +524,20 @@ def calc_cross_section(
     ----------
     dem : DEMData
         Later DEM array and cell size
+    grid : FlowGrid
+        padded dem & flow direction
     flow_direction : int
         current cell flow dire tion
-    row_col : Tuple[int, int]
-        current row column
+    index : int
+        current cell flat index
     planimetrics : PlanimetricData
         planimetric (cros and long section) data
+    counters : Optional[np.ndarray], optional
+        cross sections and lateral cells are added to it, see `TRAVERSAL_COUNTERS`,
+        by default None
+    visits : Optional[np.ndarray], optional
+        left & right cells compared in each step are counted in it, see `visit_array`,
+        by default None
 
     Returns
     -------
@@ -374,130 +553,108 @@ def calc_cross_section(
     if flow_direction in [8, 128, 2, 32]:
         cell_dimension = dem.cell_diagonal
 
-    right_x, right_y = row_col
-
-    if flow_direction not in [1, 2, 4, 8, 16, 32, 64, 128]:
+    if flow_direction not in D8_CODES:
         raise ValueError(
-            f"flow direction is not a valid d8. possibly sink or out of region, direction: {flow_direction}"
+            "flow direction is not a valid d8. possibly sink or out of region, "
+            f"direction: {flow_direction}"
         )
-    left_x, left_y = left_cell[flow_direction](right_x, right_y)
+    left_code = LEFT[flow_direction]
+    right_code = RIGHT[flow_direction]
 
-    try:
-        left_elevation = dem.array[left_x, left_y]
-        right_elevation = dem.array[right_x, right_y]
-    except IndexError:
+    right_index = index
+    left_index = grid.step(right_index, left_code)
+    if grid.is_halo(right_index) or grid.is_halo(left_index):
         return planimetrics
 
+    left_elevation = grid.dem[left_index]
+    right_elevation = grid.dem[right_index]
+
     fill_elevation = right_elevation
     count = 0
-    cell_norm = 1
-    cell_wneg = -1
     cell_count = 0
 
-    while (
-        count < 1000000000
-        and planimetrics.cross_area
-        and planimetrics.cross_area[0] > 0
-    ):
+    while count < 1000000000 and planimetrics.is_filling():
+        if visits is not None:
+            visits[left_index] += 1
+            visits[right_index] += 1
         if left_elevation == fill_elevation:
-            planimetrics = append_point2array(left_x, left_y, planimetrics)
-            left_x, left_y, left_elevation = get_next_cell(
-                left_x, left_y, cell_norm, flow_direction, dem.array
-            )
+            planimetrics = append_point2array(left_index, grid, planimetrics)
+            left_index, left_elevation = get_next_cell(left_index, left_code, grid)
             cell_count += 1
         elif right_elevation == fill_elevation:
-            planimetrics = append_point2array(right_x, right_y, planimetrics)
-            right_x, right_y, right_elevation = get_next_cell(
-                right_x, right_y, cell_wneg, flow_direction, dem.array
-            )
+            planimetrics = append_point2array(right_index, grid, planimetrics)
+            right_index, right_elevation = get_next_cell(right_index, right_code, grid)
             cell_count += 1
 
         elif right_elevation < fill_elevation:
-            planimetrics.cross_area = create_cross_area(
-                fill_elevation, right_elevation, cell_dimension, planimetrics.cross_area
-            )
+            planimetrics.reduce_cross(fill_elevation, right_elevation, cell_dimension)
             cell_count += 1
-            if planimetrics.cross_area and planimetrics.cross_area[0] > 0:
-                planimetrics = append_point2array(right_x, right_y, planimetrics)
-                right_x, right_y, right_elevation = get_next_cell(
-                    right_x, right_y, cell_wneg, flow_direction, dem.array
+            if planimetrics.is_filling():
+                planimetrics = append_point2array(right_index, grid, planimetrics)
+                right_index, right_elevation = get_next_cell(
+                    right_index, right_code, grid
                 )
 
         elif left_elevation < fill_elevation:
-            planimetrics.cross_area = create_cross_area(
-                fill_elevation, left_elevation, cell_dimension, planimetrics.cross_area
-            )
+            planimetrics.reduce_cross(fill_elevation, left_elevation, cell_dimension)
             cell_count += 1
-            if planimetrics.cross_area and planimetrics.cross_area[0] > 0:
-                planimetrics = append_point2array(left_x, left_y, planimetrics)
-                left_x, left_y, left_elevation = get_next_cell(
-                    left_x, left_y, cell_norm, flow_direction, dem.array
-                )
+            if planimetrics.is_filling():
+                planimetrics = append_point2array(left_index, grid, planimetrics)
+                left_index, left_elevation = get_next_cell(left_index, left_code, grid)
 
         elif right_elevation == left_elevation:
-            planimetrics.cross_area = create_cross_area(
-                right_elevation,
-                fill_elevation,
-                cell_dimension,
-                planimetrics.cross_area,
-                cell_count,
+            planimetrics.reduce_cross(
+                right_elevation, fill_elevation, cell_dimension, cell_count
             )
 
-            if planimetrics.cross_area and planimetrics.cross_area[0] > 0:
+            if planimetrics.is_filling():
                 fill_elevation = right_elevation
-                planimetrics = append_point2array(left_x, left_y, planimetrics)
-                left_x, left_y, left_elevation = get_next_cell(
-                    left_x, left_y, cell_norm, flow_direction, dem.array
-                )
+                planimetrics = append_point2array(left_index, grid, planimetrics)
+                left_index, left_elevation = get_next_cell(left_index, left_code, grid)
 
-                planimetrics = append_point2array(right_x, right_y, planimetrics)
-                right_x, right_y, right_elevation = get_next_cell(
-                    right_x, right_y, cell_wneg, flow_direction, dem.array
+                planimetrics = append_point2array(right_index, grid, planimetrics)
+                right_index, right_elevation = get_next_cell(
+                    right_index, right_code, grid
                 )
                 cell_count += 2
 
         elif right_elevation > left_elevation:
-            planimetrics.cross_area = create_cross_area(
-                left_elevation,
-                fill_elevation,
-                cell_dimension,
-                planimetrics.cross_area,
-                cell_count,
+            planimetrics.reduce_cross(
+                left_elevation, fill_elevation, cell_dimension, cell_count
             )
             cell_count += 1
-            if planimetrics.cross_area and planimetrics.cross_area[0] > 0:
+            if planimetrics.is_filling():
                 fill_elevation = left_elevation
-                planimetrics = append_point2array(left_x, left_y, planimetrics)
-                left_x, left_y, left_elevation = get_next_cell(
-                    left_x, left_y, cell_norm, flow_direction, dem.array
-                )
+                planimetrics = append_point2array(left_index, grid, planimetrics)
+                left_index, left_elevation = get_next_cell(left_index, left_code, grid)
 
         elif right_elevation < left_elevation:
-            planimetrics.cross_area = create_cross_area(
-                right_elevation,
-                fill_elevation,
-                cell_dimension,
-                planimetrics.cross_area,
-                cell_count,
+            planimetrics.reduce_cross(
+                right_elevation, fill_elevation, cell_dimension, cell_count
             )
             cell_count += 1
-            if planimetrics.cross_area and planimetrics.cross_area[0] > 0:
+            if planimetrics.is_filling():
                 fill_elevation = right_elevation
-                planimetrics = append_point2array(right_x, right_y, planimetrics)
-                right_x, right_y, left_elevation = get_next_cell(
-                    right_x, right_y, cell_wneg, flow_direction, dem.array
+                planimetrics = append_point2array(right_index, grid, planimetrics)
+                right_index, left_elevation = get_next_cell(
+                    right_index, right_code, grid
                 )
 
-        if left_elevation == 99999.0 or right_elevation == 99999.0:
-            planimetrics.cross_area = [-99999 for _ in planimetrics.cross_area]
+        if left_elevation == no_data or right_elevation == no_data:
+            planimetrics.cross_area[: planimetrics.cross_count] = -99999
 
         count += 1
+    if counters is not None:
+        counters[1] += 1
+        counters[2] += count
     planimetrics.restore()
     return planimetrics
 
 
 def calc_cross_planimetric(
-    volumes: List[int], confidence_limit: float
+    volumes: List[int],
+    confidence_limit: Optional[float],
+    model: Optional[ConfidenceModel] = None,
 ) -> Tuple[List[float], List[float]]:
     """calculate the planimetric and cross section area based on volume
 
@@ -505,8 +662,11 @@ def calc_cross_planimetric(
     ----------
     volumes : List[int]
         lahar volume
-    confidence_limit : float
-        confidence limit to be used
+    confidence_limit : Optional[float]
+        confidence limit to be used for the first volume,
+        None to use the volumes only
+    model : Optional[ConfidenceModel], optional
+        regression model of confidence limit, by default the LAHARZ dataset
 
     Returns
     -------
@@ -516,16 +676,19 @@ def calc_cross_planimetric(
     cross_section_areas = calc_area(volumes, 0.05)
     planimetric_areas = calc_area(volumes, 200)
 
-    cross_section_area1, cross_section_area3 = calc_confidence_limit(
-        True, volumes[0], confidence_limit
-    )
-
-    planimetric_area1, planimetric_area3 = calc_confidence_limit(
-        False, volumes[0], confidence_limit
-    )
+    if confidence_limit is not None:
+        if model is None:
+            model = default_model()
+        areas = model.areas(np.array(volumes[:1]), confidence_limit)
 
-    cross_section_areas += [round(cross_section_area1), round(cross_section_area3)]
-    planimetric_areas += [round(planimetric_area1), round(planimetric_area3)]
+        cross_section_areas += [
+            round(float(areas.cross_section_up[0])),
+            round(float(areas.cross_section_down[0])),
+        ]
+        planimetric_areas += [
+            round(float(areas.planimetric_up[0])),
+            round(float(areas.planimetric_down[0])),
+        ]
 
     return sorted(cross_section_areas, reverse=True), sorted(
         planimetric_areas, reverse=True
@@ -574,11 +737,120 @@ def read_coordinates(file_location: str, input_volume: int = -1) -> List[StartPo
     return coordinates
 
 
+def resolve_backend(backend: str) -> str:
+    """check inundation backend, fall back to python if numba is not installed
+
+    Parameters
+    ----------
+    backend : str
+        "python" or "numba"
+
+    Returns
+    -------
+    str
+        backend which will be used
+
+    Raises
+    ------
+    ValueError
+        unknown backend
+    """
+    if backend not in backends:
+        raise ValueError(f"unknown backend {backend}, available: {backends}")
+    if backend == "numba":
+        # numba is imported only when it is asked for
+        from . import _inundation_kernel
+
+        if not _inundation_kernel.HAS_NUMBA:
+            warnings.warn("numba is not installed, use python backend instead")
+            return "python"
+    return backend
+
+
+def _create_lahar_inundation_numba(
+    start_point: StartPoint,
+    dem: DEMData,
+    direction_array: np.ndarray,
+    cross_section_areas: List[float],
+    planimetric_areas: List[float],
+    counters: np.ndarray,
+    visits: Optional[np.ndarray] = None,
+) -> Tuple[PlanimetricData, List[float]]:
+    """run compiled kernel and wrap its result as python implementation does,
+    traversal counters are added to `counters` and cell visits to `visits`
+    """
+    from . import _inundation_kernel
+
+    grid = FlowGrid(dem.array, direction_array, dem.halo, dem.near_blank)
+    index = grid.index(start_point.row, start_point.col)
+
+    elevation = dem.array.dtype.type(0)
+    cast = np.empty(1, dtype=np.result_type((elevation - elevation) * 1.0))
+    cross = np.array(cross_section_areas, dtype=cross_area_dtype(dem.array.dtype))
+
+    (
+        status,
+        index,
+        value,
+        extent,
+        extent_count,
+        planimetric_array,
+        row_offset,
+        col_offset,
+    ) = _inundation_kernel.create_lahar_inundation(
+        grid.dem,
+        grid.direction,
+        grid.near_blank,
+        grid.width,
+        float(dem.cell_width),
+        float(dem.cell_diagonal),
+        grid.offset,
+        grid.halo,
+        index,
+        cross,
+        np.array(planimetric_areas, dtype=np.float64),
+        cast,
+        counters,
+        visits if visits is not None else np.zeros(0, dtype=np.uint32),
+    )
+    check_planimetric_extent = extent[:extent_count].tolist()
+    row, col = grid.rowcol(index)
+
+    if status == _inundation_kernel.STATUS_BAD_DIRECTION:
+        raise ValueError(
+            "flow direction is not a valid d8. possibly sink or out of region, "
+            f"direction: {grid.direction[index]}"
+        )
+    if status == _inundation_kernel.STATUS_VOLUME_TOO_BIG:
+        print(
+            f"volume too big: {start_point.volume}, "
+            f"there are leftover: {check_planimetric_extent}"
+        )
+    elif status == _inundation_kernel.STATUS_FINISHED_AT_BLANK:
+        print(f"finished at blank, row:{row}, col:{col}")
+
+    planimetrics = PlanimetricData(
+        value=value.tolist(),
+        array=planimetric_array,
+        cross_area=cross_section_areas[:extent_count],
+        shape=grid.shape,
+        dtype=cross.dtype,
+        row_offset=int(row_offset),
+        col_offset=int(col_offset),
+    )
+    return planimetrics, check_planimetric_extent
+
+
 def create_lahar_inundation(
     start_point: StartPoint,
     dem: DEMData,
     direction_array: np.ndarray,
     confidence_limit: Union[int, float],
+    backend: str = "python",
+    volumes: Optional[List[int]] = None,
+    cache: Optional[ResultCache] = None,
+    metrics: Optional[Metrics] = None,
+    visits: Optional[np.ndarray] = None,
 ) -> Tuple[PlanimetricData, List[float]]:
     """Create lahar inundation area
 
@@ -589,39 +861,153 @@ def create_lahar_inundation(
     dem : DEMData
         planimetric (cros and long section) data
     direction_array : np.ndarray
-        d8 flow direction as numpy array
+        d8 flow direction as numpy array, padded by the same halo as dem.
+        both are padded here if dem has no halo, the padding of the last rasters
+        is reused
     confidence_limit : Union[int, float]
         confidence limit
+    backend : str, optional
+        "python" or "numba" (compiled, needs numba), by default "python".
+        both backends give identical result
+    volumes : Optional[List[int]], optional
+        several volumes inundated in one traversal as nested levels, the biggest volume
+        is level 2 in planimetric array. start point volume and confidence limit
+        are not used, by default None
+    cache : Optional[ResultCache], optional
+        results of the same dem, flow direction, starting cell, volumes and
+        confidence limit are read from it instead of being computed, by default None
+    metrics : Optional[Metrics], optional
+        receives traversal duration and `TRAVERSAL_COUNTERS`, or a cache hit,
+        by default None
+    visits : Optional[np.ndarray], optional
+        cells of the starting point & every downstream step, and left & right cells
+        compared in each cross section step are counted in it, see `visit_array`.
+        "cell_visits" counter is emitted and cache is not used, by default None
 
     Returns
     -------
     Tuple[PlanimetricData, List[float]]
-        [description]
+        planimetric data of the inundation, its window covers every inundated cell,
+        and leftover planimetric area of each level still filling when the lahar
+        stopped, biggest level first. the inundation fits when the first leftover
+        is not positive. on a cache hit both are read from the cache
 
     Raises
     ------
-    CrossSectionTooLong
-        [description]
-    CrossSectionTooLong
-        [description]
+    ValueError
+        unknown backend, a flow direction which is not d8 on the path of the lahar,
+        or `visits` without a cell of every padded dem cell
     """
-    cross_section_areas, planimetric_areas = calc_cross_planimetric(
-        [start_point.volume], confidence_limit
-    )
+    if metrics is None:
+        metrics = Metrics()
+    if volumes:
+        cross_section_areas, planimetric_areas = calc_cross_planimetric(
+            sorted(volumes, reverse=True), None
+        )
+    else:
+        cross_section_areas, planimetric_areas = calc_cross_planimetric(
+            [start_point.volume], confidence_limit
+        )
+    if cache is not None and visits is None:
+        key = cache.key(
+            (dem.array, direction_array),
+            dem.cell_width,
+            dem.cell_diagonal,
+            dem.halo,
+            start_point.row,
+            start_point.col,
+            sorted(volumes, reverse=True) if volumes else start_point.volume,
+            None if volumes else confidence_limit,
+            cross_section_areas,
+            planimetric_areas,
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            metrics.count("cache_hits")
+            return PlanimetricData.from_arrays(cached), cached["extent"].tolist()
+        planimetrics, extent = create_lahar_inundation(
+            start_point,
+            dem,
+            direction_array,
+            confidence_limit,
+            backend,
+            volumes,
+            metrics=metrics,
+        )
+        cache.put(key, {**planimetrics.to_arrays(), "extent": np.asarray(extent)})
+        return planimetrics, extent
+
+    if not dem.halo:
+        dem, direction_array = _pad_once(dem, direction_array)
+    if visits is not None and visits.size != dem.array.size:
+        raise ValueError(
+            "visits must have a cell of every padded dem cell, see visit_array"
+        )
+
+    counters = np.zeros(len(TRAVERSAL_COUNTERS), dtype=np.int64)
+    with metrics.stage("traversal"):
+        if resolve_backend(backend) == "numba":
+            planimetrics, extent = _create_lahar_inundation_numba(
+                start_point,
+                dem,
+                direction_array,
+                cross_section_areas,
+                planimetric_areas,
+                counters,
+                visits,
+            )
+        else:
+            planimetrics, extent = _create_lahar_inundation_python(
+                start_point,
+                dem,
+                direction_array,
+                cross_section_areas,
+                planimetric_areas,
+                counters,
+                visits,
+            )
+    for name, value in zip(TRAVERSAL_COUNTERS, counters.tolist()):
+        metrics.count(name, value)
+    if visits is not None:
+        # the starting cell, downstream steps and 2 cells per cross section step
+        metrics.count("cell_visits", 1 + int(counters[0]) + 2 * int(counters[2]))
+    return planimetrics, extent
 
-    check_planimetric_extent = planimetric_areas.copy()
-    row = start_point.row
-    col = start_point.col
 
+def _create_lahar_inundation_python(
+    start_point: StartPoint,
+    dem: DEMData,
+    direction_array: np.ndarray,
+    cross_section_areas: List[float],
+    planimetric_areas: List[float],
+    counters: np.ndarray,
+    visits: Optional[np.ndarray] = None,
+) -> Tuple[PlanimetricData, List[float]]:
+    """walk downstream from the starting point and fill cross sections,
+    traversal counters are added to `counters` and cell visits to `visits`
+    """
+    level_areas = np.array(planimetric_areas, dtype=np.float64)
+    extent = level_areas.copy()
+    extent_count = len(planimetric_areas)
+    grid = FlowGrid(dem.array, direction_array, dem.halo, dem.near_blank)
+    index = grid.index(start_point.row, start_point.col)
+
+    # the window starts at the starting point and grows with the lahar
     planimetrics = PlanimetricData(
-        value=[0 for _ in range(len(check_planimetric_extent))],
-        array=np.ones(direction_array.shape, dtype=int),
+        value=[0 for _ in range(extent_count)],
+        array=np.ones((1, 1), dtype=np.int32),
         cross_area=cross_section_areas,
+        shape=grid.shape,
+        row_offset=start_point.row,
+        col_offset=start_point.col,
+        dtype=cross_area_dtype(dem.array.dtype),
     )
 
     cell_traverse_count = 0
-    current_flow_direction = direction_array[row, col]
+    current_flow_direction = grid.direction[index]
     all_stop = False
+    if visits is not None:
+        visits[index] += 1
 
     try:
         while (
@@ -629,291 +1015,1831 @@ def create_lahar_inundation(
             and cell_traverse_count < 90000000
             and current_flow_direction != 0
         ):
-            planimetrics = calc_cross_section(
-                dem,
-                current_flow_direction,
-                (row, col),
-                planimetrics,
-            )
-            first_direction, second_direction = cardinal_first.get(
-                current_flow_direction, (None, current_flow_direction)
-            )
-            original_direction = current_flow_direction
-            if first_direction is not None:
-                planimetrics = calc_cross_section(
-                    dem,
-                    first_direction,
-                    (row, col),
-                    planimetrics,
-                )
-                planimetrics = calc_cross_section(
-                    dem,
-                    second_direction,
-                    (row, col),
-                    planimetrics,
-                )
-            first_direction, second_direction = cardinal_second.get(
-                second_direction, (None, 0)
-            )
-            if first_direction is not None:
-                planimetrics = calc_cross_section(
-                    dem,
-                    first_direction,
-                    (row, col),
-                    planimetrics,
+            if current_flow_direction not in D8_CODES:
+                raise ValueError(
+                    "flow direction is not a valid d8. possibly sink or out of region, "
+                    f"direction: {current_flow_direction}"
                 )
+            for direction in CROSS_SEQUENCE[
+                current_flow_direction, : CROSS_SEQUENCE_LENGTH[current_flow_direction]
+            ]:
                 planimetrics = calc_cross_section(
                     dem,
-                    second_direction,
-                    (row, col),
+                    grid,
+                    direction,
+                    index,
                     planimetrics,
+                    counters,
+                    visits,
                 )
-            current_flow_direction = original_direction
-            if current_flow_direction in [2, 8, 32, 128]:
-                _row, _col = checker_board[current_flow_direction](row, col)
+            checker_code = CHECKER[current_flow_direction]
+            if checker_code:
                 planimetrics = calc_cross_section(
                     dem,
+                    grid,
                     current_flow_direction,
-                    (_row, _col),
+                    grid.step(index, checker_code),
                     planimetrics,
+                    counters,
+                    visits,
                 )
-            planimetrics.value.reverse()
-            sigma_value = 0.0
-            temp_plan: List[float] = []
-            for value in planimetrics.value:
-                sigma_value += value
-                temp_plan.append(sigma_value * dem.cell_width * dem.cell_width)
-            temp_plan.reverse()
-            check_planimetric_extent = [
-                planimetric_areas[i] - temp_plan[i]
-                for i, _ in enumerate(check_planimetric_extent)
-            ]
-
-            planimetrics.value.reverse()
+            extent = (
+                level_areas - planimetrics.covered * dem.cell_width * dem.cell_width
+            )
 
-            if len(check_planimetric_extent) > 1:
-                for _, p in enumerate(check_planimetric_extent):
-                    if p < 0:
+            if extent_count > 1:
+                # the smallest level is removed once for every negative extent seen
+                # while the extent list shrinks
+                i = 0
+                while i < extent_count:
+                    if extent[i] < 0:
                         planimetrics.pop_cross()
-                        planimetric_areas.pop()
-                        cross_section_areas.pop()
-                        check_planimetric_extent.pop()
-            if check_planimetric_extent[0] < 0:
+                        extent_count -= 1
+                    i += 1
+            if extent[0] < 0:
                 break
-            row, col = move_downstream[current_flow_direction](row, col)
-            current_flow_direction = direction_array[row, col]
+            index = grid.step(index, current_flow_direction)
+            current_flow_direction = grid.direction[index]
             cell_traverse_count += 1
-            check_end = direction_array[row - 5 : row + 5, col - 5 : col + 5] == 255
+            counters[0] += 1
+            if visits is not None:
+                visits[index] += 1
+            row, col = grid.rowcol(index)
 
-            if sum(check_end.ravel()) > 5:
+            if grid.near_blank[index]:
                 print(
-                    f"volume too big: {start_point.volume}, there are leftover: {check_planimetric_extent}"
+                    f"volume too big: {start_point.volume}, "
+                    f"there are leftover: {extent[:extent_count].tolist()}"
                 )
                 raise CrossSectionTooLong
             if current_flow_direction == 255:
                 print(f"finished at blank, row:{row}, col:{col}")
                 raise CrossSectionTooLong
-
-        return planimetrics, check_planimetric_extent
     except CrossSectionTooLong:
-        return planimetrics, check_planimetric_extent
+        pass
 
+    return planimetrics, extent[:extent_count].tolist()
 
-def save_result(
-    inundation: np.ndarray,
-    volume: int,
-    output_folder: Path,
-    index: int,
-    schema: RasterioMeta,
-    format: str,
-) -> None:
-    """[summary]
 
-    Parameters
-    ----------
-    inundation : np.ndarray
-        [description]
-    volume : int
-        [description]
-    output_folder : Path
-        [description]
-    index : int
-        [description]
-    schema : RasterioMeta
-        [description]
-    format : str
-        [description]
-    """
-    if format == "raster":
-        with rasterio.open(
-            output_folder / f"stream_{index}_{volume}.tif", "w", **schema
-        ) as output:
-            output.write(inundation, 1)
-    elif format == "multi_vector":
-        union_features = polygonize(
-            inundation,
-            schema["transform"],
-            inundation != 1,
-            lambda x: x["properties"]["raster_val"],
-        )
-        with fiona.open(
-            output_folder / f"stream_{index}_{volume}.shp",
-            "w",
-            driver="ESRI Shapefile",
-            crs=schema["crs"],
-            schema={
-                "geometry": "Polygon",
-                "properties": OrderedDict([("raster_val", "int")]),
-            },
-        ) as out:
-            out.writerecords(union_features)
+@dataclass
+class LevelArea:
+    """planimetric area of a level in multi volume inundation"""
 
+    level: int
+    volume: int
+    area: float
+    leftover: float
 
-def _batch_lahar_inundation(
-    input_raster: str,
-    start_points: List[StartPoint],
-    confidence_limit: float,
-    output_folder: str = "",
-    output_type: str = "multi_vector",
-    progress_callback: Optional[Callable[[int, int], None]] = None,
-) -> None:
-    """[summary]
+
+def summarise_levels(
+    volumes: List[int], planimetrics: PlanimetricData, cell_width: float
+) -> List[LevelArea]:
+    """planimetric area of each level of multi volume inundation
 
     Parameters
     ----------
-    input_raster : str
-        [description]
-    start_points : List[StartPoint]
-        [description]
-    confidence_limit : float
-        [description]
-    output_folder : str, optional
-        [description], by default ""
-    output_type : str, optional
-        [description], by default "multi_vector"
-    progress_callback : Optional[Callable[[int, int], None]], optional
-        [description], by default None
+    volumes : List[int]
+        volumes used in `create_lahar_inundation`
+    planimetrics : PlanimetricData
+        planimetric data of the inundation
+    cell_width : float
+        cell width
 
-    Raises
-    ------
-    ValueError
-        [description]
-    ValueError
-        [description]
+    Returns
+    -------
+    List[LevelArea]
+        level (value in planimetric array), volume, inundated area and
+        planimetric area which is not reached, biggest volume first
     """
-    raster_path = Path(input_raster)
-    basename = raster_path.name
-
-    if raster_path.is_dir():
-        prefix_name = basename
-        if basename.endswith("fill"):
-            prefix_name = basename.rstrip("fill")
-        else:
-            raise ValueError(
-                f"{basename} is not a name for filled dem. Please follow the convention"
+    volumes = sorted(volumes, reverse=True)
+    _, planimetric_areas = calc_cross_planimetric(volumes, None)
+    levels: List[LevelArea] = []
+    for i, volume in enumerate(volumes):
+        # a cell in level i has value i + 2 or more
+        area = sum(planimetrics.value[i:]) * cell_width * cell_width
+        levels.append(LevelArea(i + 2, volume, area, planimetric_areas[i] - area))
+    return levels
+
+
+def save_level_summary(
+    levels: List[LevelArea], output_folder: Path, index: int, volume: int
+) -> None:
+    """save area of each level as csv, next to the inundation"""
+    with open(output_folder / f"stream_{index}_{volume}_levels.csv", "w") as output:
+        output.write("level,volume,area,leftover\n")
+        for level in levels:
+            output.write(
+                f"{level.level},{level.volume},{level.area},{level.leftover}\n"
             )
 
-        input_dem = raster_path.absolute()
-        input_direction = raster_path.parent.joinpath(f"{prefix_name}dir")
-    else:
-        prefix_name = raster_path.stem
-        if prefix_name.endswith("fill"):
-            prefix_name = prefix_name.rstrip("fill")
-        else:
+
+@dataclass
+class VolumeFitting:
+    """how volume of a starting point is reduced until the inundation fits in the
+    raster. "bisection" and "secant" bracket the largest fitting volume between
+    `minimum_volume` and the input volume, "linear" reduces the volume by 20
+    (or proportional to leftover) until it fits.
+    a warning is given when `max_iterations` runs are used before the volume fits.
+    """
+
+    method: str = "bisection"
+    # stop when fitting and not fitting volume are this close
+    tolerance: int = 20
+    # inundation runs per point, by default 30 for "bisection" and "secant"
+    # and unlimited for "linear"
+    max_iterations: Optional[int] = None
+
+    @property
+    def iterations(self) -> float:
+        """maximum inundation runs per point"""
+        if self.max_iterations is not None:
+            return self.max_iterations
+        return inf if self.method == "linear" else 30
+
+    def __post_init__(self) -> None:
+        if self.method not in fitting_methods:
             raise ValueError(
-                f"{basename} is not a name for filled dem. Please follow the convention"
+                f"unknown fitting method {self.method}, available: {fitting_methods}"
             )
 
-        input_dem = raster_path.parent.joinpath(
-            f"{prefix_name}fill{raster_path.suffix}"
-        )
-        input_direction = raster_path.parent.joinpath(
-            f"{prefix_name}dir{raster_path.suffix}"
-        )
 
-    with rasterio.open(input_dem) as fill_file, rasterio.open(
-        input_direction
-    ) as direction_file:
+@dataclass
+class FittedInundation:
+    """lahar inundation of the fitted volume"""
 
-        dem_array = fill_file.read(1)
-        direction_array = direction_file.read(1)
+    volume: int
+    planimetrics: PlanimetricData
+    extent: List[float]
+    evaluations: int
 
-        schema = RasterioMeta(
-            **{
-                "driver": "GTiff",
-                "count": 1,
-                "crs": direction_file.crs,
-                "dtype": np.int32,
-                "transform": direction_file.transform,
-                "height": direction_array.shape[0],
-                "width": direction_array.shape[1],
-            }
-        )
 
-        cell_width, cell_diagonal = calc_cell_dimension(fill_file)
+def _is_fit(planimetrics: PlanimetricData, extent: List[float]) -> bool:
+    """whether the whole planimetric area of the biggest level is used"""
+    return extent[0] <= 0 and planimetrics.last_count <= 5000
 
-        low_left_x = fill_file.bounds.left
-        up_right_y = fill_file.bounds.top
 
-        dem = DEMData(
-            array=dem_array,
-            cell_diagonal=cell_diagonal,
-            cell_width=cell_width,
+def fit_volume(
+    start_point: StartPoint,
+    dem: DEMData,
+    direction_array: np.ndarray,
+    confidence_limit: Union[int, float],
+    backend: str = "python",
+    fitting: Optional[VolumeFitting] = None,
+    cache: Optional[ResultCache] = None,
+    metrics: Optional[Metrics] = None,
+    visits: Optional[np.ndarray] = None,
+) -> FittedInundation:
+    """reduce volume of a starting point until its inundation fits in the raster.
+    leftover planimetric area grows with volume, so the largest fitting volume
+    is bracketed and searched by bisection or secant on the leftover area.
+
+    Parameters
+    ----------
+    start_point : StartPoint
+        starting point, its volume is set to the fitted volume
+    dem : DEMData
+        dem array and its cell size
+    direction_array : np.ndarray
+        d8 flow direction as numpy array
+    confidence_limit : Union[int, float]
+        confidence limit
+    backend : str, optional
+        inundation backend, by default "python"
+    fitting : Optional[VolumeFitting], optional
+        fitting method, by default bisection with 20 tolerance
+    cache : Optional[ResultCache], optional
+        cache of inundation runs, see `create_lahar_inundation`, by default None
+    metrics : Optional[Metrics], optional
+        receives counters of every inundation run and "fitting_retries", by default None
+    visits : Optional[np.ndarray], optional
+        cell visits of every inundation run are counted in it, by default None
+
+    Returns
+    -------
+    FittedInundation
+        inundation of the fitted volume and number of inundation runs
+    """
+    if fitting is None:
+        fitting = VolumeFitting()
+    if metrics is None:
+        metrics = Metrics()
+    runs = 0
+
+    def evaluate(volume: int) -> Tuple[PlanimetricData, List[float]]:
+        nonlocal runs
+        if runs:
+            metrics.count("fitting_retries")
+        runs += 1
+        start_point.volume = volume
+        return create_lahar_inundation(
+            start_point,
+            dem,
+            direction_array,
+            confidence_limit,
+            backend,
+            cache=cache,
+            metrics=metrics,
+            visits=visits,
         )
 
-    output_stream: Path = Path(output_folder)
-    if not output_folder.strip():
-        output_stream = raster_path.parent / "stream"
-        if not output_stream.exists():
-            output_stream.mkdir(exist_ok=False)
+    high = start_point.volume
+    planimetrics, extent = evaluate(high)
+    evaluations = 1
 
-    progress_total = len(start_points)
-    for i, start_point in tqdm(enumerate(start_points)):
-        if start_point.volume > 32:
-            start_point.to_rowcol(up_right_y, low_left_x, cell_width)
+    if fitting.method == "linear":
+        while (
+            not _is_fit(planimetrics, extent)
+            and start_point.volume > minimum_volume
+            and evaluations < fitting.iterations
+        ):
+            if extent[0] > 10000:
+                volume = start_point.volume - int(extent[0] / 10000 * 50)
+            else:
+                volume = start_point.volume - 20
+
+            planimetrics, extent = evaluate(max(volume, minimum_volume))
+            evaluations += 1
+        if not _is_fit(planimetrics, extent) and start_point.volume > minimum_volume:
+            warnings.warn(
+                f"volume of {start_point.coordinate} does not fit "
+                f"after {evaluations} runs, increase max_iterations"
+            )
+        return FittedInundation(start_point.volume, planimetrics, extent, evaluations)
+
+    if _is_fit(planimetrics, extent) or high <= minimum_volume:
+        return FittedInundation(high, planimetrics, extent, evaluations)
+    high_leftover = extent[0]
+
+    low = minimum_volume
+    planimetrics, extent = evaluate(low)
+    evaluations += 1
+    if not _is_fit(planimetrics, extent):
+        return FittedInundation(low, planimetrics, extent, evaluations)
+    fitted = FittedInundation(low, planimetrics, extent, evaluations)
+    low_leftover = extent[0]
+
+    # side kept by the previous secant step, used to avoid one sided convergence
+    kept = 0
+    while high - low > fitting.tolerance and evaluations < fitting.iterations:
+        # area grows with volume ** (2 / 3), halve the bracket in log scale
+        volume = min(max(round(sqrt(low * high)), low + 1), high - 1)
+        if fitting.method == "secant" and high_leftover != low_leftover:
+            secant = round(
+                low + (high - low) * -low_leftover / (high_leftover - low_leftover)
+            )
+            if low < secant < high:
+                volume = secant
+
+        planimetrics, extent = evaluate(volume)
+        evaluations += 1
+        if _is_fit(planimetrics, extent):
+            low, low_leftover = volume, extent[0]
+            fitted = FittedInundation(volume, planimetrics, extent, evaluations)
+            if kept == 1:
+                high_leftover /= 2
+            kept = 1
+        else:
+            high, high_leftover = volume, extent[0]
+            if kept == -1:
+                low_leftover /= 2
+            kept = -1
+    if high - low > fitting.tolerance:
+        warnings.warn(
+            f"volume of {start_point.coordinate} is fitted within {high - low} "
+            f"after {evaluations} runs, increase max_iterations"
+        )
+
+    start_point.volume = fitted.volume
+    fitted.evaluations = evaluations
+    return fitted
+
+
+@dataclass
+class CogOptions:
+    """cloud optimized geotiff output of `save_result`. cells are written
+    in tiles of `block_size`, compressed by "deflate" or "zstd" (needs gdal with zstd)
+    and encoded by `threads` gdal threads. overviews are added until they fit in a tile.
+    """
+
+    compress: str = "deflate"
+    block_size: int = 256
+    threads: str = "ALL_CPUS"
+
+    def __post_init__(self) -> None:
+        if self.compress not in cog_compressions:
+            raise ValueError(
+                f"unknown compression {self.compress}, available: {cog_compressions}"
+            )
+
+
+def save_cog(
+    planimetrics: PlanimetricData,
+    path: Path,
+    schema: RasterioMeta,
+    options: Optional[CogOptions] = None,
+) -> None:
+    """save window of inundated cells as cloud optimized geotiff,
+    with the smallest dtype which fits the planimetric values
+
+    Parameters
+    ----------
+    planimetrics : PlanimetricData
+        planimetric data
+    path : Path
+        output file
+    schema : RasterioMeta
+        metadata of the whole raster
+    options : Optional[CogOptions], optional
+        tiling & compression, by default `CogOptions()`
+    """
+    if options is None:
+        options = CogOptions()
+    array, row, col = planimetrics.crop()
+    height, width = array.shape
+    dtype = get_minimum_dtype(max(int(array.max()), len(planimetrics.value) + 1))
+    with rasterio.open(
+        path,
+        "w",
+        driver="COG",
+        count=1,
+        crs=schema["crs"],
+        dtype=dtype,
+        transform=window_transform(
+            Window(col, row, width, height), schema["transform"]
+        ),
+        height=height,
+        width=width,
+        blocksize=options.block_size,
+        compress=options.compress,
+        predictor=2,
+        overview_resampling="nearest",
+        num_threads=options.threads,
+    ) as output:
+        output.write(array.astype(dtype, copy=False), 1)
+
+
+def save_heatmap(
+    visits: np.ndarray, dem: DEMData, path: Path, schema: RasterioMeta
+) -> bool:
+    """save cell visits as deflate compressed geotiff of the window of visited cells,
+    with the smallest dtype which fits the highest count
+
+    Parameters
+    ----------
+    visits : np.ndarray
+        flat visits of padded dem, see `visit_array`
+    dem : DEMData
+        padded dem
+    path : Path
+        output file
+    schema : RasterioMeta
+        metadata of the whole raster
+
+    Returns
+    -------
+    bool
+        False if no cell is visited and nothing is saved
+    """
+    halo = dem.halo
+    height, width = dem.array.shape
+    array = visits.reshape(dem.array.shape)[halo : height - halo, halo : width - halo]
+    rows = np.flatnonzero(array.any(axis=1))
+    cols = np.flatnonzero(array.any(axis=0))
+    if not rows.size:
+        return False
+    row, col = int(rows[0]), int(cols[0])
+    array = array[row : rows[-1] + 1, col : cols[-1] + 1]
+    dtype = get_minimum_dtype(int(array.max()))
+    with rasterio.open(
+        path,
+        "w",
+        driver="COG",
+        count=1,
+        crs=schema["crs"],
+        dtype=dtype,
+        nodata=0,
+        transform=window_transform(
+            Window(col, row, array.shape[1], array.shape[0]), schema["transform"]
+        ),
+        height=array.shape[0],
+        width=array.shape[1],
+        compress="deflate",
+        predictor=2,
+        overview_resampling="nearest",
+    ) as output:
+        output.write(array.astype(dtype, copy=False), 1)
+    return True
+
+
+def save_visit_totals(totals: Dict[int, Dict[str, int]], path: Path) -> None:
+    """save cell visits and traversal counters of each starting point as csv"""
+    columns = ("cell_visits",) + TRAVERSAL_COUNTERS
+    with open(path, "w") as output:
+        output.write(",".join(("index",) + columns) + "\n")
+        for index, counters in sorted(totals.items()):
+            output.write(
+                ",".join(
+                    [str(index)] + [str(counters.get(column, 0)) for column in columns]
+                )
+                + "\n"
+            )
+
+
+def _polygonize_window(
+    planimetrics: PlanimetricData, schema: RasterioMeta, simplify: float = 0.0
+) -> List[Dict[str, Any]]:
+    """polygon per planimetric value of the window of inundated cells"""
+    array, row, col = planimetrics.crop()
+    height, width = array.shape
+    union_features = polygonize(
+        # rasterio shapes does not take int64, e.g. windows of cached results
+        array.astype(np.int32, copy=False),
+        window_transform(Window(col, row, width, height), schema["transform"]),
+        array != 1,
+        lambda x: x["properties"]["raster_val"],
+    )
+    if simplify > 0:
+        for feature in union_features:
+            feature["geometry"] = mapping(
+                shape(feature["geometry"]).simplify(simplify, preserve_topology=True)
+            )
+    return union_features
+
+
+def save_polygons(
+    planimetrics: PlanimetricData,
+    path: Path,
+    schema: RasterioMeta,
+    simplify: float = 0.0,
+) -> None:
+    """save inundated cells as polygon per planimetric value in a shapefile.
+    only the window of inundated cells is polygonized
 
-            planimetrics, check_planimetric_extent = create_lahar_inundation(
+    Parameters
+    ----------
+    planimetrics : PlanimetricData
+        planimetric data
+    path : Path
+        output file
+    schema : RasterioMeta
+        metadata of the whole raster
+    simplify : float, optional
+        simplification tolerance in crs unit, 0 to keep cell edges, by default 0.0
+    """
+    with fiona.open(
+        path,
+        "w",
+        driver="ESRI Shapefile",
+        crs=schema["crs"],
+        schema={
+            "geometry": "Polygon",
+            "properties": OrderedDict([("raster_val", "int")]),
+        },
+    ) as out:
+        out.writerecords(_polygonize_window(planimetrics, schema, simplify))
+
+
+def inundation_features(
+    planimetrics: PlanimetricData,
+    schema: RasterioMeta,
+    index: int,
+    volume: int,
+    confidence_limit: Optional[float],
+    volumes: Optional[List[int]] = None,
+    simplify: float = 0.0,
+) -> List[Dict[str, Any]]:
+    """multipolygon per level of a starting point, with `VectorSink` attributes
+
+    Parameters
+    ----------
+    planimetrics : PlanimetricData
+        planimetric data
+    schema : RasterioMeta
+        metadata of the whole raster
+    index : int
+        starting point index
+    volume : int
+        final volume
+    confidence_limit : Optional[float]
+        confidence limit of the upper & lower level
+    volumes : Optional[List[int]], optional
+        volumes of multi volume inundation, volume of each level instead of `volume`
+        and without confidence limit, by default None
+    simplify : float, optional
+        simplification tolerance in crs unit, by default 0.0
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        features with index, volume, level (planimetric value) & confidence
+    """
+    level_volumes = sorted(volumes, reverse=True) if volumes else None
+    features: List[Dict[str, Any]] = []
+    for feature in _polygonize_window(planimetrics, schema, simplify):
+        level = int(feature["properties"]["raster_val"])
+        geometry = shape(feature["geometry"])
+        if geometry.geom_type == "Polygon":
+            geometry = MultiPolygon([geometry])
+        features.append(
+            {
+                "type": "Feature",
+                "geometry": mapping(geometry),
+                "properties": OrderedDict(
+                    [
+                        ("index", index),
+                        (
+                            "volume",
+                            level_volumes[level - 2] if level_volumes else volume,
+                        ),
+                        ("level", level),
+                        ("confidence", None if volumes else confidence_limit),
+                    ]
+                ),
+            }
+        )
+    return features
+
+
+class VectorSink:
+    """one GeoPackage or FlatGeobuf layer for inundation of every starting point.
+    features are buffered and written by `batch_size`, fiona writes each batch
+    in one transaction. one transaction for the run is not used, fiona commits every
+    20000 features anyway and the buffer would hold every feature of the run.
+    points of a committed batch are kept when the run is interrupted, see `RunManifest`.
+    the spatial index is built once when the sink is closed.
+    `write` can be called from several threads. a GeoPackage can be appended,
+    features of points written again are removed first so they are not duplicated.
+    """
+
+    schema: Dict[str, Any] = {
+        "geometry": "MultiPolygon",
+        "properties": OrderedDict(
+            [
+                ("index", "int"),
+                ("volume", "int"),
+                ("level", "int"),
+                ("confidence", "float"),
+            ]
+        ),
+    }
+
+    def __init__(
+        self,
+        path: Path,
+        output_type: str,
+        crs: Any,
+        batch_size: int = 10000,
+        append: bool = False,
+        remove: Optional[List[int]] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        path : Path
+            output file, it is overwritten unless appended
+        output_type : str
+            "gpkg" or "fgb", see `vector_sinks`
+        crs : Any
+            coordinate reference system
+        batch_size : int, optional
+            features written at once, by default 10000
+        append : bool, optional
+            add features to an existing GeoPackage layer, by default False
+        remove : Optional[List[int]], optional
+            starting point indexes whose features are deleted before appending,
+            e.g. written by a killed run but not recorded, by default None
+
+        Raises
+        ------
+        ValueError
+            unknown output type or appending FlatGeobuf
+        """
+        if output_type not in vector_sinks:
+            raise ValueError(
+                f"unknown vector sink {output_type}, available: {tuple(vector_sinks)}"
+            )
+        if append and output_type != "gpkg":
+            raise ValueError(f"{output_type} can not be appended")
+        self.path = path
+        self.batch_size = batch_size
+        self._buffer: List[Dict[str, Any]] = []
+        # called when buffered features are written
+        self._written: List[Callable[[], None]] = []
+        # FlatGeobuf is only complete when it is closed
+        self._written_on_close = output_type == "fgb"
+        self._lock = threading.Lock()
+        if append and path.exists():
+            if remove:
+                self._remove(path, remove)
+            self._collection = fiona.open(path, "a", layer="inundation")
+        else:
+            self._collection = fiona.open(
+                path,
+                "w",
+                driver=vector_sinks[output_type],
+                crs=crs,
+                schema=self.schema,
+                layer="inundation",
+                SPATIAL_INDEX="YES",
+            )
+
+    @staticmethod
+    def _remove(path: Path, indexes: List[int]) -> None:
+        # fiona can not delete features, the rtree index is kept by gpkg triggers
+        with closing(sqlite3.connect(str(path))) as gpkg, gpkg:
+            gpkg.executemany(
+                'DELETE FROM inundation WHERE "index" = ?',
+                [(index,) for index in indexes],
+            )
+
+    def write(
+        self,
+        features: List[Dict[str, Any]],
+        written: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """buffer features of a starting point,
+        `written` is called once they are in the file
+        """
+        with self._lock:
+            self._buffer.extend(features)
+            if written is not None:
+                self._written.append(written)
+            if len(self._buffer) >= self.batch_size:
+                self._flush()
+
+    def _notify(self) -> None:
+        written, self._written = self._written, []
+        for callback in written:
+            callback()
+
+    def _flush(self) -> None:
+        if self._buffer:
+            self._collection.writerecords(self._buffer)
+            self._buffer = []
+        if not self._written_on_close:
+            self._notify()
+
+    def flush(self) -> None:
+        """write buffered features"""
+        with self._lock:
+            self._flush()
+
+    def close(self) -> None:
+        """write the rest of features and build spatial index"""
+        with self._lock:
+            try:
+                self._flush()
+            finally:
+                self._collection.close()
+            self._notify()
+
+    def __enter__(self) -> "VectorSink":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+class ResultWriter:
+    """background threads which save results while the next starting point is
+    computed. at most `max_pending` results wait or are being saved, `submit` blocks
+    when it is full so memory stays bounded. the first error is raised by the next
+    `submit` or `close`.
+    """
+
+    def __init__(self, workers: int = 1, max_pending: int = 4) -> None:
+        """
+        Parameters
+        ----------
+        workers : int, optional
+            number of writer threads, by default 1
+        max_pending : int, optional
+            results kept in memory at most, by default 4
+        """
+        if workers < 1 or max_pending < 1:
+            raise ValueError("writer needs at least 1 worker and 1 pending result")
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="pearpy-writer"
+        )
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._errors: List[BaseException] = []
+
+    def _done(self, future: "Future[None]") -> None:
+        error = future.exception()
+        if error is not None:
+            self._errors.append(error)
+        self._slots.release()
+
+    def _raise(self) -> None:
+        if self._errors:
+            raise self._errors[0]
+
+    def submit(self, function: Callable[..., None], *args: Any) -> None:
+        """call function in a writer thread, wait if there are `max_pending` results"""
+        self._raise()
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(function, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(self._done)
+
+    def close(self) -> None:
+        """wait until every result is saved"""
+        self._executor.shutdown(wait=True)
+        self._raise()
+
+    def __enter__(self) -> "ResultWriter":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+def output_name(index: int, volume: int, output_type: str) -> str:
+    """file name of a starting point inundation, see `save_result` and `VectorSink`"""
+    if output_type in vector_sinks:
+        return f"stream.{output_type}"
+    extension = "shp" if output_type == "multi_vector" else "tif"
+    return f"stream_{index}_{volume}.{extension}"
+
+
+def save_result(
+    planimetrics: PlanimetricData,
+    volume: int,
+    output_folder: Path,
+    index: int,
+    schema: RasterioMeta,
+    format: str,
+    cog: Optional[CogOptions] = None,
+    simplify: float = 0.0,
+) -> None:
+    """save lahar inundation of a starting point as stream_{index}_{volume}
+
+    Parameters
+    ----------
+    planimetrics : PlanimetricData
+        planimetric data
+    volume : int
+        volume, used as output name
+    output_folder : Path
+        output folder
+    index : int
+        starting point index, used as output name
+    schema : RasterioMeta
+        metadata of the whole raster
+    format : str
+        "raster" for geotiff of the whole raster, "cog" for cloud optimized geotiff
+        of inundated cells or "multi_vector" for shapefile of inundated cells,
+        see `output_types`
+    cog : Optional[CogOptions], optional
+        options of "cog" format, by default `CogOptions()`
+    simplify : float, optional
+        polygon simplification tolerance of "multi_vector" format, see `save_polygons`,
+        by default 0.0
+    """
+    path = output_folder / output_name(index, volume, format)
+    if format == "raster":
+        with rasterio.open(path, "w", **schema) as output:
+            output.write(planimetrics.materialise(), 1)
+    elif format == "cog":
+        save_cog(planimetrics, path, schema, cog)
+    elif format == "multi_vector":
+        save_polygons(planimetrics, path, schema, simplify)
+
+
+def _save_point(
+    planimetrics: PlanimetricData,
+    volume: int,
+    output_folder: Path,
+    index: int,
+    schema: RasterioMeta,
+    output_type: str,
+    confidence_limit: float,
+    volumes: Optional[List[int]],
+    sink: Optional[Callable[..., None]],
+    written: Optional[Callable[[], None]] = None,
+    metrics: Optional[Metrics] = None,
+) -> None:
+    """pass features to sink for `vector_sinks` output types, otherwise save a file.
+    `written` is called once the result is in the output file. polygonization of
+    vector output is reported as "polygonize" stage
+    """
+    if metrics is None:
+        metrics = Metrics()
+    if output_type in vector_sinks:
+        if sink is None:
+            raise ValueError(f"{output_type} output needs a sink")
+        with metrics.stage("polygonize", index):
+            features = inundation_features(
+                planimetrics, schema, index, volume, confidence_limit, volumes
+            )
+        sink(features, written)
+    else:
+        if output_type == "multi_vector":
+            with metrics.stage("polygonize", index):
+                save_result(
+                    planimetrics, volume, output_folder, index, schema, output_type
+                )
+        else:
+            save_result(planimetrics, volume, output_folder, index, schema, output_type)
+        if written is not None:
+            written()
+
+
+@dataclass
+class InundationResult:
+    """lahar inundation of a starting point, yielded by `iter_lahar_inundation`.
+    `array` holds planimetric values of the smallest window which contains every
+    inundated cell, a cell in level i has value i + 2 or more and cells outside of
+    the lahar are 1.
+    """
+
+    index: int
+    start_point: StartPoint
+    # final volume
+    volume: int
+    array: np.ndarray = field(repr=False)
+    window: Window
+    # transform of the window
+    transform: Affine
+    # leftover planimetric area of each level, not reached by the lahar
+    extent: List[float]
+    # seconds spent in inundation, including volume fitting
+    elapsed: float
+    # number of inundation runs
+    evaluations: int
+    planimetrics: PlanimetricData = field(repr=False)
+    # area of each level of multi volume inundation
+    levels: Optional[List[LevelArea]] = None
+    # counters of the point, see `pearpy.events.Metrics`
+    counters: Dict[str, int] = field(default_factory=dict)
+
+
+def _inundate_point(
+    index: int,
+    start_point: StartPoint,
+    dem: DEMData,
+    direction_array: np.ndarray,
+    confidence_limit: float,
+    transform: Affine,
+    backend: str,
+    fitting: Optional[VolumeFitting] = None,
+    volumes: Optional[List[int]] = None,
+    cache: Optional[ResultCache] = None,
+    metrics: Optional[Metrics] = None,
+    visits: Optional[np.ndarray] = None,
+) -> Optional[InundationResult]:
+    """create lahar inundation of a starting point,
+    volume is reduced until the inundation fits in the raster.
+    with several volumes, they are inundated once as nested levels without fitting
+
+    Parameters
+    ----------
+    index : int
+        starting point index
+    start_point : StartPoint
+        starting point, its row & column must be calculated
+    dem : DEMData
+        dem array and its cell size
+    direction_array : np.ndarray
+        d8 flow direction as numpy array
+    confidence_limit : float
+        confidence limit
+    transform : Affine
+        raster transform
+    backend : str
+        inundation backend
+    fitting : Optional[VolumeFitting], optional
+        how volume is reduced, by default bisection
+    volumes : Optional[List[int]], optional
+        volumes of multi volume inundation, by default None
+    cache : Optional[ResultCache], optional
+        cache of inundation runs, by default None
+    metrics : Optional[Metrics], optional
+        run metrics, events of the point have its index, by default None
+    visits : Optional[np.ndarray], optional
+        cell visits of the point are added to it, see `visit_array`, by default None
+
+    Returns
+    -------
+    Optional[InundationResult]
+        inundation, None if volume is below `minimum_volume`
+    """
+    metrics = (metrics or Metrics()).point(index)
+    start = perf_counter()
+    levels: Optional[List[LevelArea]] = None
+    if volumes:
+        start_point.volume = max(volumes)
+        planimetrics, extent = create_lahar_inundation(
+            start_point,
+            dem,
+            direction_array,
+            confidence_limit,
+            backend,
+            volumes,
+            cache,
+            metrics,
+            visits,
+        )
+        evaluations = 1
+        levels = summarise_levels(volumes, planimetrics, dem.cell_width)
+        for level in levels:
+            print(
+                f"point {index} level {level.level} volume: {level.volume}, "
+                f"area: {level.area}, leftover: {level.leftover}"
+            )
+    elif start_point.volume > minimum_volume:
+        with metrics.stage("volume_fitting"):
+            fitted = fit_volume(
                 start_point,
                 dem,
                 direction_array,
                 confidence_limit,
+                backend,
+                fitting,
+                cache,
+                metrics,
+                visits,
             )
+        planimetrics, extent, evaluations = (
+            fitted.planimetrics,
+            fitted.extent,
+            fitted.evaluations,
+        )
+        print(
+            f"point {index} volume: {fitted.volume}, "
+            f"{fitted.evaluations} inundation runs"
+        )
+    else:
+        print(
+            f"point {index} skipped. volume: {start_point.volume} "
+            f"is below minimum: {minimum_volume}"
+        )
+        return None
+
+    elapsed = perf_counter() - start
+    array, row, col = planimetrics.crop()
+    window = Window(col, row, array.shape[1], array.shape[0])
+    return InundationResult(
+        index,
+        start_point,
+        start_point.volume,
+        array,
+        window,
+        window_transform(window, transform),
+        extent,
+        elapsed,
+        evaluations,
+        planimetrics,
+        levels,
+        metrics.counters,
+    )
 
-            while check_planimetric_extent[0] > 0 or planimetrics.last_count > 5000:
-                # print(f"Volume {start_point.volume} is too big. Reduce by 20")
-                if check_planimetric_extent[0] > 10000:
-                    start_point.volume -= int(check_planimetric_extent[0] / 10000 * 50)
-                else:
-                    start_point.volume -= 20
 
-                if start_point.volume < 32:
-                    start_point.volume = 32
-                    break
+def _save_inundation(
+    result: InundationResult,
+    output_folder: Path,
+    schema: RasterioMeta,
+    output_type: str,
+    confidence_limit: float,
+    volumes: Optional[List[int]] = None,
+    sink: Optional[Callable[..., None]] = None,
+    written: Optional[Callable[[], None]] = None,
+    metrics: Optional[Metrics] = None,
+) -> None:
+    """save inundation of a starting point, and area of each level with several volumes.
+    `written` is called once the inundation is in the output file
+    """
+    if metrics is None:
+        metrics = Metrics()
+    with metrics.stage("save", result.index):
+        if result.levels is not None:
+            save_level_summary(
+                result.levels, output_folder, result.index, result.volume
+            )
+        _save_point(
+            result.planimetrics,
+            result.volume,
+            output_folder,
+            result.index,
+            schema,
+            output_type,
+            confidence_limit,
+            volumes,
+            sink,
+            written,
+            metrics,
+        )
 
-                planimetrics, check_planimetric_extent = create_lahar_inundation(
-                    start_point,
-                    dem,
-                    direction_array,
+
+class RunManifest:
+    """record of saved starting points of a batch run, one json object per line.
+    the first line holds run parameters, the other lines hold index, coordinate,
+    input volume, final volume & output of a saved point. a point is complete
+    if it is recorded by a run with the same parameters.
+    """
+
+    def __init__(self, path: Path, parameters: Dict[str, Any], force: bool = False):
+        """open manifest, it is started over if parameters are different or forced
+
+        Parameters
+        ----------
+        path : Path
+            manifest file
+        parameters : Dict[str, Any]
+            run parameters which change the results, json serializable
+        force : bool, optional
+            start over even if there are completed points, by default False
+        """
+        self.path = path
+        self.parameters = json.loads(json.dumps(parameters))
+        self.completed: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._cut = False
+
+        if not force and path.exists():
+            self.completed = self._read()
+        if self.completed:
+            self._file = open(path, "a")
+            if self._cut:
+                self._file.write("\n")
+        else:
+            self._file = open(path, "w")
+            self._write({"parameters": self.parameters})
+
+    def _read(self) -> Dict[int, Dict[str, Any]]:
+        """completed points of a run with the same parameters"""
+        completed: Dict[int, Dict[str, Any]] = {}
+        with open(self.path) as manifest:
+            lines = manifest.readlines()
+        self._cut = bool(lines) and not lines[-1].endswith("\n")
+        for number, line in enumerate(lines):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # the last line is cut if the run is killed while writing it
+                continue
+            if number == 0:
+                if record.get("parameters") != self.parameters:
+                    print(f"{self.path} has different parameters, start over")
+                    return {}
+            elif "index" in record:
+                completed[record["index"]] = record
+        return completed
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def is_complete(self, index: int, start_point: StartPoint) -> bool:
+        """whether the point is saved by a previous run and its output still exists"""
+        record = self.completed.get(index)
+        return (
+            record is not None
+            and record["coordinate"] == list(start_point.coordinate)
+            and record["input_volume"] == start_point.volume
+            and (self.path.parent / record["output"]).exists()
+        )
+
+    def resume(self, index: int, start_point: StartPoint) -> None:
+        """set final volume of a completed point"""
+        start_point.volume = self.completed[index]["volume"]
+
+    def record(
+        self,
+        index: int,
+        coordinate: List[int],
+        input_volume: int,
+        volume: int,
+        output: str,
+    ) -> None:
+        """record a saved point, can be called from several threads
+
+        Parameters
+        ----------
+        index : int
+            starting point index
+        coordinate : List[int]
+            starting point coordinate
+        input_volume : int
+            volume before fitting
+        volume : int
+            final volume
+        output : str
+            output file name, relative to manifest folder
+        """
+        record = {
+            "index": index,
+            "coordinate": list(coordinate),
+            "input_volume": input_volume,
+            "volume": volume,
+            "output": output,
+        }
+        with self._lock:
+            self.completed[index] = record
+            self._write(record)
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+SharedArray = Tuple[str, Tuple[int, ...], str]
+
+# rasters attached by each worker process
+_worker_data: Dict[str, Any] = {}
+
+
+def _share_array(array: np.ndarray) -> Tuple["SharedMemory", SharedArray]:
+    """copy array to shared memory block
+
+    Parameters
+    ----------
+    array : np.ndarray
+        array to be shared
+
+    Returns
+    -------
+    Tuple[SharedMemory, SharedArray]
+        shared memory, it should be unlinked by the owner & its description for workers
+    """
+    shared = SharedMemory(create=True, size=max(array.nbytes, 1))
+    shared_array = np.ndarray(array.shape, dtype=array.dtype, buffer=shared.buf)
+    shared_array[...] = array
+    return shared, (shared.name, array.shape, array.dtype.str)
+
+
+def _attach_array(description: SharedArray) -> Tuple["SharedMemory", np.ndarray]:
+    """open array shared by `_share_array`"""
+    name, shape, dtype = description
+    shared = SharedMemory(name=name)
+    return shared, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shared.buf)
+
+
+def _init_worker(
+    dem_description: SharedArray,
+    direction_description: SharedArray,
+    near_blank_description: SharedArray,
+    cell_diagonal: float,
+    cell_width: float,
+    halo: int,
+    cache: Optional[ResultCache] = None,
+    raster_digest: str = "",
+    track_memory: bool = False,
+    trace_visits: bool = False,
+) -> None:
+    """attach shared dem, direction & near blank array once per worker process,
+    rasters are hashed once by the main process for the result cache.
+    peak memory of a worker is tracked per process, shared rasters are not counted.
+    cell visits of each point are sent back to the main process
+    """
+    dem_shared, dem_array = _attach_array(dem_description)
+    direction_shared, direction_array = _attach_array(direction_description)
+    near_blank_shared, near_blank = _attach_array(near_blank_description)
+    # keep shared memory handle alive as long as the worker
+    _worker_data["shared"] = (dem_shared, direction_shared, near_blank_shared)
+    _worker_data["dem"] = DEMData(
+        array=dem_array,
+        cell_diagonal=cell_diagonal,
+        cell_width=cell_width,
+        halo=halo,
+        near_blank=near_blank,
+    )
+    _worker_data["direction_array"] = direction_array
+    if cache is not None:
+        cache.bind((dem_array, direction_array), raster_digest)
+    _worker_data["cache"] = cache
+    _worker_data["memory"] = MemoryTracker() if track_memory else None
+    _worker_data["visits"] = visit_array(_worker_data["dem"]) if trace_visits else None
+
+
+def _take_visits(
+    visits: Optional[np.ndarray],
+) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """flat index & count of visited cells, visits are reset to zero"""
+    if visits is None:
+        return None
+    visited = np.flatnonzero(visits)
+    counts = visits[visited]
+    visits[visited] = 0
+    return visited, counts
+
+
+def _lahar_inundation_task(
+    index: int,
+    start_point: StartPoint,
+    confidence_limit: float,
+    transform: Affine,
+    backend: str,
+    fitting: Optional[VolumeFitting] = None,
+    volumes: Optional[List[int]] = None,
+) -> Tuple[
+    int,
+    int,
+    Optional[InundationResult],
+    Optional[str],
+    List[Event],
+    Optional[Tuple[np.ndarray, np.ndarray]],
+]:
+    """run `_inundate_point` in worker process
+
+    Returns
+    -------
+    Tuple[int, int, Optional[InundationResult], Optional[str], List[Event],
+    Optional[Tuple[np.ndarray, np.ndarray]]]
+        index, final volume, inundation, traceback if there is any error,
+        metrics events to be emitted by the main process
+        & flat index and count of visited cells if visits are traced
+    """
+    events: List[Event] = []
+    visits: Optional[np.ndarray] = _worker_data["visits"]
+    try:
+        result = _inundate_point(
+            index,
+            start_point,
+            _worker_data["dem"],
+            _worker_data["direction_array"],
+            confidence_limit,
+            transform,
+            backend,
+            fitting,
+            volumes,
+            _worker_data["cache"],
+            Metrics(events.append, memory=_worker_data["memory"]),
+            visits,
+        )
+        return index, start_point.volume, result, None, events, _take_visits(visits)
+    except Exception:
+        return (
+            index,
+            start_point.volume,
+            None,
+            traceback.format_exc(),
+            events,
+            _take_visits(visits),
+        )
+
+
+def _iter_parallel_lahar_inundation(
+    start_points: List[StartPoint],
+    dem: DEMData,
+    direction_array: np.ndarray,
+    confidence_limit: float,
+    transform: Affine,
+    backend: str,
+    workers: int,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    fitting: Optional[VolumeFitting] = None,
+    volumes: Optional[List[int]] = None,
+    indexes: Optional[List[int]] = None,
+    cache: Optional[ResultCache] = None,
+    metrics: Optional[Metrics] = None,
+    visits: Optional[np.ndarray] = None,
+) -> Iterator[InundationResult]:
+    """create lahar inundation of starting points in process pool, in order of
+    completion. dem, direction & near blank array are copied once to shared memory
+    and attached by each worker. failed points are reported instead of stopping the
+    others. only points in `indexes` are inundated if it is given, the others count
+    as finished. cell visits of every worker are added to `visits`.
+    """
+    if indexes is None:
+        indexes = list(range(len(start_points)))
+    if SharedMemory is None:
+        raise RuntimeError("parallel lahar inundation needs python 3.8 or newer")
+
+    near_blank = dem.near_blank
+    if near_blank is None:
+        near_blank = near_blank_cells(direction_array)
+    dem_shared, dem_description = _share_array(dem.array)
+    direction_shared, direction_description = _share_array(direction_array)
+    near_blank_shared, near_blank_description = _share_array(near_blank)
+    errors: Dict[int, str] = {}
+    progress_total = len(start_points)
+    finished = progress_total - len(indexes)
+    raster_digest = ""
+    if cache is not None:
+        raster_digest = cache.raster_digest(dem.array, direction_array)
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(
+                dem_description,
+                direction_description,
+                near_blank_description,
+                dem.cell_diagonal,
+                dem.cell_width,
+                dem.halo,
+                cache,
+                raster_digest,
+                metrics is not None and metrics.memory is not None,
+                visits is not None,
+            ),
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _lahar_inundation_task,
+                    i,
+                    start_points[i],
                     confidence_limit,
+                    transform,
+                    backend,
+                    fitting,
+                    volumes,
                 )
+                for i in indexes
+            ]
+            try:
+                for current, future in enumerate(
+                    tqdm(as_completed(futures), total=progress_total, initial=finished),
+                    finished + 1,
+                ):
+                    index, volume, result, error, events, visited = future.result()
+                    start_points[index].volume = volume
+                    if visits is not None and visited is not None:
+                        visits[visited[0]] += visited[1]
+                    if metrics is not None:
+                        for event in events:
+                            metrics.emit(event)
+                    if error is not None:
+                        errors[index] = error
+                        print(f"point {index} failed:\n{error}")
+
+                    if progress_callback is not None:
+                        progress_callback(progress_total, current)
+                    if result is not None:
+                        result.start_point = start_points[index]
+                        yield result
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+    finally:
+        dem_shared.close()
+        dem_shared.unlink()
+        direction_shared.close()
+        direction_shared.unlink()
+        near_blank_shared.close()
+        near_blank_shared.unlink()
+
+    if errors:
+        print(f"{len(errors)} points failed: {sorted(errors)}")
+
+
+@dataclass
+class InundationRasters:
+    """padded dem & flow direction of `_batch_lahar_inundation` and their metadata"""
+
+    path: Path
+    dem: DEMData
+    direction_array: np.ndarray
+    schema: RasterioMeta
+    up_right_y: float
+    low_left_x: float
+
+
+def read_inundation_rasters(input_raster: str) -> InundationRasters:
+    """read filled dem & flow direction named {prefix}fill & {prefix}dir
+
+    Parameters
+    ----------
+    input_raster : str
+        filled dem, flow direction is next to it
+
+    Returns
+    -------
+    InundationRasters
+        padded dem & flow direction and their metadata
+
+    Raises
+    ------
+    ValueError
+        input raster is not named as a filled dem
+    """
+    raster_path = Path(input_raster)
+    basename = raster_path.name
 
-            save_result(
-                planimetrics.array,
-                start_point.volume,
-                output_stream,
-                i,
-                schema,
-                output_type,
+    if raster_path.is_dir():
+        prefix_name = basename
+        if basename.endswith("fill"):
+            prefix_name = basename.rstrip("fill")
+        else:
+            raise ValueError(
+                f"{basename} is not a name for filled dem. Please follow the convention"
             )
 
+        input_dem = raster_path.absolute()
+        input_direction = raster_path.parent.joinpath(f"{prefix_name}dir")
+    else:
+        prefix_name = raster_path.stem
+        if prefix_name.endswith("fill"):
+            prefix_name = prefix_name.rstrip("fill")
         else:
-            print(
-                f"point {i} skipped. volume: {start_point.volume} is below minimum: 32"
+            raise ValueError(
+                f"{basename} is not a name for filled dem. Please follow the convention"
             )
 
+        input_dem = raster_path.parent.joinpath(
+            f"{prefix_name}fill{raster_path.suffix}"
+        )
+        input_direction = raster_path.parent.joinpath(
+            f"{prefix_name}dir{raster_path.suffix}"
+        )
+
+    with rasterio.open(input_dem) as fill_file, rasterio.open(
+        input_direction
+    ) as direction_file:
+
+        dem_array = fill_file.read(1)
+        direction_array = direction_file.read(1)
+
+        schema = RasterioMeta(
+            **{
+                "driver": "GTiff",
+                "count": 1,
+                "crs": direction_file.crs,
+                "dtype": np.int32,
+                "transform": direction_file.transform,
+                "height": direction_array.shape[0],
+                "width": direction_array.shape[1],
+            }
+        )
+
+        cell_width, cell_diagonal = calc_cell_dimension(fill_file)
+
+        low_left_x = fill_file.bounds.left
+        up_right_y = fill_file.bounds.top
+
+        dem, direction_array = pad_rasters(
+            DEMData(
+                array=dem_array,
+                cell_diagonal=cell_diagonal,
+                cell_width=cell_width,
+            ),
+            direction_array,
+        )
+
+    return InundationRasters(
+        raster_path, dem, direction_array, schema, up_right_y, low_left_x
+    )
+
+
+def _iter_lahar_inundation(
+    rasters: InundationRasters,
+    start_points: List[StartPoint],
+    confidence_limit: float,
+    backend: str = "python",
+    workers: int = 1,
+    fitting: Optional[VolumeFitting] = None,
+    volumes: Optional[List[int]] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    indexes: Optional[List[int]] = None,
+    cache: Optional[ResultCache] = None,
+    metrics: Optional[Metrics] = None,
+    visits: Optional[np.ndarray] = None,
+) -> Iterator[InundationResult]:
+    """`iter_lahar_inundation` of rasters which are already read.
+    only points in `indexes` are inundated if it is given, the others count as finished.
+    cell visits are counted in `visits`, see `visit_array`
+    """
+    if indexes is None:
+        indexes = list(range(len(start_points)))
+    if volumes and min(volumes) <= minimum_volume:
+        raise ValueError(f"volumes must be bigger than minimum: {minimum_volume}")
+
+    for start_point in start_points:
+        start_point.to_rowcol(
+            rasters.up_right_y, rasters.low_left_x, rasters.dem.cell_width
+        )
+
+    backend = resolve_backend(backend)
+    transform = rasters.schema["transform"]
+    if workers > 1 and len(indexes) > 1:
+        yield from _iter_parallel_lahar_inundation(
+            start_points,
+            rasters.dem,
+            rasters.direction_array,
+            confidence_limit,
+            transform,
+            backend,
+            workers,
+            progress_callback,
+            fitting,
+            volumes,
+            indexes,
+            cache,
+            metrics,
+            visits,
+        )
+        return
+
+    progress_total = len(start_points)
+    finished = progress_total - len(indexes)
+    for current, i in enumerate(
+        tqdm(indexes, total=progress_total, initial=finished), finished + 1
+    ):
+        result = _inundate_point(
+            i,
+            start_points[i],
+            rasters.dem,
+            rasters.direction_array,
+            confidence_limit,
+            transform,
+            backend,
+            fitting,
+            volumes,
+            cache,
+            metrics,
+            visits,
+        )
         if progress_callback is not None:
-            progress_callback(progress_total, i + 1)
+            progress_callback(progress_total, current)
+        if result is not None:
+            yield result
+
+
+def iter_lahar_inundation(
+    input_raster: str,
+    start_points: List[StartPoint],
+    confidence_limit: float,
+    backend: str = "python",
+    workers: int = 1,
+    fitting: Optional[VolumeFitting] = None,
+    volumes: Optional[List[int]] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    cache: Optional[ResultCache] = None,
+    metrics: Optional[Metrics] = None,
+) -> Iterator[InundationResult]:
+    """create lahar inundation of starting points without saving them,
+    each inundation is yielded as soon as it is done
+
+    Parameters
+    ----------
+    input_raster : str
+        filled dem named {prefix}fill, flow direction {prefix}dir is next to it
+    start_points : List[StartPoint]
+        starting points, their volume is set to the final volume
+    confidence_limit : float
+        confidence limit
+    backend : str, optional
+        inundation backend, "python" or "numba", by default "python"
+    workers : int, optional
+        number of processes, dem and direction are shared between processes.
+        results come in order of completion and failed points are reported
+        instead of stopping the others, by default 1
+    fitting : Optional[VolumeFitting], optional
+        how volume is reduced until the inundation fits in the raster,
+        by default bisection
+    volumes : Optional[List[int]], optional
+        several volumes for every starting point, inundated in one traversal
+        as nested levels. volume of starting points is not used, by default None
+    progress_callback : Optional[Callable[[int, int], None]], optional
+        called with total & finished number of points, by default None
+    cache : Optional[ResultCache], optional
+        inundation runs of unchanged rasters, starting cell, volume and confidence
+        limit are read from it instead of being computed, by default None
+    metrics : Optional[Metrics], optional
+        receives stage durations ("raster_read", "volume_fitting", "traversal")
+        and counters (`TRAVERSAL_COUNTERS`, "fitting_retries", "cache_hits")
+        of every point, by default None
+
+    Yields
+    ------
+    Iterator[InundationResult]
+        inundation of each starting point, points below `minimum_volume` are skipped
+
+    Raises
+    ------
+    ValueError
+        input raster is not named as a filled dem or volumes are below `minimum_volume`
+    """
+    if metrics is None:
+        metrics = Metrics()
+    with metrics.stage("raster_read"):
+        rasters = read_inundation_rasters(input_raster)
+    yield from _iter_lahar_inundation(
+        rasters,
+        start_points,
+        confidence_limit,
+        backend,
+        workers,
+        fitting,
+        volumes,
+        progress_callback,
+        cache=cache,
+        metrics=metrics,
+    )
+
 
+def inundation_output_folder(input_raster: str, output_folder: str = "") -> Path:
+    """output folder of batch inundation, "stream" folder next to input raster
+    is created when no folder is given
+
+    Parameters
+    ----------
+    input_raster : str
+        filled dem
+    output_folder : str, optional
+        output folder, by default ""
+
+    Returns
+    -------
+    Path
+        output folder
+    """
+    if output_folder.strip():
+        return Path(output_folder)
+    output_stream = Path(input_raster).parent / "stream"
+    if not output_stream.exists():
+        output_stream.mkdir(exist_ok=False)
+    return output_stream
+
+
+def _batch_lahar_inundation(
+    input_raster: str,
+    start_points: List[StartPoint],
+    confidence_limit: float,
+    output_folder: str = "",
+    output_type: str = "multi_vector",
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    backend: str = "python",
+    workers: int = 1,
+    fitting: Optional[VolumeFitting] = None,
+    volumes: Optional[List[int]] = None,
+    writers: int = 1,
+    force: bool = False,
+    cache: Optional[ResultCache] = None,
+    metrics: Optional[Metrics] = None,
+    heatmap: bool = False,
+) -> None:
+    """create and save lahar inundation of starting points, see `iter_lahar_inundation`.
+    saved points are recorded in `manifest.jsonl` of the output folder, running again
+    with the same parameters skips them. "fgb" can not be appended, every point is
+    inundated again.
+
+    Parameters
+    ----------
+    input_raster : str
+        filled dem named {prefix}fill, flow direction {prefix}dir is next to it
+    start_points : List[StartPoint]
+        starting points
+    confidence_limit : float
+        confidence limit
+    output_folder : str, optional
+        output folder, by default "stream" folder next to input raster
+    output_type : str, optional
+        one of `output_types`, see `save_result`, by default "multi_vector"
+    progress_callback : Optional[Callable[[int, int], None]], optional
+        called with total & finished number of points, by default None
+    backend : str, optional
+        inundation backend, "python" or "numba", by default "python"
+    workers : int, optional
+        number of processes, dem and direction are shared between processes.
+        failed points are reported instead of stopping the others, by default 1
+    fitting : Optional[VolumeFitting], optional
+        how volume is reduced until the inundation fits in the raster,
+        by default bisection
+    volumes : Optional[List[int]], optional
+        several volumes for every starting point, inundated in one traversal
+        as nested levels. volume of starting points is not used, by default None
+    writers : int, optional
+        threads which save results while the next starting point is computed,
+        0 to save before computing the next one, by default 1
+    force : bool, optional
+        inundate every point again, even if it is saved by a previous run,
+        by default False
+    cache : Optional[ResultCache], optional
+        inundation runs of unchanged rasters, starting cell, volume and confidence
+        limit are read from it instead of being computed, by default None
+    metrics : Optional[Metrics], optional
+        receives stage durations and counters of `iter_lahar_inundation`
+        and "save" & "polygonize" stages, by default None
+    heatmap : bool, optional
+        count visits of every cell by the inundated points, saved as `heatmap.tif`
+        with totals of each point in `heatmap.csv`. cache is not used, by default False
+
+    Raises
+    ------
+    ValueError
+        input raster is not named as a filled dem
+    ValueError
+        volumes are below `minimum_volume` or output type is unknown
+    """
+    if volumes and min(volumes) <= minimum_volume:
+        raise ValueError(f"volumes must be bigger than minimum: {minimum_volume}")
+    if output_type not in output_types:
+        raise ValueError(
+            f"unknown output type {output_type}, available: {output_types}"
+        )
+
+    if metrics is None:
+        metrics = Metrics()
+    with metrics.stage("raster_read"):
+        rasters = read_inundation_rasters(input_raster)
+    schema = rasters.schema
+
+    output_stream = inundation_output_folder(str(rasters.path), output_folder)
+
+    if output_type == "fgb" and not force:
+        print("fgb output can not be appended, every point is inundated again")
+        force = True
+    manifest = RunManifest(
+        output_stream / "manifest.jsonl",
+        {
+            "input_raster": str(rasters.path.absolute()),
+            "confidence_limit": confidence_limit,
+            "output_type": output_type,
+            "fitting": asdict(fitting or VolumeFitting()),
+            "volumes": volumes,
+        },
+        force,
+    )
+    # volume of starting points is changed to the final volume
+    input_volumes = [start_point.volume for start_point in start_points]
+    indexes: List[int] = []
+    for i, start_point in enumerate(start_points):
+        if manifest.is_complete(i, start_point):
+            manifest.resume(i, start_point)
+        else:
+            indexes.append(i)
+    if len(indexes) < len(start_points):
+        print(f"{len(start_points) - len(indexes)} points are already saved, skipped")
+
+    visits = visit_array(rasters.dem) if heatmap else None
+    visit_totals: Dict[int, Dict[str, int]] = {}
+
+    # every starting point is written into one file
+    sink: Optional[VectorSink] = None
+    write: Optional[Callable[..., None]] = None
+    if output_type in vector_sinks:
+        sink = VectorSink(
+            output_stream / output_name(0, 0, output_type),
+            output_type,
+            schema["crs"],
+            append=bool(manifest.completed),
+            # written before a kill but missing in the manifest
+            remove=indexes,
+        )
+        write = sink.write
+    try:
+        writer = ResultWriter(writers) if writers > 0 else None
+        try:
+            for result in _iter_lahar_inundation(
+                rasters,
+                start_points,
+                confidence_limit,
+                backend,
+                workers,
+                fitting,
+                volumes,
+                progress_callback,
+                indexes,
+                cache,
+                metrics,
+                visits,
+            ):
+                if visits is not None:
+                    visit_totals[result.index] = result.counters
+                save_args = (
+                    result,
+                    output_stream,
+                    schema,
+                    output_type,
+                    confidence_limit,
+                    volumes,
+                    write,
+                    partial(
+                        manifest.record,
+                        result.index,
+                        result.start_point.coordinate,
+                        input_volumes[result.index],
+                        result.volume,
+                        output_name(result.index, result.volume, output_type),
+                    ),
+                    metrics,
+                )
+                if writer is None:
+                    _save_inundation(*save_args)
+                else:
+                    writer.submit(_save_inundation, *save_args)
+        finally:
+            if writer is not None:
+                writer.close()
+    finally:
+        try:
+            if sink is not None:
+                sink.close()
+        finally:
+            manifest.close()
+
+    if visits is not None:
+        if save_heatmap(visits, rasters.dem, output_stream / "heatmap.tif", schema):
+            save_visit_totals(visit_totals, output_stream / "heatmap.csv")
+            print(f"Heatmap saved at {output_stream / 'heatmap.tif'}")
     print(f"Done! {len(start_points)} points")
     print(f"Saved at {output_stream}")
 
@@ -926,10 +2852,21 @@ def batch_lahar_inundation(
     output_folder: str = "",
     output_type: str = "multi_vector",
     progress_callback: Optional[Callable[[int, int], None]] = None,
+    backend: str = "python",
+    workers: int = 1,
+    fitting: Optional[VolumeFitting] = None,
+    volumes: Optional[List[int]] = None,
+    writers: int = 1,
+    force: bool = False,
+    cache: Optional[ResultCache] = None,
+    metrics: Optional[Metrics] = None,
+    heatmap: bool = False,
 ) -> None:
     _input_volume: int = -1
     if input_volume is not None:
         _input_volume = int(input_volume)
+    if volumes:
+        _input_volume = max(volumes)
     start_points = read_coordinates(input_coordinates, _input_volume)
     _batch_lahar_inundation(
         input_raster,
@@ -938,4 +2875,13 @@ def batch_lahar_inundation(
         output_folder,
         output_type,
         progress_callback,
+        backend,
+        workers,
+        fitting,
+        volumes,
+        writers,
+        force,
+        cache,
+        metrics,
+        heatmap,
     )
@@ -0,0 +1,178 @@
+"""
+Structured events of pipeline stages and algorithm counters.
+
+A `Metrics` object is passed down the pipeline. Stages report their duration and
+algorithms report counters, each as an `Event` which is added to the totals of the
+metrics and sent to its callback: a GUI signal, `json_lines` for the CLI or a list
+in tests. Metrics of a starting point (`Metrics.point`) keep totals of the point
+and forward every event to the run metrics. With a `MemoryTracker`, stages report
+their peak memory too, `write_report` saves the totals of a run.
+"""
+
+import json
+import threading
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from time import perf_counter, time
+from typing import Any, Callable, Dict, Iterator, Optional, TextIO, Union
+
+from .memory import MemoryTracker, max_rss
+from .profiling import StageProfiler
+
+# kind of event
+STAGE = "stage"
+COUNTER = "counter"
+MEMORY = "memory"
+
+
+@dataclass
+class Event:
+    """duration of a stage in seconds, increment of a counter or peak bytes
+    of a stage
+    """
+
+    kind: str
+    name: str
+    value: float
+    # starting point or stream feature index
+    index: Optional[int] = None
+    timestamp: float = field(default_factory=time)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+
+class Metrics:
+    """totals of stage durations & counters, events are sent to `callback`.
+    events can be emitted from several threads.
+    """
+
+    def __init__(
+        self,
+        callback: Optional[Callable[[Event], None]] = None,
+        index: Optional[int] = None,
+        profiler: Optional[StageProfiler] = None,
+        memory: Optional[MemoryTracker] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        callback : Optional[Callable[[Event], None]], optional
+            called with every event, by default None
+        index : Optional[int], optional
+            index of events which have no index, by default None
+        profiler : Optional[StageProfiler], optional
+            profiles every stage, by default None
+        memory : Optional[MemoryTracker], optional
+            tracks peak memory of every stage, by default None
+        """
+        self.callback = callback
+        self.index = index
+        self.profiler = profiler
+        self.memory = memory
+        self.durations: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        # highest peak bytes by stage and by starting point
+        self.peaks: Dict[str, int] = {}
+        self.point_peaks: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def emit(self, event: Event) -> None:
+        """add event to totals and send it to callback"""
+        with self._lock:
+            if event.kind == STAGE:
+                self.durations[event.name] = (
+                    self.durations.get(event.name, 0.0) + event.value
+                )
+            elif event.kind == MEMORY:
+                peak = int(event.value)
+                self.peaks[event.name] = max(self.peaks.get(event.name, 0), peak)
+                if event.index is not None:
+                    self.point_peaks[event.index] = max(
+                        self.point_peaks.get(event.index, 0), peak
+                    )
+            else:
+                self.counters[event.name] = self.counters.get(event.name, 0) + int(
+                    event.value
+                )
+            if self.callback is not None:
+                self.callback(event)
+
+    @contextmanager
+    def stage(self, name: str, index: Optional[int] = None) -> Iterator[None]:
+        """emit duration & peak memory of the block, also when it raises"""
+        start = perf_counter()
+        token = self.memory.enter() if self.memory is not None else None
+        try:
+            if self.profiler is None:
+                yield
+            else:
+                with self.profiler.profile(name):
+                    yield
+        finally:
+            index = self.index if index is None else index
+            self.emit(Event(STAGE, name, perf_counter() - start, index))
+            if self.memory is not None and token is not None:
+                self.emit(Event(MEMORY, name, self.memory.exit(token), index))
+
+    def count(self, name: str, value: int = 1, index: Optional[int] = None) -> None:
+        """emit counter increment"""
+        self.emit(Event(COUNTER, name, value, self.index if index is None else index))
+
+    def point(self, index: int) -> "Metrics":
+        """metrics of a starting point, its events are forwarded to this metrics"""
+        return Metrics(self.emit, index, self.profiler, self.memory)
+
+    def summary(self) -> Dict[str, Dict[Any, float]]:
+        """copy of stage durations, counters & peak bytes by stage and starting point"""
+        with self._lock:
+            return {
+                "durations": dict(self.durations),
+                "counters": dict(self.counters),
+                "peak_bytes": dict(self.peaks),
+                "point_peak_bytes": dict(self.point_peaks),
+            }
+
+
+def json_lines(file: TextIO) -> Callable[[Event], None]:
+    """callback which writes every event as a json line
+
+    Parameters
+    ----------
+    file : TextIO
+        opened text file or stream
+
+    Returns
+    -------
+    Callable[[Event], None]
+        metrics callback
+    """
+
+    def write(event: Event) -> None:
+        file.write(event.to_json() + "\n")
+        file.flush()
+
+    return write
+
+
+def write_report(metrics: Metrics, path: Union[str, Path]) -> Path:
+    """save totals of a run as json with the peak resident size of the process
+
+    Parameters
+    ----------
+    metrics : Metrics
+        metrics of the run
+    path : Union[str, Path]
+        report file
+
+    Returns
+    -------
+    Path
+        report file
+    """
+    path = Path(path)
+    report: Dict[str, Any] = dict(metrics.summary())
+    report["max_rss_bytes"] = max_rss()
+    path.write_text(json.dumps(report, indent=1))
+    return path
@@ -1,34 +1,111 @@
 import sys
 from pathlib import Path
 from tempfile import TemporaryDirectory
-from typing import Any
+from time import perf_counter
+from typing import Any, Dict, Final, Optional
+
+# start of the gui, as early as the app is imported
+_started = perf_counter()
+
+from PySide2.QtCore import QObject, Qt, QTimer, Signal, Slot
+from PySide2.QtGui import QColor, QPixmap
+from PySide2.QtWidgets import QApplication, QSplashScreen
 
-from pearpy.gui.model.inundation_zone import InundationModel
 from pearpy.gui.model.main import MainModel
-from pearpy.gui.model.starting_point import StartingPointModel
-from pearpy.gui.model.surface_hydro import SurfaceHydroModel
-from pearpy.gui.view.inundation_zone import InundationView
 from pearpy.gui.view.main import MainView
-from pearpy.gui.view.starting_point import StartingPointView
-from pearpy.gui.view.surface_hydro import SurfaceHydroView
-from PySide2.QtWidgets import QApplication
+
+# seconds from launch until the main window is ready, checked by --startup-check
+STARTUP_TARGET: Final[float] = 3.0
+# tab pages whose view is created when the tab is opened first
+LAZY_PAGES: Final = ("SurfaceHydroPage", "InitialPoint", "InundationZone")
 
 
 class App(QApplication):
-    def __init__(self, sys_argv: Any) -> None:
+    """only the main page is built at start. views of the other tabs, their threads
+    and the geospatial stack are imported when they are used first.
+    `ready` is emitted with seconds since start once the main window is shown
+    """
+
+    ready = Signal(float)
+
+    def __init__(self, sys_argv: Any, started: Optional[float] = None) -> None:
         super(App, self).__init__(sys_argv)
+        self.started = perf_counter() if started is None else started
+        splash = self._splash()
         # self.aboutToQuit.connect()
         self.main_view = MainView(MainModel(), self)
-        self.starting_point_view = StartingPointView(
-            StartingPointModel(), self.main_view
-        )
-        self.inundation_zone_view = InundationView(InundationModel(), self.main_view)
-        self.surface_hydro_view = SurfaceHydroView(SurfaceHydroModel(), self.main_view)
+        self.views: Dict[str, QObject] = {}
+        self.main_view.ui.tabWidget.currentChanged.connect(self.on_tab_changed)
         self.main_view.show()
+        splash.finish(self.main_view)
+        # runs once the event loop has drawn the main window
+        QTimer.singleShot(0, self._emit_ready)
+
+    def _splash(self) -> QSplashScreen:
+        pixmap = QPixmap(420, 120)
+        pixmap.fill(QColor("white"))
+        splash = QSplashScreen(pixmap)
+        splash.showMessage("Loading pearpy...", Qt.AlignCenter, QColor("black"))
+        splash.show()
+        self.processEvents()
+        return splash
+
+    def _emit_ready(self) -> None:
+        seconds = perf_counter() - self.started
+        print(f"ready in {seconds:.2f} s")
+        self.ready.emit(seconds)
+
+    def view(self, page: str) -> QObject:
+        """view of a tab page, created with its model on first use"""
+        if page not in self.views:
+            if page == "SurfaceHydroPage":
+                from pearpy.gui.model.surface_hydro import SurfaceHydroModel
+                from pearpy.gui.view.surface_hydro import SurfaceHydroView
+
+                self.views[page] = SurfaceHydroView(SurfaceHydroModel(), self.main_view)
+            elif page == "InitialPoint":
+                from pearpy.gui.model.starting_point import StartingPointModel
+                from pearpy.gui.view.starting_point import StartingPointView
+
+                self.views[page] = StartingPointView(
+                    StartingPointModel(), self.main_view
+                )
+            elif page == "InundationZone":
+                from pearpy.gui.model.inundation_zone import InundationModel
+                from pearpy.gui.view.inundation_zone import InundationView
+
+                self.views[page] = InundationView(InundationModel(), self.main_view)
+            else:
+                raise ValueError(f"unknown page {page}, available: {LAZY_PAGES}")
+        return self.views[page]
+
+    @Slot(int)
+    def on_tab_changed(self, index: int) -> None:
+        page = self.main_view.ui.tabWidget.widget(index).objectName()
+        if page in LAZY_PAGES:
+            self.view(page)
+
+    @property
+    def surface_hydro_view(self) -> QObject:
+        return self.view("SurfaceHydroPage")
+
+    @property
+    def starting_point_view(self) -> QObject:
+        return self.view("InitialPoint")
+
+    @property
+    def inundation_zone_view(self) -> QObject:
+        return self.view("InundationZone")
 
 
 def main() -> None:
-    app = App(sys.argv)
+    # quit when the main window is ready, exit code 1 if it is slower than the target
+    startup_check = "--startup-check" in sys.argv
+    app = App([arg for arg in sys.argv if arg != "--startup-check"], _started)
+    if startup_check:
+        app.ready.connect(
+            lambda seconds: app.exit(0 if seconds <= STARTUP_TARGET else 1)
+        )
     # app.setStyleSheet(qdarkstyle.load_stylesheet(qt_api="pyside2"))
     ret = app.exec_()
 
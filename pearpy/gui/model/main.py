@@ -14,5 +14,9 @@ class MainModel:
     inundation = InundationModel()
     starting_point = StartingPointModel()
     preserve_data: bool = True
+    # profile every stage into output folder
+    profile: bool = False
+    # peak memory report of every stage into output folder
+    track_memory: bool = False
     temporary_directory: Optional["TemporaryDirectory"] = None
     output_folder: Path = Path()
@@ -1,8 +1,10 @@
 from dataclasses import dataclass, field
-from typing import List, Optional, Tuple
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
-from pearpy.starting_point2 import ProcessingData
-from shapely.geometry.point import Point
+if TYPE_CHECKING:
+    from shapely.geometry.point import Point
+
+    from pearpy.starting_point2 import ProcessingData
 
 
 @dataclass
@@ -15,8 +17,8 @@ class StartingPointModel:
     output_file: str = ""
     max_percent_length: float = 75.0
     stream_buffer_size: float = 1.0
-    starting_points: List[Tuple[Point, float]] = field(default_factory=lambda: [])
-    processing_data: Optional[ProcessingData] = None
+    starting_points: List[Tuple["Point", float]] = field(default_factory=lambda: [])
+    processing_data: Optional["ProcessingData"] = None
 
     def reset(self) -> None:
         if self.processing_data is not None:
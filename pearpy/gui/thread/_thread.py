@@ -33,12 +33,15 @@ class ThreadSignals(QObject):
         `tuple` (exctype, value, traceback.format_exc() )
     result
         `object` data returned from processing, anything
+    event
+        `pearpy.events.Event` stage duration or counter
     """
 
     finished = Signal()
     error = Signal(tuple)
     result = Signal(object)
     progress = Signal(object)
+    event = Signal(object)
 
 
 class CustomThread(QThread):
@@ -1,10 +1,12 @@
 import traceback
 from datetime import datetime
 
+from PySide2.QtWidgets import QMainWindow
+
 from pearpy.distal_inundation import batch_lahar_inundation
+from pearpy.events import Metrics
 from pearpy.gui.model.inundation_zone import InundationModel
 from pearpy.gui.thread._thread import CustomThread, SignalDict, ThreadSignals
-from PySide2.QtWidgets import QMainWindow
 
 
 class InundationThread(CustomThread):
@@ -35,6 +37,7 @@ class InundationThread(CustomThread):
             self.model.output_folder,
             self.model.output_type,
             self._progress_callback,
+            metrics=Metrics(self.signals.event.emit),
         )
 
     def _do_work(self) -> None:
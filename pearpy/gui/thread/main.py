@@ -4,13 +4,17 @@ from pathlib import Path
 from tempfile import TemporaryDirectory
 from typing import List, Optional, Tuple
 
+from PySide2.QtWidgets import QMainWindow
+from shapely.geometry.point import Point
+
 from pearpy.create_surface_hydro import _create_surface_hydro, generate_output_filenames
 from pearpy.distal_inundation import StartPoint, _batch_lahar_inundation
+from pearpy.events import Metrics, write_report
 from pearpy.gui.model.main import MainModel
 from pearpy.gui.thread._thread import CustomThread, SignalDict, ThreadSignals
+from pearpy.memory import MemoryTracker
+from pearpy.profiling import StageProfiler
 from pearpy.starting_point2 import find_starting_points, save2txt
-from PySide2.QtWidgets import QMainWindow
-from shapely.geometry.point import Point
 
 
 class MainPageThread(CustomThread):
@@ -18,6 +22,8 @@ class MainPageThread(CustomThread):
         super().__init__(parent)
         self.signals = ThreadSignals()
         self.model = model
+        # totals of every stage of the last run
+        self.metrics = Metrics(self.signals.event.emit)
 
     def _progress_callback_surface_hydro(self, total: int, current: int) -> None:
         self.signals.progress.emit(
@@ -82,7 +88,9 @@ class MainPageThread(CustomThread):
         self.model.surface_hydro.stream_raster = stream_r
 
         _create_surface_hydro(
-            *self.model.surface_hydro.args, self._progress_callback_surface_hydro
+            *self.model.surface_hydro.args,
+            self._progress_callback_surface_hydro,
+            self.metrics,
         )
 
     def __run_starting_point(
@@ -97,6 +105,7 @@ class MainPageThread(CustomThread):
             self.model.starting_point.stream_buffer_size,
             self.model.preserve_data,
             self._progress_callback_startingp,
+            self.metrics,
         )
 
         save2txt(
@@ -120,9 +129,15 @@ class MainPageThread(CustomThread):
             str(self.model.output_folder),
             self.model.inundation.output_type,
             self._progress_callback_inundation,
+            metrics=self.metrics,
         )
 
     def _do_work(self) -> None:
+        self.metrics = Metrics(
+            self.signals.event.emit,
+            profiler=StageProfiler() if self.model.profile else None,
+            memory=MemoryTracker() if self.model.track_memory else None,
+        )
         try:
             self.__run_surface_hydro()
             self.signals.finished.emit()
@@ -151,5 +166,13 @@ class MainPageThread(CustomThread):
                 if Path(self.model.temporary_directory.name).exists():
                     self.model.temporary_directory.cleanup()
             self.signals.error.emit(str(error))
+        finally:
+            if self.metrics.profiler is not None:
+                self.metrics.profiler.save(self.model.output_folder.joinpath("profile"))
+            if self.metrics.memory is not None:
+                self.metrics.memory.close()
+                write_report(
+                    self.metrics, self.model.output_folder.joinpath("report.json")
+                )
         if self.running:
             self.stop()
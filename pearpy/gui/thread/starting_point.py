@@ -1,10 +1,12 @@
 import traceback
 from datetime import datetime
 
+from PySide2.QtWidgets import QMainWindow
+
+from pearpy.events import Metrics
 from pearpy.gui.model.starting_point import StartingPointModel
 from pearpy.gui.thread._thread import CustomThread, SignalDict, ThreadSignals
 from pearpy.starting_point2 import find_starting_points, save2txt
-from PySide2.QtWidgets import QMainWindow
 
 
 class StartingPointThread(CustomThread):
@@ -33,6 +35,7 @@ class StartingPointThread(CustomThread):
             self.model.max_percent_length,
             self.model.stream_buffer_size,
             progress_callback=self._progress_callback,
+            metrics=Metrics(self.signals.event.emit),
         )
 
         save2txt(_starting_points, self.model.output_file)
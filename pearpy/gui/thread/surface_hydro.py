@@ -1,10 +1,12 @@
 import traceback
 from datetime import datetime
 
+from PySide2.QtWidgets import QMainWindow
+
 from pearpy.create_surface_hydro import create_surface_hydro
+from pearpy.events import Metrics
 from pearpy.gui.model.surface_hydro import SurfaceHydroModel
 from pearpy.gui.thread._thread import CustomThread, SignalDict, ThreadSignals
-from PySide2.QtWidgets import QMainWindow
 
 
 class SurfaceHydroThread(CustomThread):
@@ -32,6 +34,7 @@ class SurfaceHydroThread(CustomThread):
             self.model.output_directory,
             self.model.stream_value,
             self._progress_callback,
+            Metrics(self.signals.event.emit),
         )
 
     def _do_work(self) -> None:
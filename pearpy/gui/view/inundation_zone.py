@@ -1,11 +1,11 @@
 import os
 
+from PySide2.QtCore import Slot
+from PySide2.QtWidgets import QDialog, QFileDialog
+
 from pearpy.gui.model.inundation_zone import InundationModel
 from pearpy.gui.thread._thread import SignalDict
-from pearpy.gui.thread.inundation import InundationThread
 from pearpy.gui.view.main import BaseOtherView, MainView
-from PySide2.QtCore import Slot
-from PySide2.QtWidgets import QDialog, QFileDialog
 
 
 class InundationView(BaseOtherView):
@@ -124,6 +124,9 @@ class InundationView(BaseOtherView):
             self.root.ui.inundation_input_output_folder.setText(str(directory))
 
     def run_thread(self) -> None:
+        # the thread imports the geospatial stack, it is loaded on the first run
+        from pearpy.gui.thread.inundation import InundationThread
+
         self._thread = InundationThread(self.model, self.root)
         self.root.ui.inundation_progressbar_inundation_zone.setMaximum(0)
         self._thread.signals.progress.connect(self.on_thread_running)
@@ -191,6 +191,16 @@ class Ui_MainWindow(object):
 
         self.verticalLayout_9.addWidget(self.mainpage_check_preservedata)
 
+        self.mainpage_check_profile = QCheckBox(self.MainPage)
+        self.mainpage_check_profile.setObjectName(u"mainpage_check_profile")
+
+        self.verticalLayout_9.addWidget(self.mainpage_check_profile)
+
+        self.mainpage_check_memory = QCheckBox(self.MainPage)
+        self.mainpage_check_memory.setObjectName(u"mainpage_check_memory")
+
+        self.verticalLayout_9.addWidget(self.mainpage_check_memory)
+
         self.verticalSpacer_7 = QSpacerItem(20, 40, QSizePolicy.Minimum, QSizePolicy.Expanding)
 
         self.verticalLayout_9.addItem(self.verticalSpacer_7)
@@ -739,6 +749,14 @@ class Ui_MainWindow(object):
         self.mainpage_check_preservedata.setToolTip(QCoreApplication.translate("MainWindow", u"Save processing data to output directory", None))
 #endif // QT_CONFIG(tooltip)
         self.mainpage_check_preservedata.setText(QCoreApplication.translate("MainWindow", u"Preserve processing data", None))
+#if QT_CONFIG(tooltip)
+        self.mainpage_check_profile.setToolTip(QCoreApplication.translate("MainWindow", u"Save profile of every stage to output directory", None))
+#endif // QT_CONFIG(tooltip)
+        self.mainpage_check_profile.setText(QCoreApplication.translate("MainWindow", u"Profile stages", None))
+#if QT_CONFIG(tooltip)
+        self.mainpage_check_memory.setToolTip(QCoreApplication.translate("MainWindow", u"Save peak memory of every stage and starting point to report.json in output directory", None))
+#endif // QT_CONFIG(tooltip)
+        self.mainpage_check_memory.setText(QCoreApplication.translate("MainWindow", u"Track peak memory", None))
         self.label_18.setText(QCoreApplication.translate("MainWindow", u"Output type:", None))
         self.radioButton_2.setText(QCoreApplication.translate("MainWindow", u"Raster", None))
         self.radioButton.setText(QCoreApplication.translate("MainWindow", u"Vector", None))
@@ -1,15 +1,13 @@
-import multiprocessing
 import os
 from datetime import datetime
 from pathlib import Path
 
+from PySide2.QtCore import QObject, QThreadPool, Slot
+from PySide2.QtWidgets import QApplication, QFileDialog, QMainWindow, QMessageBox
+
 from pearpy.gui.model.main import MainModel
 from pearpy.gui.thread._thread import SignalDict
-from pearpy.gui.thread.main import MainPageThread
 from pearpy.gui.view.layout import Ui_MainWindow
-from PySide2.QtCore import QObject, QThreadPool, Slot
-from PySide2.QtWidgets import (QApplication, QFileDialog, QMainWindow,
-                               QMessageBox)
 
 
 class MainView(QMainWindow):
@@ -24,7 +22,6 @@ class MainView(QMainWindow):
 
         self.ui.statusbar.showMessage("tkglxm")
         self.thread_pool = QThreadPool()
-        self.pool = multiprocessing.Pool(processes=2)
 
         self.model = model
 
@@ -55,6 +52,8 @@ class MainView(QMainWindow):
         self.ui.mainpage_check_preservedata.stateChanged.connect(
             self.on_preserve_data_change
         )
+        self.ui.mainpage_check_profile.stateChanged.connect(self.on_profile_change)
+        self.ui.mainpage_check_memory.stateChanged.connect(self.on_memory_change)
 
         self.ui.mainpage_input_stream_buffer.setText(
             str(self.model.starting_point.stream_buffer_size)
@@ -158,6 +157,14 @@ class MainView(QMainWindow):
             self.model.preserve_data = True
         print("on preserve", value, self.model.preserve_data)
 
+    @Slot(int)
+    def on_profile_change(self, value: int) -> None:
+        self.model.profile = value != 0
+
+    @Slot(int)
+    def on_memory_change(self, value: int) -> None:
+        self.model.track_memory = value != 0
+
     @Slot(str)
     def on_error_signal(self, value: str) -> None:
         self.enable_ui()
@@ -212,6 +219,9 @@ class MainView(QMainWindow):
             self.ui.mainpage_input_output_folder.setText(str(directory))
 
     def run_thread(self) -> None:
+        # the thread imports the geospatial stack, it is loaded on the first run
+        from pearpy.gui.thread.main import MainPageThread
+
         self._thread = MainPageThread(self.model, self)
         self.ui.mainpage_progressbar_overall.setValue(0)
         self.ui.mainpage_progressbar_overall.setMaximum(3)
@@ -1,11 +1,11 @@
 import os
 
+from PySide2.QtCore import Slot
+from PySide2.QtWidgets import QDialog, QFileDialog
+
 from pearpy.gui.model.starting_point import StartingPointModel
 from pearpy.gui.thread._thread import SignalDict
-from pearpy.gui.thread.starting_point import StartingPointThread
 from pearpy.gui.view.main import BaseOtherView, MainView
-from PySide2.QtCore import Slot
-from PySide2.QtWidgets import QDialog, QFileDialog
 
 
 class StartingPointView(BaseOtherView):
@@ -202,6 +202,9 @@ class StartingPointView(BaseOtherView):
             self.root.ui.startingpoint_input_output_location.setText(str(output_file))
 
     def run_thread(self) -> None:
+        # the thread imports the geospatial stack, it is loaded on the first run
+        from pearpy.gui.thread.starting_point import StartingPointThread
+
         self._thread = StartingPointThread(self.model, self.root)
         self.root.ui.startingpoint_progressbar_starting_point.setMaximum(0)
         self._thread.signals.progress.connect(self.on_thread_running)
@@ -1,12 +1,12 @@
 import os
 from pathlib import Path
 
+from PySide2.QtCore import Slot
+from PySide2.QtWidgets import QDialog, QFileDialog
+
 from pearpy.gui.model.surface_hydro import SurfaceHydroModel
 from pearpy.gui.thread._thread import SignalDict
-from pearpy.gui.thread.surface_hydro import SurfaceHydroThread
 from pearpy.gui.view.main import BaseOtherView, MainView
-from PySide2.QtCore import Slot
-from PySide2.QtWidgets import QDialog, QFileDialog
 
 
 class SurfaceHydroView(BaseOtherView):
@@ -94,6 +94,9 @@ class SurfaceHydroView(BaseOtherView):
         self.root.root_app.aboutToQuit.disconnect()
 
     def run_thread(self) -> None:
+        # the thread imports the geospatial stack, it is loaded on the first run
+        from pearpy.gui.thread.surface_hydro import SurfaceHydroThread
+
         self._thread = SurfaceHydroThread(self.model, self.root)
         self.root.ui.surfacehydro_progressbar.setMaximum(0)
         self._thread.signals.progress.connect(self.on_thread_running)
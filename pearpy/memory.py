@@ -0,0 +1,93 @@
+"""
+Peak memory of pipeline stages.
+
+A `MemoryTracker` given to `Metrics` traces python & numpy allocations with
+tracemalloc while it is used, and every stage emits a "memory" event with the peak
+traced bytes of the process during the stage. Stages of writer threads overlap with
+stages of the main thread, each one gets the peak of its own time span. Arrays of
+GDAL, numba and shared memory are not traced, `max_rss` gives the peak resident
+size of the process including them.
+
+tracemalloc slows down allocations, tracking is meant for sizing machines and
+finding memory regressions rather than for every run. Before python 3.9 the peak
+can not be reset, a stage gets the peak since tracing started.
+"""
+
+import sys
+import threading
+import tracemalloc
+from typing import Dict, Optional
+
+try:
+    import resource
+except ImportError:  # windows
+    resource = None  # type: ignore
+
+
+class MemoryTracker:
+    """peak traced memory of running stages, tracing starts with the first stage"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # peak bytes of running stages by token
+        self._peaks: Dict[int, int] = {}
+        self._token = 0
+        self._started = False
+
+    def _update(self) -> None:
+        # fold the peak since the last update into every running stage
+        _, peak = tracemalloc.get_traced_memory()
+        for token, stage_peak in self._peaks.items():
+            self._peaks[token] = max(stage_peak, peak)
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+
+    def enter(self) -> int:
+        """start tracking a stage
+
+        Returns
+        -------
+        int
+            token of the stage for `exit`
+        """
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started = True
+            self._update()
+            self._token += 1
+            self._peaks[self._token] = tracemalloc.get_traced_memory()[0]
+            return self._token
+
+    def exit(self, token: int) -> int:
+        """stop tracking a stage
+
+        Parameters
+        ----------
+        token : int
+            token given by `enter`
+
+        Returns
+        -------
+        int
+            peak traced bytes during the stage
+        """
+        with self._lock:
+            self._update()
+            return self._peaks.pop(token)
+
+    def close(self) -> None:
+        """stop tracing if it is started by this tracker"""
+        with self._lock:
+            if self._started:
+                tracemalloc.stop()
+                self._started = False
+
+
+def max_rss() -> Optional[int]:
+    """peak resident size of the process in bytes, None if it is not available"""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on macos
+    return usage if sys.platform == "darwin" else usage * 1024
@@ -0,0 +1,113 @@
+"""
+Deterministic profiling of pipeline stages.
+
+A `StageProfiler` given to `Metrics` runs cProfile during every stage. Each stage has
+its own profile: when a stage starts inside another one, the outer profile is paused
+until the inner stage ends, so functions are counted in the innermost stage only.
+Stages running in worker processes (`workers` > 1) are timed but not profiled.
+Without a profiler, `Metrics.stage` only checks for it, the overhead is negligible.
+
+Saved profiles are `{stage}.prof` files, readable by `pstats` or snakeviz, and
+`summary.txt` with the hottest functions of each stage by cumulative time and of the
+whole run by own time.
+"""
+
+import cProfile
+import io
+import pstats
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple, Union
+
+
+class StageProfiler:
+    """cProfile per stage and thread, merged by stage when saved"""
+
+    def __init__(self) -> None:
+        self._profiles: Dict[Tuple[str, int], cProfile.Profile] = {}
+        self._lock = threading.Lock()
+        # running profiles of the thread, innermost last
+        self._local = threading.local()
+
+    def _profile(self, name: str) -> cProfile.Profile:
+        key = (name, threading.get_ident())
+        with self._lock:
+            if key not in self._profiles:
+                self._profiles[key] = cProfile.Profile()
+            return self._profiles[key]
+
+    @contextmanager
+    def profile(self, name: str) -> Iterator[None]:
+        """profile the block as stage `name`, pausing the enclosing stage"""
+        stack: List[cProfile.Profile] = self._local.__dict__.setdefault("stack", [])
+        profile = self._profile(name)
+        if profile in stack:
+            # same stage nested in itself, keep profiling the outer block
+            yield
+            return
+        if stack:
+            stack[-1].disable()
+        stack.append(profile)
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            stack.pop()
+            if stack:
+                stack[-1].enable()
+
+    @property
+    def stages(self) -> List[str]:
+        """profiled stages in order of first run"""
+        with self._lock:
+            return list(dict.fromkeys(name for name, _ in self._profiles))
+
+    def stats(self, name: str) -> pstats.Stats:
+        """merged statistics of a stage from every thread"""
+        with self._lock:
+            profiles = [
+                profile
+                for (stage, _), profile in self._profiles.items()
+                if stage == name
+            ]
+        stats = pstats.Stats(profiles[0], stream=io.StringIO())
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+    def save(self, folder: Union[str, Path], top: int = 20) -> Path:
+        """write `{stage}.prof` of every stage and `summary.txt`
+
+        Parameters
+        ----------
+        folder : Union[str, Path]
+            output folder, created if it does not exist
+        top : int, optional
+            number of functions per stage and of the whole run in the summary,
+            by default 20
+
+        Returns
+        -------
+        Path
+            summary file
+        """
+        folder = Path(folder)
+        folder.mkdir(parents=True, exist_ok=True)
+        summary = io.StringIO()
+        run_stats = pstats.Stats(stream=summary)
+        for name in self.stages:
+            stats = self.stats(name)
+            stats.dump_stats(str(folder / f"{name}.prof"))
+            run_stats.add(stats)
+            summary.write(f"=== stage {name} ===\n")
+            stats.stream = summary
+            stats.sort_stats("cumulative").print_stats(top)
+        if self.stages:
+            summary.write("=== whole run ===\n")
+            run_stats.sort_stats("tottime").print_stats(top)
+
+        summary_path = folder / "summary.txt"
+        summary_path.write_text(summary.getvalue())
+        return summary_path
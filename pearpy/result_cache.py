@@ -0,0 +1,152 @@
+"""
+Content addressed on-disk cache of lahar inundation results.
+
+A result is stored as a compressed npz file named by a hash of everything which
+changes it: dem, flow direction, starting cell, volumes, confidence limit and
+`ENGINE_VERSION`. The cache is capped by size, least recently used results are
+removed first.
+"""
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Final, List, Optional, Tuple, Union
+
+import numpy as np
+
+# bump when the inundation of the same input changes, old results are not read anymore
+ENGINE_VERSION: Final[int] = 1
+
+
+def array_digest(array: np.ndarray) -> str:
+    """hash of array content, shape & dtype"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{array.dtype.str}{array.shape}".encode())
+    digest.update(np.ascontiguousarray(array).data)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """compressed inundation results in a folder, at most `max_bytes` in total.
+    hashing a raster is the expensive part of a lookup, so the digest of the last
+    rasters is kept. rasters must not be changed in place between lookups.
+    files are replaced atomically, several processes can share a folder.
+    """
+
+    def __init__(self, folder: Union[str, Path], max_bytes: int = 1024 ** 3) -> None:
+        """
+        Parameters
+        ----------
+        folder : Union[str, Path]
+            cache folder, created if it does not exist
+        max_bytes : int, optional
+            total size of cached results, by default 1 GiB
+        """
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._rasters: Tuple[Any, ...] = ()
+        self._raster_digest = ""
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # sent to worker processes without the rasters
+        return {"folder": self.folder, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.folder = state["folder"]
+        self.max_bytes = state["max_bytes"]
+        self._rasters = ()
+        self._raster_digest = ""
+
+    def raster_digest(self, *arrays: np.ndarray) -> str:
+        """hash of rasters, reused while the same arrays are given"""
+        if len(arrays) != len(self._rasters) or any(
+            array is not cached for array, cached in zip(arrays, self._rasters)
+        ):
+            self._raster_digest = "".join(array_digest(array) for array in arrays)
+            self._rasters = arrays
+        return self._raster_digest
+
+    def bind(self, rasters: Tuple[np.ndarray, ...], digest: str) -> None:
+        """use digest of rasters which are hashed by another process"""
+        self._rasters = rasters
+        self._raster_digest = digest
+
+    def key(self, rasters: Tuple[np.ndarray, ...], *parameters: Any) -> str:
+        """cache key of a result
+
+        Parameters
+        ----------
+        rasters : Tuple[np.ndarray, ...]
+            input rasters, see `raster_digest`
+        *parameters : Any
+            other input which changes the result, compared by repr
+
+        Returns
+        -------
+        str
+            hex digest
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"{ENGINE_VERSION}".encode())
+        digest.update(self.raster_digest(*rasters).encode())
+        digest.update(repr(parameters).encode())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.folder / f"{key}.npz"
+
+    def get(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        """cached arrays, None if the key is not cached"""
+        path = self._path(key)
+        try:
+            with np.load(path) as cached:
+                arrays = {name: cached[name] for name in cached.files}
+            # most recently used
+            os.utime(path)
+        except (OSError, ValueError):
+            # missing, removed by another process or cut
+            return None
+        return arrays
+
+    def put(self, key: str, arrays: Dict[str, np.ndarray]) -> None:
+        """cache arrays,
+        the least recently used results are removed above `max_bytes`
+        """
+        descriptor, temporary = tempfile.mkstemp(suffix=".tmp", dir=self.folder)
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                np.savez_compressed(file, **arrays)
+            os.replace(temporary, self._path(key))
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        """remove least recently used results until the cache is below `max_bytes`"""
+        entries: List[Tuple[float, int, Path]] = []
+        for path in self.folder.glob("*.npz"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self) -> None:
+        """remove every cached result"""
+        for path in self.folder.glob("*.npz"):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
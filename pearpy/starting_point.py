@@ -16,6 +16,7 @@ from shapely.geometry import LineString, Point
 from tqdm.autonotebook import tqdm
 
 from .custom_types import GeoJsonDict
+from .events import Metrics
 
 speedups.disable()
 
@@ -180,17 +181,22 @@ def find_starting_points(
     input_earlier_dsm: str,
     input_later_dsm: str,
     progress_callback: Optional[Callable[[int, int], None]] = None,
+    metrics: Optional[Metrics] = None,
 ) -> List[Tuple[Point, float]]:
+    if metrics is None:
+        metrics = Metrics()
     with fiona.open(input_stream_vector) as lines, rasterio.open(
         input_earlier_dsm
     ) as earlier_dsm, rasterio.open(input_later_dsm) as later_dsm:
-        earlier_dsm = dine.Raster.from_rasterfile(input_earlier_dsm)
-        later_dsm = dine.Raster.from_rasterfile(input_later_dsm)
+        with metrics.stage("raster_read"):
+            earlier_dsm = dine.Raster.from_rasterfile(input_earlier_dsm)
+            later_dsm = dine.Raster.from_rasterfile(input_later_dsm)
 
         if later_dsm.epsg != earlier_dsm.epsg:
             raise ValueError("Both dsm should be in the same reference system")
 
-        dsm_diff = later_dsm - earlier_dsm
+        with metrics.stage("dsm_diff"):
+            dsm_diff = later_dsm - earlier_dsm
 
         starting_points: List[Tuple[Point, float]] = []
         sp_coordinates: np.ndarray = np.empty((1, 2), dtype=np.float32)
@@ -208,11 +214,13 @@ def find_starting_points(
 
         vertices = np.array(list(get_vertices(features)))
         progress_total = len(features)
+        metrics.count("streams", progress_total)
 
         for i, feature in tqdm(features, total=len(features)):
-            starting_point, volume = find_starting_point(
-                feature, vertices, later_dsm, dsm_diff
-            )
+            with metrics.stage("stem", i):
+                starting_point, volume = find_starting_point(
+                    feature, vertices, later_dsm, dsm_diff
+                )
             if starting_point is not None and volume is not None:
                 near_sp_exist = any(
                     (
@@ -224,6 +232,7 @@ def find_starting_points(
 
                 if not near_sp_exist:
                     starting_points.append((starting_point, volume))
+                    metrics.count("starting_points", index=i)
 
             if progress_callback is not None:
                 progress_callback(progress_total, i + 1)
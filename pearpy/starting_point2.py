@@ -11,19 +11,18 @@ import fiona
 import geosardine as dine
 import numpy as np
 import rasterio
-import whitebox
 from rasterio.features import geometry_mask
 from shapely import geometry, ops, speedups
 from shapely.geometry import Point
 from shapely.geometry.base import BaseGeometry
 from tqdm.autonotebook import tqdm
 
+from .create_surface_hydro import whitebox_tools
 from .custom_types import GeoJsonDict
+from .events import Metrics
 
 speedups.disable()
 
-wbt = whitebox.WhiteboxTools()
-
 
 class StemTooShort(Exception):
     """Stream/Stem is too short to calculate volume. It is near the start vertex"""
@@ -42,7 +41,12 @@ class ProcessingData:
     Contains processing data in temporary directory
     """
 
-    def __init__(self, flow_direction: Path, flow_stream: Path) -> None:
+    def __init__(
+        self,
+        flow_direction: Path,
+        flow_stream: Path,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
         self.temp_folder = TemporaryDirectory()
         self.temp_path = Path(self.temp_folder.name)
         self.flow_direction = flow_direction
@@ -54,25 +58,36 @@ class ProcessingData:
 
         self.link_class: Optional["dine.Raster"] = None
 
-        self.generate()
-
-    def generate(self) -> None:
-        """generate processing data"""
-        wbt.find_main_stem(
-            self.flow_direction,
-            self.flow_stream,
-            self.main_stem_rasterfile,
-            esri_pntr=True,
-        )
-        wbt.stream_link_class(
-            self.flow_direction, self.flow_stream, self.link_class_file, esri_pntr=True
-        )
-        wbt.raster_streams_to_vector(
-            self.main_stem_rasterfile,
-            self.flow_direction,
-            self.main_stem_vectorfile,
-            esri_pntr=True,
-        )
+        self.generate(metrics)
+
+    def generate(self, metrics: Optional[Metrics] = None) -> None:
+        """generate processing data,
+        duration of each whitebox tool is sent to metrics
+        """
+        if metrics is None:
+            metrics = Metrics()
+        wbt = whitebox_tools()
+        with metrics.stage("find_main_stem"):
+            wbt.find_main_stem(
+                self.flow_direction,
+                self.flow_stream,
+                self.main_stem_rasterfile,
+                esri_pntr=True,
+            )
+        with metrics.stage("stream_link_class"):
+            wbt.stream_link_class(
+                self.flow_direction,
+                self.flow_stream,
+                self.link_class_file,
+                esri_pntr=True,
+            )
+        with metrics.stage("raster_streams_to_vector"):
+            wbt.raster_streams_to_vector(
+                self.main_stem_rasterfile,
+                self.flow_direction,
+                self.main_stem_vectorfile,
+                esri_pntr=True,
+            )
 
         self.link_class = dine.Raster.from_rasterfile(str(self.link_class_file))
         print("processing data has been generated")
@@ -313,6 +328,7 @@ def find_starting_points(
     stream_buffer_size: float,
     return_processing_data: bool = False,
     progress_callback: Optional[Callable[[int, int], None]] = None,
+    metrics: Optional[Metrics] = None,
 ) -> Tuple[List[Tuple[Point, float]], Optional[ProcessingData]]:
     """Batch find starting point for streams
 
@@ -334,6 +350,10 @@ def find_starting_points(
         return processing data as variable, by default False
     progress_callback : Optional[Callable[[int, int], None]], optional
         callback to be called after each loop, by default None
+    metrics : Optional[Metrics], optional
+        receives durations of whitebox tools, "raster_read", "dsm_diff" & "stem"
+        (per stream) stages and "streams" & "starting_points" counters,
+        by default None
 
     Returns
     -------
@@ -353,9 +373,11 @@ def find_starting_points(
     """
     if progress_callback is not None:
         progress_callback(0, 0)
+    if metrics is None:
+        metrics = Metrics()
 
     processing_data = ProcessingData(
-        Path(input_flow_direction), Path(input_flow_stream)
+        Path(input_flow_direction), Path(input_flow_stream), metrics
     )
 
     try:
@@ -364,13 +386,15 @@ def find_starting_points(
         with fiona.open(processing_data.main_stem_vectorfile) as lines, rasterio.open(
             input_earlier_dsm
         ) as earlier_dsm, rasterio.open(input_later_dsm) as later_dsm:
-            earlier_dsm = dine.Raster.from_rasterfile(input_earlier_dsm)
-            later_dsm = dine.Raster.from_rasterfile(input_later_dsm)
+            with metrics.stage("raster_read"):
+                earlier_dsm = dine.Raster.from_rasterfile(input_earlier_dsm)
+                later_dsm = dine.Raster.from_rasterfile(input_later_dsm)
 
             if later_dsm.epsg != earlier_dsm.epsg:
                 raise ValueError("Both dsm should be in the same reference system")
 
-            dsm_diff = later_dsm - earlier_dsm
+            with metrics.stage("dsm_diff"):
+                dsm_diff = later_dsm - earlier_dsm
 
             starting_points: List[Tuple[Point, float]] = []
             sp_coordinates: np.ndarray = np.empty((1, 2), dtype=np.float32)
@@ -387,6 +411,7 @@ def find_starting_points(
             )
 
             progress_total = len(features)
+            metrics.count("streams", progress_total)
 
             for i, feature in tqdm(features, total=progress_total):
 
@@ -402,9 +427,14 @@ def find_starting_points(
                 # if isinstance(stem, BaseGeometry) or processing_data.link_class is None:
                 #     raise ValueError("Unexpected")
 
-                starting_point, volume = find_starting_point(
-                    stem, 0.25, dsm_diff, processing_data.link_class, stream_buffer_size
-                )
+                with metrics.stage("stem", i):
+                    starting_point, volume = find_starting_point(
+                        stem,
+                        0.25,
+                        dsm_diff,
+                        processing_data.link_class,
+                        stream_buffer_size,
+                    )
                 if starting_point is not None and volume is not None:
                     near_sp_exist = any(
                         (
@@ -416,6 +446,7 @@ def find_starting_points(
 
                     if not near_sp_exist:
                         starting_points.append((starting_point, volume))
+                        metrics.count("starting_points", index=i)
 
                 if progress_callback is not None:
                     progress_callback(progress_total, i + 1)
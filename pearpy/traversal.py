@@ -0,0 +1,289 @@
+"""
+Flat index traversal over d8 rasters.
+
+Rasters are padded by a no data halo, raveled and a cell is addressed by a single
+integer index. Moving to a neighbour adds the stride offset of a d8 code (esri style)
+to the index, the halo stops every walk before it leaves the buffer so no bounds check
+is needed. All lookups are small numpy tables indexed by d8 code, so they can be used
+by the python implementation and the compiled kernel.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Final, Optional, Tuple, Union
+
+import numpy as np
+
+D8_CODES: Final[Tuple[int, ...]] = (1, 2, 4, 8, 16, 32, 64, 128)
+
+# the end of stream check looks 5 cells around the current cell
+MIN_HALO: Final[int] = 5
+# the lahar stops if there are more blank cells than this in the end of stream window
+MAX_BLANK: Final[int] = 5
+# minimum cells added to a side of a growing window
+WINDOW_MARGIN: Final[int] = 32
+# counters of a traversal, in the order of the counter array filled by both backends
+TRAVERSAL_COUNTERS: Final[Tuple[str, ...]] = (
+    "cells_traversed",
+    "cross_sections",
+    "lateral_cells",
+)
+
+# row & column operator of each d8 code
+neighbour: Dict[int, Tuple[int, int]] = {
+    1: (0, 1),
+    2: (1, 1),
+    4: (1, 0),
+    8: (1, -1),
+    16: (0, -1),
+    32: (-1, -1),
+    64: (-1, 0),
+    128: (-1, 1),
+}
+
+
+def rotate(code: int, steps: int) -> int:
+    """rotate d8 code counterclockwise by 45 degree steps"""
+    steps %= 8
+    return ((code >> steps) | (code << (8 - steps))) & 255
+
+
+IS_D8 = np.zeros(256, dtype=np.bool_)
+NEIGHBOUR_ROW = np.zeros(256, dtype=np.int64)
+NEIGHBOUR_COL = np.zeros(256, dtype=np.int64)
+# d8 code of the step taken for each flow direction
+LEFT = np.zeros(256, dtype=np.int64)
+RIGHT = np.zeros(256, dtype=np.int64)
+CHECKER = np.zeros(256, dtype=np.int64)
+
+for _code in D8_CODES:
+    IS_D8[_code] = True
+    NEIGHBOUR_ROW[_code], NEIGHBOUR_COL[_code] = neighbour[_code]
+    LEFT[_code] = rotate(_code, 2)
+    RIGHT[_code] = rotate(_code, -2)
+    if _code in (2, 8, 32, 128):
+        CHECKER[_code] = rotate(_code, 1)
+
+# directions of the cross sections calculated at a cell for each flow direction
+CROSS_SEQUENCE = np.zeros((256, 5), dtype=np.int64)
+CROSS_SEQUENCE_LENGTH = np.zeros(256, dtype=np.int64)
+for _code, _sequence in {
+    1: (1, 128, 2),
+    4: (4, 2, 8),
+    16: (16, 8, 32),
+    64: (64, 32, 128),
+    2: (2, 1, 4, 2, 8),
+    8: (8, 4, 16, 8, 32),
+    32: (32, 16, 64, 32, 128),
+    128: (128, 64, 1, 128, 2),
+}.items():
+    CROSS_SEQUENCE[_code, : len(_sequence)] = _sequence
+    CROSS_SEQUENCE_LENGTH[_code] = len(_sequence)
+
+
+def offset_table(width: int) -> np.ndarray:
+    """flat index offset of each d8 code
+
+    Parameters
+    ----------
+    width : int
+        raster width (column count)
+
+    Returns
+    -------
+    np.ndarray
+        offset indexed by d8 code
+    """
+    return NEIGHBOUR_ROW * width + NEIGHBOUR_COL
+
+
+def pad(array: np.ndarray, halo: int, value: Union[int, float]) -> np.ndarray:
+    """pad array by a halo
+
+    Parameters
+    ----------
+    array : np.ndarray
+        2d array
+    halo : int
+        halo width in cells
+    value : Union[int, float]
+        halo value
+
+    Returns
+    -------
+    np.ndarray
+        padded array
+
+    Raises
+    ------
+    ValueError
+        halo is narrower than `MIN_HALO`
+    """
+    if halo < MIN_HALO:
+        raise ValueError(f"halo must be at least {MIN_HALO} cells, got {halo}")
+    return np.pad(array, halo, mode="constant", constant_values=value)
+
+
+def near_blank_cells(direction_array: np.ndarray, chunk_rows: int = 256) -> np.ndarray:
+    """cells where more than `MAX_BLANK` blank (255) cells are in the end of stream
+    window, rows & columns from -5 to +4 around the cell. computed with an integral
+    image of `chunk_rows` rows at a time, so only the boolean result is as big as
+    the raster. cells closer than 5 cells to the array edge are near blank.
+
+    Parameters
+    ----------
+    direction_array : np.ndarray
+        d8 flow direction, padded by a blank halo
+    chunk_rows : int, optional
+        rows counted at once, by default 256
+
+    Returns
+    -------
+    np.ndarray
+        boolean array with the same shape as direction array
+    """
+    height, width = direction_array.shape
+    size = 2 * MIN_HALO
+    near_blank = np.ones(direction_array.shape, dtype=np.bool_)
+    if height <= size or width <= size:
+        return near_blank
+    # a window holds 100 cells at most, a row sum of windows fits in int32
+    for start in range(MIN_HALO, height - MIN_HALO + 1, chunk_rows):
+        stop = min(start + chunk_rows, height - MIN_HALO + 1)
+        blank = direction_array[start - MIN_HALO : stop + MIN_HALO - 1] == 255
+        rows = np.zeros((blank.shape[0] + 1, width), dtype=np.int32)
+        np.cumsum(blank, axis=0, dtype=np.int32, out=rows[1:])
+        # blank cells of every column in the window rows of each cell
+        column_count = rows[size:] - rows[:-size]
+        cols = np.zeros((stop - start, width + 1), dtype=np.int32)
+        np.cumsum(column_count, axis=1, out=cols[:, 1:])
+        near_blank[start:stop, MIN_HALO : width - MIN_HALO + 1] = (
+            cols[:, size:] - cols[:, :-size] > MAX_BLANK
+        )
+    return near_blank
+
+
+def grow_window(
+    row: int,
+    col: int,
+    top: int,
+    left: int,
+    height: int,
+    width: int,
+    raster_height: int,
+    raster_width: int,
+) -> Tuple[int, int, int, int]:
+    """grow a window so it contains a cell. the window grows on the side of the cell
+    by half of its size or `WINDOW_MARGIN`, whichever is larger, and stays inside
+    the raster
+
+    Parameters
+    ----------
+    row : int
+        cell row
+    col : int
+        cell column
+    top : int
+        window first row
+    left : int
+        window first column
+    height : int
+        window height
+    width : int
+        window width
+    raster_height : int
+        raster height
+    raster_width : int
+        raster width
+
+    Returns
+    -------
+    Tuple[int, int, int, int]
+        top, left, height & width of the grown window
+    """
+    bottom = top + height
+    right = left + width
+    if row < top:
+        top = max(row - max(height // 2, WINDOW_MARGIN), 0)
+    elif row >= bottom:
+        bottom = min(row + max(height // 2, WINDOW_MARGIN) + 1, raster_height)
+    if col < left:
+        left = max(col - max(width // 2, WINDOW_MARGIN), 0)
+    elif col >= right:
+        right = min(col + max(width // 2, WINDOW_MARGIN) + 1, raster_width)
+    return top, left, bottom - top, right - left
+
+
+@dataclass
+class FlowGrid:
+    """raveled dem and d8 flow direction, both padded by a halo of `halo` cells.
+    row & column are counted without the halo.
+    """
+
+    dem_array: np.ndarray
+    direction_array: np.ndarray
+    halo: int = MIN_HALO
+    near_blank_array: Optional[np.ndarray] = field(default=None, repr=False)
+    dem: np.ndarray = field(init=False, repr=False)
+    direction: np.ndarray = field(init=False, repr=False)
+    near_blank: np.ndarray = field(init=False, repr=False)
+    offset: np.ndarray = field(init=False, repr=False)
+    # padded height & width
+    height: int = field(init=False)
+    width: int = field(init=False)
+
+    def __post_init__(self) -> None:
+        if self.dem_array.shape != self.direction_array.shape:
+            raise ValueError(
+                f"dem {self.dem_array.shape} and direction "
+                f"{self.direction_array.shape} have different shape"
+            )
+        if self.halo < MIN_HALO:
+            raise ValueError(f"halo must be at least {MIN_HALO} cells, got {self.halo}")
+        self.height, self.width = (int(size) for size in self.dem_array.shape)
+        self.dem = self.dem_array.reshape(-1)
+        self.direction = self.direction_array.reshape(-1)
+        if self.near_blank_array is None:
+            self.near_blank_array = near_blank_cells(self.direction_array)
+        self.near_blank = self.near_blank_array.reshape(-1)
+        self.offset = offset_table(self.width)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """shape without the halo"""
+        return self.height - 2 * self.halo, self.width - 2 * self.halo
+
+    def index(self, row: int, col: int) -> int:
+        """flat index of a cell
+
+        Raises
+        ------
+        IndexError
+            the cell is outside of the raster
+        """
+        height, width = self.shape
+        if not (0 <= row < height and 0 <= col < width):
+            raise IndexError(f"({row}, {col}) is outside of raster {self.shape}")
+        return (row + self.halo) * self.width + col + self.halo
+
+    def rowcol(self, index: int) -> Tuple[int, int]:
+        """row & column of a flat index"""
+        row, col = divmod(index, self.width)
+        return row - self.halo, col - self.halo
+
+    def step(self, index: int, code: int) -> int:
+        """move to the neighbour of a cell"""
+        return index + self.offset[code]
+
+    def is_halo(self, index: int) -> bool:
+        """whether the cell is part of the halo"""
+        row, col = self.rowcol(index)
+        height, width = self.shape
+        return not (0 <= row < height and 0 <= col < width)
+
+    def crop(self, array: np.ndarray) -> np.ndarray:
+        """copy of a padded array without the halo"""
+        return np.ascontiguousarray(
+            array[
+                self.halo : self.height - self.halo, self.halo : self.width - self.halo
+            ]
+        )
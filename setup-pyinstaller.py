@@ -1,12 +1,50 @@
 import argparse
 import os
+import statistics
+import subprocess
+import sys
+import time
 
 import PyInstaller.__main__
 import toml
 
+# not used by the app, pulled in through optional imports of dependencies
+excluded_modules = [
+    "IPython",
+    "ipykernel",
+    "ipywidgets",
+    "jupyter_client",
+    "notebook",
+    "pdoc",
+    "mypy",
+    "black",
+]
+
+
+def measure_startup(executable: str, runs: int = 3) -> float:
+    """median seconds until the frozen app quits with --startup-check"""
+    seconds = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([executable, "--startup-check"], check=False)
+        seconds.append(time.perf_counter() - start)
+    return statistics.median(seconds)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--dev", action="store_true")
+    parser.add_argument(
+        "--onedir",
+        action="store_true",
+        help="bundle into a folder, "
+        "starts faster than a single file unpacked at every run",
+    )
+    parser.add_argument(
+        "--measure",
+        action="store_true",
+        help="measure startup time of the built app against the target",
+    )
     args = parser.parse_args()
 
     with open("./pyproject.toml") as t:
@@ -32,20 +70,36 @@ if __name__ == "__main__":
         "--add-data=whitebox/WBT/img/*;whitebox/WBT/img/",
         "--add-data=whitebox/testdata/*;whitebox/testdata/",
         os.path.join("pearpy/gui/", "__main__.py"),
-    ]
+    ] + [f"--exclude-module={module}" for module in excluded_modules]
 
     if args.dev:
+        app_name = f"{name}-dev"
         flags = [
-            f"--name={name}-dev",
+            f"--name={app_name}",
             "--debug=imports",
             "--noconfirm",
         ] + hidden_imports
     else:
+        app_name = f"{name}-v{version}"
         flags = [
-            f"--name={name}-v{version}",
-            "--onefile",
+            f"--name={app_name}",
+            "--onedir" if args.onedir else "--onefile",
             "--noconfirm",
             # "--noconsole",
             # "--windowed",
         ] + hidden_imports
     PyInstaller.__main__.run(flags)
+
+    if args.measure:
+        from pearpy.gui.app import STARTUP_TARGET
+
+        onefile = not (args.dev or args.onedir)
+        executable = os.path.join(
+            "dist", app_name if onefile else os.path.join(app_name, app_name)
+        )
+        if sys.platform == "win32":
+            executable += ".exe"
+        seconds = measure_startup(executable)
+        print(f"startup {seconds:.2f} s, target {STARTUP_TARGET:.2f} s")
+        if seconds > STARTUP_TARGET:
+            sys.exit(1)
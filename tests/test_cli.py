@@ -0,0 +1,120 @@
+import json
+import tracemalloc
+from pathlib import Path
+
+import fiona
+import numpy as np
+import pytest
+import rasterio
+from affine import Affine
+from click.testing import CliRunner
+from rasterio.crs import CRS
+
+from pearpy.__main__ import main
+from pearpy.events import COUNTER, MEMORY, STAGE
+
+SIZE = 100
+
+
+@pytest.fixture
+def deposit_rasters(tmp_path: Path) -> Path:
+    """dsm sloping southward before and after a 2 m deposit across a stream,
+    the stream is digitized downstream to upstream. returns the stream shapefile
+    """
+    rows = np.mgrid[0:SIZE, 0:SIZE][0]
+    earlier = (SIZE - rows).astype(np.float32)
+    later = earlier.copy()
+    later[30:70, 40:60] += 2.0
+    transform = Affine(1.0, 0, 0, 0, -1.0, float(SIZE))
+    for name, array in (("earlier", earlier), ("later", later)):
+        with rasterio.open(
+            tmp_path / f"{name}.tif",
+            "w",
+            driver="GTiff",
+            count=1,
+            dtype=array.dtype,
+            width=SIZE,
+            height=SIZE,
+            crs=CRS.from_epsg(32749),
+            transform=transform,
+        ) as output:
+            output.write(array, 1)
+
+    with fiona.open(
+        tmp_path / "stream.shp",
+        "w",
+        driver="ESRI Shapefile",
+        crs=CRS.from_epsg(32749).to_wkt(),
+        schema={"geometry": "LineString", "properties": {"id": "int"}},
+    ) as stream:
+        stream.write(
+            {
+                "geometry": {
+                    "type": "LineString",
+                    "coordinates": [(50.5, 10.5), (50.5, 90.5)],
+                },
+                "properties": {"id": 1},
+            }
+        )
+    return tmp_path / "stream.shp"
+
+
+def run_starting_point(stream: Path, *options: str) -> None:
+    result = CliRunner().invoke(
+        main,
+        [
+            "starting-point",
+            str(stream),
+            str(stream.parent / "earlier.tif"),
+            str(stream.parent / "later.tif"),
+            *options,
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    points = (stream.parent / "stream.txt").read_text().splitlines()
+    assert len(points) == 1
+
+
+def test_starting_point_profile(deposit_rasters: Path) -> None:
+    run_starting_point(deposit_rasters, "--profile")
+
+    profile = deposit_rasters.parent / "profile"
+    for stage in ("raster_read", "dsm_diff", "stem"):
+        assert (profile / f"{stage}.prof").exists()
+    assert "=== stage stem ===" in (profile / "summary.txt").read_text()
+
+
+def test_starting_point_events(deposit_rasters: Path) -> None:
+    events_path = deposit_rasters.parent / "events.jsonl"
+    run_starting_point(deposit_rasters, "--events", str(events_path))
+
+    events = [json.loads(line) for line in events_path.read_text().splitlines()]
+    stages = {
+        (event["name"], event["index"]) for event in events if event["kind"] == STAGE
+    }
+    # the old-style search runs no whitebox tool, those stages come from the gui
+    assert stages == {("raster_read", None), ("dsm_diff", None), ("stem", 0)}
+    counters = [
+        (event["name"], event["value"], event["index"])
+        for event in events
+        if event["kind"] == COUNTER
+    ]
+    assert counters == [("streams", 1, None), ("starting_points", 1, 0)]
+
+
+def test_starting_point_memory(deposit_rasters: Path) -> None:
+    events_path = deposit_rasters.parent / "events.jsonl"
+    run_starting_point(deposit_rasters, "--memory", "--events", str(events_path))
+    assert not tracemalloc.is_tracing()
+
+    events = [json.loads(line) for line in events_path.read_text().splitlines()]
+    assert {event["name"] for event in events if event["kind"] == MEMORY} == {
+        "raster_read",
+        "dsm_diff",
+        "stem",
+    }
+    report = json.loads((deposit_rasters.parent / "report.json").read_text())
+    # both dsm are read as float32
+    assert report["peak_bytes"]["raster_read"] >= 2 * SIZE * SIZE * 4
+    assert set(report["point_peak_bytes"]) == {"0"}
+    assert report["max_rss_bytes"] > 0
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from pearpy.confidence import ConfidenceModel, default_model
+from pearpy.distal_inundation import calc_confidence_limit, calc_cross_planimetric
+from pearpy.textfile import py_xxplanb, py_xxsecta
+
+# rounded cross section & planimetric bounds of the former per call implementation
+EXPECTED = {
+    (40, 50.0): [2, 0, 4258, 1285],
+    (3000, 95.0): [79, 1, 199449, 8678],
+    (100000, 99.0): [1352, 9, 2990536, 62084],
+    (800000000, 95.0): [265069, 7004, 704495292, 42166596],
+}
+
+
+@pytest.mark.parametrize("confidence_limit", [50.0, 95.0, 99.0])
+def test_areas_are_vectorized(confidence_limit: float) -> None:
+    volumes = np.array([[40, 3000], [1e5, 8e8]])
+    areas = default_model().areas(volumes, confidence_limit)
+    assert areas.planimetric_up.shape == volumes.shape
+
+    for index, volume in np.ndenumerate(volumes):
+        single = default_model().areas([volume], confidence_limit)
+        assert areas.planimetric_up[index] == single.planimetric_up[0]
+        assert areas.cross_section_down[index] == single.cross_section_down[0]
+        assert areas.planimetric_down[index] < areas.planimetric_up[index]
+
+
+@pytest.mark.parametrize("volume, confidence_limit", list(EXPECTED))
+def test_areas_match_regression(volume: int, confidence_limit: float) -> None:
+    result = [
+        *calc_confidence_limit(True, volume, confidence_limit),
+        *calc_confidence_limit(False, volume, confidence_limit),
+    ]
+    assert [round(area) for area in result] == EXPECTED[(volume, confidence_limit)]
+
+
+def test_model_is_built_once() -> None:
+    assert default_model() is default_model()
+    # a different calibration dataset gives different bounds
+    model = ConfidenceModel.from_fills(py_xxsecta[:-3], py_xxplanb[:-3])
+    assert model.areas([1e6], 95.0).planimetric_up[0] != pytest.approx(
+        default_model().areas([1e6], 95.0).planimetric_up[0]
+    )
+    cross_section_areas, planimetric_areas = calc_cross_planimetric(
+        [1000000], 95.0, model
+    )
+    assert len(cross_section_areas) == len(planimetric_areas) == 3
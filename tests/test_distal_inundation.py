@@ -0,0 +1,840 @@
+import json
+import sqlite3
+import threading
+from math import inf
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pytest
+import rasterio
+from affine import Affine
+from shapely.geometry import shape
+
+import pearpy.distal_inundation as distal_inundation
+from pearpy.distal_inundation import (
+    DEMData,
+    PlanimetricData,
+    ResultWriter,
+    StartPoint,
+    VolumeFitting,
+    _batch_lahar_inundation,
+    create_lahar_inundation,
+    fit_volume,
+    iter_lahar_inundation,
+    pad_rasters,
+    save_polygons,
+    summarise_levels,
+    visit_array,
+)
+from pearpy.events import Event, Metrics
+from pearpy.memory import MemoryTracker
+from pearpy.result_cache import ResultCache
+
+D8 = (
+    (1, 0, 1),
+    (2, 1, 1),
+    (4, 1, 0),
+    (8, 1, -1),
+    (16, 0, -1),
+    (32, -1, -1),
+    (64, -1, 0),
+    (128, -1, 1),
+)
+
+
+def synthetic_valley(size: int = 80) -> Tuple[DEMData, np.ndarray]:
+    """valley which drains southward, with flat rows to trigger equal elevations"""
+    rows, cols = np.mgrid[0:size, 0:size].astype(float)
+    elevation = 1000.0 - 2.0 * rows + 0.7 * np.abs(cols - size / 2)
+    elevation += 0.4 * np.sin(cols * 0.9) * np.cos(rows * 0.5)
+    elevation = (np.round(elevation * 2) / 2).astype(np.float32)
+
+    padded = np.pad(elevation.astype(float), 1, constant_values=np.inf)
+    drop = np.zeros(elevation.shape)
+    direction = np.zeros(elevation.shape, dtype=np.int16)
+    for code, row, col in D8:
+        neighbour = padded[1 + row : 1 + row + size, 1 + col : 1 + col + size]
+        slope = (elevation - neighbour) / (np.sqrt(2) if row and col else 1)
+        steeper = slope > drop
+        drop[steeper] = slope[steeper]
+        direction[steeper] = code
+    direction[:2] = direction[-2:] = 255
+    direction[:, :2] = direction[:, -2:] = 255
+
+    return DEMData(elevation, 14.14, 10.0), direction
+
+
+def run_inundation(
+    volume: int, row: int, col: int, backend: str
+) -> Tuple[np.ndarray, list]:
+    dem, direction = synthetic_valley()
+    start_point = StartPoint([0, 0], volume)
+    start_point.row, start_point.col = row, col
+    planimetrics, extent = create_lahar_inundation(
+        start_point, dem, direction, 95.0, backend=backend
+    )
+    return planimetrics.materialise(), extent
+
+
+@pytest.mark.parametrize("volume", [300, 5000, 100000])
+@pytest.mark.parametrize("row_col", [(5, 40), (20, 33), (3, 3)])
+def test_numba_backend_is_identical(volume: int, row_col: Tuple[int, int]) -> None:
+    pytest.importorskip("numba")
+    expected, expected_extent = run_inundation(volume, *row_col, "python")
+    result, extent = run_inundation(volume, *row_col, "numba")
+
+    assert (expected == result).all()
+    assert [float(e) for e in expected_extent] == [float(e) for e in extent]
+
+
+@pytest.mark.parametrize("backend", ["python", "numba"])
+def test_halo_width_does_not_change_result(backend: str) -> None:
+    if backend == "numba":
+        pytest.importorskip("numba")
+    dem, direction = synthetic_valley()
+    # without blank border, the lahar reaches the raster edge
+    direction[direction == 255] = 4
+    results = []
+    for padded_dem, padded_direction in (
+        (dem, direction),
+        pad_rasters(dem, direction, halo=9),
+    ):
+        start_point = StartPoint([0, 0], 100000)
+        start_point.row, start_point.col = 3, 3
+        planimetrics, extent = create_lahar_inundation(
+            start_point, padded_dem, padded_direction, 95.0, backend=backend
+        )
+        assert planimetrics.materialise().shape == direction.shape
+        results.append((planimetrics.materialise(), extent))
+
+    assert (results[0][0] == results[1][0]).all()
+    assert results[0][1] == results[1][1]
+
+
+def test_unpadded_rasters_are_padded_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    padded = []
+    pad_rasters = distal_inundation.pad_rasters
+    monkeypatch.setattr(
+        distal_inundation,
+        "pad_rasters",
+        lambda *args: padded.append(1) or pad_rasters(*args),
+    )
+    dem, direction = synthetic_valley()
+    for volume in (300, 5000):
+        start_point = StartPoint([0, 0], volume)
+        start_point.row, start_point.col = 5, 40
+        create_lahar_inundation(start_point, dem, direction, 95.0)
+    assert len(padded) == 1
+
+    dem, direction = synthetic_valley()
+    create_lahar_inundation(start_point, dem, direction, 95.0)
+    assert len(padded) == 2
+
+
+def test_planimetric_window_grows() -> None:
+    planimetrics = PlanimetricData(
+        value=[0],
+        array=np.ones((1, 1), dtype=int),
+        cross_area=[1.0],
+        shape=(300, 200),
+        row_offset=150,
+        col_offset=100,
+    )
+    expected = np.ones((300, 200), dtype=int)
+    for row, col in ((150, 100), (0, 0), (299, 199), (151, 40)):
+        planimetrics.reserve(row, col)
+        planimetrics.array[
+            row - planimetrics.row_offset, col - planimetrics.col_offset
+        ] = 2
+        expected[row, col] = 2
+        assert (planimetrics.materialise() == expected).all()
+
+
+def test_reduce_cross_drops_filled_levels() -> None:
+    planimetrics = PlanimetricData(
+        value=[0, 0, 0],
+        array=np.ones((1, 1), dtype=int),
+        cross_area=[300.0, 100.0, 15.0],
+    )
+    planimetrics.reduce_cross(12.0, 10.0, 10.0)
+    assert planimetrics.cross_count == 2
+    assert planimetrics.cross_area[:2].tolist() == [280.0, 80.0]
+
+    planimetrics.reduce_cross(12.0, 10.0, 10.0, 5)
+    assert planimetrics.cross_count == 1
+    # the last level is kept even when filled
+    planimetrics.reduce_cross(12.0, 10.0, 10.0, 20)
+    assert planimetrics.cross_count == 1
+    assert not planimetrics.is_filling()
+
+    planimetrics.restore()
+    assert planimetrics.cross_area.tolist() == [300.0, 100.0, 15.0]
+    planimetrics.pop_cross()
+    assert planimetrics.cross_count == 2
+
+
+@pytest.mark.parametrize("backend", ["python", "numba"])
+def test_planimetric_window_is_polygonized(backend: str) -> None:
+    if backend == "numba":
+        pytest.importorskip("numba")
+    dem, direction = synthetic_valley()
+    start_point = StartPoint([0, 0], 5000)
+    start_point.row, start_point.col = 5, 40
+    planimetrics, _ = create_lahar_inundation(
+        start_point, dem, direction, 95.0, backend=backend
+    )
+    assert planimetrics.array.dtype == np.int32
+    features = distal_inundation._polygonize_window(
+        planimetrics, {"transform": Affine.identity()}
+    )
+    assert features
+
+
+def test_planimetric_window_is_cropped() -> None:
+    dem, direction = synthetic_valley(size=300)
+    start_point = StartPoint([0, 0], 300)
+    start_point.row, start_point.col = 20, 150
+    planimetrics, _ = create_lahar_inundation(start_point, dem, direction, 95.0)
+    assert planimetrics.array.size < direction.size // 4
+    assert (planimetrics.materialise() > 1).sum() == (planimetrics.array > 1).sum()
+
+
+@pytest.mark.parametrize("backend", ["python", "numba"])
+def test_covered_counts_cells_per_level(backend: str) -> None:
+    if backend == "numba":
+        pytest.importorskip("numba")
+    dem, direction = synthetic_valley()
+    start_point = StartPoint([0, 0], 5000)
+    start_point.row, start_point.col = 5, 40
+    planimetrics, _ = create_lahar_inundation(
+        start_point, dem, direction, 95.0, backend=backend
+    )
+    array = planimetrics.materialise()
+    expected = [(array >= level + 2).sum() for level in range(len(planimetrics.value))]
+    assert planimetrics.covered.tolist() == expected
+
+
+@pytest.mark.parametrize("method", ["bisection", "secant"])
+def test_fit_volume_needs_fewer_runs(method: str) -> None:
+    dem, direction = synthetic_valley()
+    fitted = []
+    for fitting in (
+        VolumeFitting(method),
+        VolumeFitting("linear"),
+    ):
+        start_point = StartPoint([0, 0], 100000)
+        start_point.row, start_point.col = 20, 33
+        fitted.append(fit_volume(start_point, dem, direction, 95.0, fitting=fitting))
+        assert start_point.volume == fitted[-1].volume
+        assert fitted[-1].extent[0] <= 0
+
+    assert fitted[0].evaluations < fitted[1].evaluations
+
+
+def test_fit_volume_reports_runs(monkeypatch: pytest.MonkeyPatch) -> None:
+    import pearpy.distal_inundation
+
+    runs: List[int] = []
+
+    def counted(start_point: StartPoint, *args, **kwargs):
+        runs.append(start_point.volume)
+        return create_lahar_inundation(start_point, *args, **kwargs)
+
+    monkeypatch.setattr(pearpy.distal_inundation, "create_lahar_inundation", counted)
+    dem, direction = synthetic_valley()
+    start_point = StartPoint([0, 0], 100000)
+    start_point.row, start_point.col = 20, 33
+    fitted = fit_volume(start_point, dem, direction, 95.0)
+    assert fitted.evaluations == len(runs)
+    assert runs[:2] == [100000, 32]
+    with pytest.raises(ValueError):
+        VolumeFitting("newton")
+
+
+@pytest.mark.parametrize("method", ["linear", "bisection", "secant"])
+def test_fit_volume_warns_at_max_iterations(method: str) -> None:
+    dem, direction = synthetic_valley()
+    start_point = StartPoint([0, 0], 100000)
+    start_point.row, start_point.col = 20, 33
+    with pytest.warns(UserWarning, match="increase max_iterations"):
+        fitted = fit_volume(
+            start_point,
+            dem,
+            direction,
+            95.0,
+            fitting=VolumeFitting(method, max_iterations=2),
+        )
+    assert fitted.evaluations == 2
+    assert VolumeFitting("linear").iterations == inf
+    assert VolumeFitting(method, max_iterations=2).iterations == 2
+
+
+@pytest.mark.parametrize("backend", ["python", "numba"])
+def test_multi_volume_levels_are_nested(backend: str) -> None:
+    if backend == "numba":
+        pytest.importorskip("numba")
+    dem, direction = synthetic_valley(size=200)
+    volumes = [10000, 2000, 50000]
+
+    def run(volumes: List[int]) -> np.ndarray:
+        start_point = StartPoint([0, 0], 0)
+        start_point.row, start_point.col = 20, 100
+        planimetrics, _ = create_lahar_inundation(
+            start_point, dem, direction, 95.0, backend, volumes=volumes
+        )
+        return planimetrics
+
+    planimetrics = run(volumes)
+    levels = planimetrics.materialise()
+    summary = summarise_levels(volumes, planimetrics, dem.cell_width)
+    assert [level.volume for level in summary] == [50000, 10000, 2000]
+    for level in summary:
+        # one traversal gives the same zone as a traversal per volume
+        single = run([level.volume]).materialise()
+        assert ((levels >= level.level) == (single > 1)).all()
+        assert level.area == (levels >= level.level).sum() * dem.cell_width ** 2
+
+
+@pytest.fixture
+def valley_rasters(tmp_path: Path) -> Path:
+    dem, direction = synthetic_valley()
+    transform = Affine(dem.cell_width, 0, 0, 0, -dem.cell_width, 1000.0)
+    for name, array in (("valleyfill", dem.array), ("valleydir", direction)):
+        with rasterio.open(
+            tmp_path / f"{name}.tif",
+            "w",
+            driver="GTiff",
+            count=1,
+            dtype=array.dtype,
+            width=array.shape[1],
+            height=array.shape[0],
+            transform=transform,
+        ) as output:
+            output.write(array, 1)
+    return tmp_path / "valleyfill.tif"
+
+
+def test_parallel_batch_is_identical(valley_rasters: Path) -> None:
+    def start_points() -> List[StartPoint]:
+        return [
+            StartPoint([405, 955], 300),
+            StartPoint([335, 805], 5000),
+            StartPoint([35, 975], 100000),
+            StartPoint([335, 805], 20),
+        ]
+
+    progress: List[Tuple[int, int]] = []
+    for workers, folder in ((1, "sequential"), (2, "parallel")):
+        (valley_rasters.parent / folder).mkdir()
+        _batch_lahar_inundation(
+            str(valley_rasters),
+            start_points(),
+            95.0,
+            str(valley_rasters.parent / folder),
+            "raster",
+            lambda total, current: progress.append((total, current)),
+            workers=workers,
+        )
+
+    sequential = sorted(
+        p.name for p in (valley_rasters.parent / "sequential").glob("stream_*")
+    )
+    assert sequential == sorted(
+        p.name for p in (valley_rasters.parent / "parallel").glob("stream_*")
+    )
+    assert len(sequential) == 3
+    for name in sequential:
+        with rasterio.open(valley_rasters.parent / "sequential" / name) as expected:
+            with rasterio.open(valley_rasters.parent / "parallel" / name) as result:
+                assert (expected.read(1) == result.read(1)).all()
+    assert progress[-1] == (4, 4) and len(progress) == 8
+
+
+def test_batch_multi_volume_summary(valley_rasters: Path) -> None:
+    start_points = [StartPoint([405, 955], 300), StartPoint([335, 805], 300)]
+    _batch_lahar_inundation(
+        str(valley_rasters),
+        start_points,
+        95.0,
+        str(valley_rasters.parent),
+        "raster",
+        volumes=[500, 3000],
+    )
+    for index in range(2):
+        summary = (
+            valley_rasters.parent / f"stream_{index}_3000_levels.csv"
+        ).read_text()
+        assert summary.splitlines()[0] == "level,volume,area,leftover"
+        assert len(summary.splitlines()) == 3
+        assert (valley_rasters.parent / f"stream_{index}_3000.tif").exists()
+
+
+def test_cog_is_cropped_full_raster(valley_rasters: Path) -> None:
+    for output_type in ("raster", "cog"):
+        (valley_rasters.parent / output_type).mkdir()
+        _batch_lahar_inundation(
+            str(valley_rasters),
+            [StartPoint([335, 805], 5000)],
+            95.0,
+            str(valley_rasters.parent / output_type),
+            output_type,
+        )
+    name = next((valley_rasters.parent / "cog").glob("stream_*")).name
+    with rasterio.open(valley_rasters.parent / "raster" / name) as full:
+        with rasterio.open(valley_rasters.parent / "cog" / name) as cog:
+            assert cog.dtypes[0] == "uint8"
+            assert cog.compression.value == "DEFLATE"
+            assert cog.tags(ns="IMAGE_STRUCTURE")["LAYOUT"] == "COG"
+            assert cog.width * cog.height < full.width * full.height
+            window = full.window(*cog.bounds)
+            assert (full.read(1) > 1).sum() == (cog.read(1) > 1).sum()
+            assert (full.read(1, window=window) == cog.read(1)).all()
+
+
+def test_polygons_are_windowed(valley_rasters: Path) -> None:
+    fiona = pytest.importorskip("fiona")
+    _batch_lahar_inundation(
+        str(valley_rasters),
+        [StartPoint([335, 805], 5000)],
+        95.0,
+        str(valley_rasters.parent),
+        "raster",
+    )
+    raster = next(valley_rasters.parent.glob("stream_*.tif"))
+    with rasterio.open(raster) as full:
+        inundated = full.read(1) > 1
+        rows, cols = np.nonzero(inundated)
+        left, top = full.transform * (cols.min(), rows.min())
+        right, bottom = full.transform * (cols.max() + 1, rows.max() + 1)
+        planimetrics = PlanimetricData(
+            value=[0],
+            array=full.read(1),
+            cross_area=[1.0],
+        )
+        schema = {"crs": full.crs, "transform": full.transform}
+
+    for simplify in (0.0, 15.0):
+        path = valley_rasters.parent / f"polygon_{simplify}.shp"
+        save_polygons(planimetrics, path, schema, simplify)
+        with fiona.open(path) as polygons:
+            bounds = polygons.bounds
+            vertices = 0
+            for feature in polygons:
+                geometry = shape(feature["geometry"])
+                for polygon in getattr(geometry, "geoms", [geometry]):
+                    vertices += len(polygon.exterior.coords)
+                    vertices += sum(len(ring.coords) for ring in polygon.interiors)
+        assert bounds == pytest.approx((left, bottom, right, top), abs=simplify)
+        if simplify:
+            assert vertices < exact_vertices
+        else:
+            exact_vertices = vertices
+
+
+def test_vector_sink_collects_every_point(valley_rasters: Path) -> None:
+    fiona = pytest.importorskip("fiona")
+    attributes = {}
+    for output_type, workers in (("gpkg", 1), ("fgb", 2)):
+        _batch_lahar_inundation(
+            str(valley_rasters),
+            [StartPoint([405, 955], 300), StartPoint([335, 805], 5000)],
+            95.0,
+            str(valley_rasters.parent),
+            output_type,
+            workers=workers,
+        )
+        with fiona.open(valley_rasters.parent / f"stream.{output_type}") as layer:
+            assert layer.schema["geometry"] == "MultiPolygon"
+            attributes[output_type] = sorted(
+                tuple(feature["properties"].values()) for feature in layer
+            )
+    assert attributes["gpkg"] == attributes["fgb"]
+    assert {index for index, *_ in attributes["gpkg"]} == {0, 1}
+    assert {confidence for *_, confidence in attributes["gpkg"]} == {95.0}
+    assert not list(valley_rasters.parent.glob("*.shp"))
+
+    with sqlite3.connect(valley_rasters.parent / "stream.gpkg") as gpkg:
+        assert gpkg.execute(
+            "SELECT count(*) FROM gpkg_extensions "
+            "WHERE extension_name = 'gpkg_rtree_index'"
+        ).fetchone() == (1,)
+
+
+def test_vector_sink_has_volume_per_level(valley_rasters: Path) -> None:
+    fiona = pytest.importorskip("fiona")
+    _batch_lahar_inundation(
+        str(valley_rasters),
+        [StartPoint([335, 805], 300)],
+        95.0,
+        str(valley_rasters.parent),
+        "gpkg",
+        volumes=[500, 3000],
+    )
+    with fiona.open(valley_rasters.parent / "stream.gpkg") as layer:
+        levels = {
+            feature["properties"]["level"]: feature["properties"] for feature in layer
+        }
+    assert levels[2]["volume"] == 3000 and levels[3]["volume"] == 500
+    assert levels[2]["confidence"] is None
+
+
+def test_result_writer_bounds_pending_results() -> None:
+    started = threading.Event()
+    release = threading.Event()
+    saved: List[int] = []
+
+    def save(value: int) -> None:
+        started.set()
+        release.wait()
+        saved.append(value)
+
+    writer = ResultWriter(workers=1, max_pending=2)
+    writer.submit(save, 0)
+    writer.submit(save, 1)
+    started.wait()
+    blocked = threading.Thread(target=writer.submit, args=(save, 2))
+    blocked.start()
+    blocked.join(0.2)
+    # third result waits until a slot is free
+    assert blocked.is_alive()
+    release.set()
+    blocked.join()
+    writer.close()
+    assert saved == [0, 1, 2]
+
+
+def test_result_writer_raises_error() -> None:
+    def fail() -> None:
+        raise OSError("disk full")
+
+    writer = ResultWriter()
+    writer.submit(fail)
+    with pytest.raises(OSError):
+        writer.close()
+
+
+def test_background_writer_is_identical(valley_rasters: Path) -> None:
+    for writers in (0, 2):
+        (valley_rasters.parent / str(writers)).mkdir()
+        _batch_lahar_inundation(
+            str(valley_rasters),
+            [StartPoint([405, 955], 300), StartPoint([335, 805], 5000)],
+            95.0,
+            str(valley_rasters.parent / str(writers)),
+            "cog",
+            writers=writers,
+        )
+    names = sorted(p.name for p in (valley_rasters.parent / "0").glob("stream_*"))
+    assert len(names) == 2
+    assert names == sorted(
+        p.name for p in (valley_rasters.parent / "2").glob("stream_*")
+    )
+    for name in names:
+        with rasterio.open(valley_rasters.parent / "0" / name) as expected:
+            with rasterio.open(valley_rasters.parent / "2" / name) as result:
+                assert (expected.read(1) == result.read(1)).all()
+
+
+def test_iter_lahar_inundation_matches_saved_raster(valley_rasters: Path) -> None:
+    def start_points() -> List[StartPoint]:
+        return [
+            StartPoint([405, 955], 300),
+            StartPoint([335, 805], 5000),
+            StartPoint([335, 805], 20),
+        ]
+
+    _batch_lahar_inundation(
+        str(valley_rasters), start_points(), 95.0, str(valley_rasters.parent), "raster"
+    )
+    for workers in (1, 2):
+        results = sorted(
+            iter_lahar_inundation(
+                str(valley_rasters), start_points(), 95.0, workers=workers
+            ),
+            key=lambda result: result.index,
+        )
+        # the last point is below minimum volume
+        assert [result.index for result in results] == [0, 1]
+        for result in results:
+            assert result.elapsed > 0 and result.evaluations >= 1
+            assert result.start_point.volume == result.volume
+            with rasterio.open(
+                valley_rasters.parent / f"stream_{result.index}_{result.volume}.tif"
+            ) as full:
+                assert full.window_transform(result.window) == result.transform
+                assert (full.read(1, window=result.window) == result.array).all()
+                assert (full.read(1) > 1).sum() == (result.array > 1).sum()
+
+
+def test_iter_lahar_inundation_levels(valley_rasters: Path) -> None:
+    (result,) = iter_lahar_inundation(
+        str(valley_rasters), [StartPoint([335, 805], 300)], 95.0, volumes=[500, 3000]
+    )
+    assert result.volume == 3000
+    assert [level.volume for level in result.levels] == [3000, 500]
+    assert len(result.extent) == 2
+
+
+def test_batch_resumes_saved_points(
+    valley_rasters: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def start_points() -> List[StartPoint]:
+        return [StartPoint([405, 955], 300), StartPoint([335, 805], 5000)]
+
+    def run(**kwargs) -> List[int]:
+        inundated: List[int] = []
+        inundate_point = distal_inundation._inundate_point
+
+        def counted(index: int, *args, **kwargs):
+            inundated.append(index)
+            return inundate_point(index, *args, **kwargs)
+
+        monkeypatch.setattr(distal_inundation, "_inundate_point", counted)
+        points = start_points()
+        _batch_lahar_inundation(
+            str(valley_rasters),
+            points,
+            95.0,
+            str(valley_rasters.parent),
+            "raster",
+            **kwargs,
+        )
+        assert points[1].volume < 5000
+        return inundated
+
+    assert run() == [0, 1]
+    manifest = (valley_rasters.parent / "manifest.jsonl").read_text().splitlines()
+    assert len(manifest) == 3
+    for line in manifest[1:]:
+        record = json.loads(line)
+        assert record["output"] == f"stream_{record['index']}_{record['volume']}.tif"
+        assert (valley_rasters.parent / record["output"]).exists()
+    assert run() == []
+    assert run(force=True) == [0, 1]
+
+    # the second point is not saved, the last line is cut by a killed run
+    manifest = (valley_rasters.parent / "manifest.jsonl").read_text().splitlines()
+    (valley_rasters.parent / "manifest.jsonl").write_text(
+        "\n".join(manifest[:2]) + "\n" + manifest[2][:10]
+    )
+    assert run() == [1]
+    assert run() == []
+    # other parameters start over
+    assert run(volumes=[500, 3000]) == [0, 1]
+
+
+def test_batch_resumes_vector_sink(valley_rasters: Path) -> None:
+    fiona = pytest.importorskip("fiona")
+    _batch_lahar_inundation(
+        str(valley_rasters),
+        [StartPoint([405, 955], 300)],
+        95.0,
+        str(valley_rasters.parent),
+        "gpkg",
+    )
+    _batch_lahar_inundation(
+        str(valley_rasters),
+        [StartPoint([405, 955], 300), StartPoint([335, 805], 5000)],
+        95.0,
+        str(valley_rasters.parent),
+        "gpkg",
+    )
+    with fiona.open(valley_rasters.parent / "stream.gpkg") as layer:
+        assert sorted({feature["properties"]["index"] for feature in layer}) == [0, 1]
+
+
+def test_batch_resume_removes_unrecorded_features(valley_rasters: Path) -> None:
+    fiona = pytest.importorskip("fiona")
+    start_points = [[405, 955], [335, 805]]
+
+    def run() -> List[int]:
+        _batch_lahar_inundation(
+            str(valley_rasters),
+            [StartPoint(coordinate, 3000) for coordinate in start_points],
+            95.0,
+            str(valley_rasters.parent),
+            "gpkg",
+        )
+        with fiona.open(valley_rasters.parent / "stream.gpkg") as layer:
+            return sorted(feature["properties"]["index"] for feature in layer)
+
+    expected = run()
+    # killed after the features of point 1 are written, before it is recorded
+    manifest = valley_rasters.parent / "manifest.jsonl"
+    lines = manifest.read_text().splitlines(keepends=True)
+    manifest.write_text("".join(line for line in lines if '"index": 1,' not in line))
+    assert run() == expected
+    with sqlite3.connect(valley_rasters.parent / "stream.gpkg") as gpkg:
+        assert gpkg.execute(
+            "SELECT count(*) FROM rtree_inundation_geom"
+        ).fetchone() == (len(expected),)
+
+
+@pytest.mark.parametrize("volumes", [None, [500, 3000]])
+def test_cached_inundation_is_identical(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, volumes: Optional[List[int]]
+) -> None:
+    dem, direction = synthetic_valley()
+    cache = ResultCache(tmp_path)
+    start_point = StartPoint([0, 0], 5000)
+    start_point.row, start_point.col = 5, 40
+    expected, expected_extent = create_lahar_inundation(
+        start_point, dem, direction, 95.0, volumes=volumes, cache=cache
+    )
+    assert len(list(tmp_path.glob("*.npz"))) == 1
+
+    # unchanged input is read from the cache
+    monkeypatch.setattr(distal_inundation, "pad_rasters", None)
+    planimetrics, extent = create_lahar_inundation(
+        start_point, dem, direction, 95.0, volumes=volumes, cache=cache
+    )
+    assert extent == expected_extent
+    assert (planimetrics.materialise() == expected.materialise()).all()
+    assert planimetrics.covered.tolist() == expected.covered.tolist()
+    assert planimetrics.value == expected.value
+    assert summarise_levels([5000], planimetrics, dem.cell_width) == summarise_levels(
+        [5000], expected, dem.cell_width
+    )
+    monkeypatch.undo()
+
+    start_point.col = 41
+    create_lahar_inundation(
+        start_point, dem, direction, 95.0, volumes=volumes, cache=cache
+    )
+    assert len(list(tmp_path.glob("*.npz"))) == 2
+
+
+@pytest.mark.parametrize("backend", ["python", "numba"])
+def test_traversal_counters(backend: str) -> None:
+    if backend == "numba":
+        pytest.importorskip("numba")
+    dem, direction = synthetic_valley()
+    counters = {}
+    for used in ("python", backend):
+        start_point = StartPoint([0, 0], 5000)
+        start_point.row, start_point.col = 5, 40
+        metrics = Metrics()
+        create_lahar_inundation(
+            start_point, dem, direction, 95.0, backend=used, metrics=metrics
+        )
+        counters[used] = metrics.counters
+        assert "traversal" in metrics.durations
+    assert counters["python"] == counters[backend]
+    assert counters["python"]["cells_traversed"] > 0
+    assert (
+        counters["python"]["lateral_cells"] > counters["python"]["cross_sections"] > 0
+    )
+
+
+@pytest.mark.parametrize("backend", ["python", "numba"])
+def test_cell_visits(backend: str) -> None:
+    if backend == "numba":
+        pytest.importorskip("numba")
+    dem, direction = pad_rasters(*synthetic_valley())
+    visits = {}
+    for used in ("python", backend):
+        start_point = StartPoint([0, 0], 5000)
+        start_point.row, start_point.col = 5, 40
+        metrics = Metrics()
+        visits[used] = visit_array(dem)
+        create_lahar_inundation(
+            start_point,
+            dem,
+            direction,
+            95.0,
+            backend=used,
+            metrics=metrics,
+            visits=visits[used],
+        )
+        assert metrics.counters["cell_visits"] == int(visits[used].sum())
+    np.testing.assert_array_equal(visits["python"], visits[backend])
+    assert visits["python"].max() > 1
+    with pytest.raises(ValueError):
+        create_lahar_inundation(
+            start_point, dem, direction, 95.0, visits=np.zeros(3, dtype=np.uint32)
+        )
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_heatmap(valley_rasters: Path, workers: int) -> None:
+    output = valley_rasters.parent / f"heatmap_{workers}"
+    output.mkdir()
+    metrics = Metrics()
+    _batch_lahar_inundation(
+        str(valley_rasters),
+        [StartPoint([405, 955], 300), StartPoint([335, 805], 5000)],
+        95.0,
+        str(output),
+        "raster",
+        workers=workers,
+        metrics=metrics,
+        heatmap=True,
+    )
+    with rasterio.open(output / "heatmap.tif") as heatmap:
+        visits = heatmap.read(1)
+        assert heatmap.nodata == 0
+    assert int(visits.sum(dtype=np.int64)) == metrics.counters["cell_visits"]
+    lines = (output / "heatmap.csv").read_text().splitlines()
+    assert lines[0] == "index,cell_visits,cells_traversed,cross_sections,lateral_cells"
+    totals = {int(line.split(",")[0]): int(line.split(",")[1]) for line in lines[1:]}
+    assert set(totals) == {0, 1}
+    assert sum(totals.values()) == metrics.counters["cell_visits"]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_metrics(valley_rasters: Path, workers: int) -> None:
+    events: List[Event] = []
+    metrics = Metrics(events.append)
+    _batch_lahar_inundation(
+        str(valley_rasters),
+        [StartPoint([405, 955], 300), StartPoint([335, 805], 5000)],
+        95.0,
+        str(valley_rasters.parent),
+        "multi_vector",
+        workers=workers,
+        metrics=metrics,
+    )
+    assert {"raster_read", "volume_fitting", "traversal", "save", "polygonize"} <= set(
+        metrics.durations
+    )
+    for index in (0, 1):
+        point = [event for event in events if event.index == index]
+        assert {event.name for event in point} >= {
+            "save",
+            "traversal",
+            "fitting_retries",
+        }
+    assert metrics.counters["fitting_retries"] >= 2
+    assert metrics.counters["cells_traversed"] == sum(
+        event.value for event in events if event.name == "cells_traversed"
+    )
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_memory(valley_rasters: Path, workers: int) -> None:
+    memory = MemoryTracker()
+    metrics = Metrics(memory=memory)
+    try:
+        _batch_lahar_inundation(
+            str(valley_rasters),
+            [StartPoint([405, 955], 300), StartPoint([335, 805], 5000)],
+            95.0,
+            str(valley_rasters.parent),
+            "raster",
+            workers=workers,
+            metrics=metrics,
+        )
+    finally:
+        memory.close()
+    assert {"raster_read", "traversal", "save"} <= set(metrics.peaks)
+    assert set(metrics.point_peaks) == {0, 1}
+    assert all(peak > 0 for peak in metrics.point_peaks.values())
+
+
+def test_result_counters(valley_rasters: Path) -> None:
+    (result,) = iter_lahar_inundation(
+        str(valley_rasters), [StartPoint([335, 805], 5000)], 95.0
+    )
+    assert result.counters["fitting_retries"] == result.evaluations - 1
+    assert result.counters["cross_sections"] > 0
@@ -0,0 +1,51 @@
+import io
+import json
+from typing import List
+
+import pytest
+
+from pearpy.events import COUNTER, STAGE, Event, Metrics, json_lines
+
+
+def test_stage_and_counter_totals() -> None:
+    events: List[Event] = []
+    metrics = Metrics(events.append)
+    for _ in range(2):
+        with metrics.stage("save"):
+            pass
+    metrics.count("cells_traversed", 5)
+    metrics.count("cells_traversed", 7)
+    assert [event.kind for event in events] == [STAGE, STAGE, COUNTER, COUNTER]
+    summary = metrics.summary()
+    assert summary["counters"] == {"cells_traversed": 12}
+    assert summary["durations"]["save"] == pytest.approx(
+        sum(event.value for event in events[:2])
+    )
+
+
+def test_stage_is_emitted_when_it_raises() -> None:
+    events: List[Event] = []
+    with pytest.raises(ValueError):
+        with Metrics(events.append).stage("traversal"):
+            raise ValueError
+    assert [event.name for event in events] == ["traversal"]
+
+
+def test_point_metrics_forward_to_run() -> None:
+    events: List[Event] = []
+    metrics = Metrics(events.append)
+    point = metrics.point(3)
+    point.count("cross_sections", 4)
+    point.count("starting_points", index=8)
+    assert point.counters == {"cross_sections": 4, "starting_points": 1}
+    assert metrics.counters == point.counters
+    assert [event.index for event in events] == [3, 8]
+
+
+def test_json_lines() -> None:
+    file = io.StringIO()
+    Metrics(json_lines(file)).count("cache_hits")
+    (line,) = file.getvalue().splitlines()
+    record = json.loads(line)
+    assert record["kind"] == COUNTER and record["name"] == "cache_hits"
+    assert record["value"] == 1 and record["index"] is None
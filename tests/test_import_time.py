@@ -0,0 +1,72 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+# microseconds, `PEARPY_IMPORT_BUDGET` overrides it on slow machines
+IMPORT_BUDGET = int(os.environ.get("PEARPY_IMPORT_BUDGET", 100000))
+HEAVY_MODULES = (
+    "fiona",
+    "rasterio",
+    "geosardine",
+    "shapely",
+    "tqdm",
+    "whitebox",
+    "numba",
+)
+ROOT = Path(__file__).parent.parent
+
+
+def import_times(*arguments: str) -> Dict[str, int]:
+    """cumulative microseconds of every imported module, from python -X importtime"""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", *arguments],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times: Dict[str, int] = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def heavy(times: Dict[str, int]) -> List[str]:
+    return [name for name in times if name.split(".")[0] in HEAVY_MODULES]
+
+
+def test_import_budget() -> None:
+    times = import_times("-c", "import pearpy")
+    assert heavy(times) == []
+    assert times["pearpy"] < IMPORT_BUDGET
+
+
+def test_lazy_attributes() -> None:
+    # modules loaded by importlib are not listed by -X importtime
+    process = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, pearpy; pearpy.iter_lahar_inundation; pearpy.starting_point; "
+            "print(*sorted(sys.modules))",
+        ],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = process.stdout.split()
+    assert "pearpy.distal_inundation" in modules and "rasterio" in modules
+    # geosardine imports numba itself, the kernel is imported for the numba backend only
+    assert "pearpy._inundation_kernel" not in modules
+
+
+def test_cli_help() -> None:
+    times = import_times("-m", "pearpy", "inundation", "--help")
+    assert heavy(times) == []
+    assert "pearpy.distal_inundation" not in times
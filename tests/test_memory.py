@@ -0,0 +1,57 @@
+import json
+import tracemalloc
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from pearpy.events import MEMORY, Event, Metrics, write_report
+from pearpy.memory import MemoryTracker, max_rss
+
+MB = 1024 ** 2
+
+
+def test_stage_peaks() -> None:
+    events: List[Event] = []
+    memory = MemoryTracker()
+    metrics = Metrics(events.append, memory=memory)
+    try:
+        with metrics.stage("traversal"):
+            with metrics.point(2).stage("save"):
+                array = np.ones(8 * MB, dtype=np.uint8)
+                del array
+            array = np.ones(2 * MB, dtype=np.uint8)
+            del array
+        with metrics.stage("raster_read"):
+            array = np.ones(MB, dtype=np.uint8)
+            del array
+    finally:
+        memory.close()
+    assert not tracemalloc.is_tracing()
+    peaks = {event.name: event.value for event in events if event.kind == MEMORY}
+    assert peaks["save"] >= 8 * MB and peaks["traversal"] >= peaks["save"]
+    assert MB <= peaks["raster_read"] < 8 * MB
+    assert metrics.peaks == peaks
+    assert metrics.point_peaks == {2: peaks["save"]}
+
+
+def test_report(tmp_path: Path) -> None:
+    memory = MemoryTracker()
+    metrics = Metrics(memory=memory)
+    with metrics.point(0).stage("dsm_diff"):
+        array = np.zeros(MB)
+        del array
+    metrics.count("starting_points")
+    memory.close()
+    report = json.loads(write_report(metrics, tmp_path / "report.json").read_text())
+    assert report["counters"] == {"starting_points": 1}
+    assert report["peak_bytes"]["dsm_diff"] >= 8 * MB
+    assert report["point_peak_bytes"] == {"0": report["peak_bytes"]["dsm_diff"]}
+    assert report["max_rss_bytes"] == max_rss()
+
+
+def test_no_memory_events() -> None:
+    events: List[Event] = []
+    with Metrics(events.append).stage("save"):
+        pass
+    assert [event.kind for event in events] == ["stage"]
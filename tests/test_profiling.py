@@ -0,0 +1,68 @@
+import pstats
+import threading
+from pathlib import Path
+
+from pearpy.events import Metrics
+from pearpy.profiling import StageProfiler
+
+
+def _traverse() -> int:
+    return sum(range(10000))
+
+
+def _save() -> int:
+    return sum(range(100))
+
+
+def _function_names(stats: pstats.Stats) -> set:
+    return {function for _, _, function in stats.stats}
+
+
+def test_nested_stage_is_profiled_apart() -> None:
+    profiler = StageProfiler()
+    metrics = Metrics(profiler=profiler)
+    with metrics.stage("volume_fitting"):
+        with metrics.point(0).stage("traversal"):
+            _traverse()
+        _save()
+    assert profiler.stages == ["volume_fitting", "traversal"]
+    assert "_traverse" in _function_names(profiler.stats("traversal"))
+    assert "_traverse" not in _function_names(profiler.stats("volume_fitting"))
+    assert "_save" in _function_names(profiler.stats("volume_fitting"))
+    assert metrics.durations.keys() == {"volume_fitting", "traversal"}
+
+
+def test_stage_threads_are_merged(tmp_path: Path) -> None:
+    profiler = StageProfiler()
+    metrics = Metrics(profiler=profiler)
+
+    def save() -> None:
+        with metrics.stage("save"):
+            _save()
+
+    threads = [threading.Thread(target=save) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    save()
+    stats = profiler.stats("save")
+    (calls,) = [
+        value[1] for function, value in stats.stats.items() if function[2] == "_save"
+    ]
+    assert calls == 4
+
+    summary = profiler.save(tmp_path / "profile", top=5)
+    assert (tmp_path / "profile" / "save.prof").exists()
+    assert "_save" in _function_names(
+        pstats.Stats(str(tmp_path / "profile" / "save.prof"))
+    )
+    text = summary.read_text()
+    assert "=== stage save ===" in text and "=== whole run ===" in text
+
+
+def test_metrics_without_profiler() -> None:
+    metrics = Metrics()
+    with metrics.stage("save"):
+        _save()
+    assert metrics.profiler is None and metrics.point(1).profiler is None
@@ -0,0 +1,43 @@
+import os
+from pathlib import Path
+
+import numpy as np
+
+from pearpy.result_cache import ResultCache
+
+
+def test_key_changes_with_rasters_and_parameters(tmp_path: Path) -> None:
+    cache = ResultCache(tmp_path)
+    dem = np.arange(12, dtype=np.float32).reshape(3, 4)
+    direction = np.ones((3, 4), dtype=np.uint8)
+    key = cache.key((dem, direction), 5, 40, 300, 95.0)
+    assert key == cache.key((dem.copy(), direction.copy()), 5, 40, 300, 95.0)
+    assert key != cache.key((dem, direction), 5, 40, 301, 95.0)
+    assert key != cache.key((dem.astype(np.float64), direction), 5, 40, 300, 95.0)
+    changed = dem.copy()
+    changed[1, 1] += 1
+    assert key != cache.key((changed, direction), 5, 40, 300, 95.0)
+
+
+def test_get_returns_put_arrays(tmp_path: Path) -> None:
+    cache = ResultCache(tmp_path)
+    assert cache.get("missing") is None
+    cache.put("key", {"array": np.ones((4, 4), dtype=np.int64), "count": np.asarray(3)})
+    cached = cache.get("key")
+    assert cached is not None
+    assert (cached["array"] == 1).all() and int(cached["count"]) == 3
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_least_recently_used_is_evicted(tmp_path: Path) -> None:
+    arrays = {"array": np.random.default_rng(0).random(1000)}
+    cache = ResultCache(tmp_path)
+    for i, key in enumerate(("first", "second")):
+        cache.put(key, arrays)
+        os.utime(tmp_path / f"{key}.npz", (i, i))
+    size = (tmp_path / "first.npz").stat().st_size
+    cache.max_bytes = 2 * size
+    # reading makes the first result most recently used
+    assert cache.get("first") is not None
+    cache.put("third", arrays)
+    assert sorted(path.stem for path in tmp_path.glob("*.npz")) == ["first", "third"]
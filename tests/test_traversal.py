@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from pearpy.traversal import (
+    CHECKER,
+    D8_CODES,
+    LEFT,
+    MIN_HALO,
+    RIGHT,
+    FlowGrid,
+    near_blank_cells,
+    neighbour,
+    pad,
+)
+
+
+@pytest.fixture
+def grid() -> FlowGrid:
+    dem = pad(np.arange(12, dtype=np.float32).reshape(3, 4), MIN_HALO, 99999.0)
+    return FlowGrid(dem, pad(np.ones((3, 4), dtype=np.int16), MIN_HALO, 255))
+
+
+@pytest.mark.parametrize("code", D8_CODES)
+def test_step_matches_neighbour(grid: FlowGrid, code: int) -> None:
+    row, col = neighbour[code]
+    assert grid.rowcol(grid.step(grid.index(1, 1), code)) == (1 + row, 1 + col)
+
+
+@pytest.mark.parametrize(
+    "row_col, code",
+    [((0, 0), 16), ((0, 0), 64), ((0, 3), 1), ((2, 3), 2), ((2, 0), 8), ((1, 3), 128)],
+)
+def test_step_stops_in_halo(grid: FlowGrid, row_col, code: int) -> None:
+    index = grid.step(grid.index(*row_col), code)
+    assert grid.is_halo(index)
+    assert grid.dem[index] == 99999.0 and grid.direction[index] == 255
+
+
+def test_padded_grid() -> None:
+    dem = np.arange(12, dtype=np.float32).reshape(3, 4)
+    grid = FlowGrid(pad(dem, 7, 99999.0), pad(dem, 7, 255), halo=7)
+    assert grid.shape == (3, 4)
+    assert grid.dem[grid.index(2, 1)] == dem[2, 1]
+    assert (grid.crop(grid.dem_array) == dem).all()
+    with pytest.raises(IndexError):
+        grid.index(3, 0)
+    with pytest.raises(ValueError):
+        pad(dem, MIN_HALO - 1, 99999.0)
+
+
+def test_lateral_tables() -> None:
+    # east flow scans north (left) and south (right), checker board only for diagonal
+    assert (LEFT[1], RIGHT[1]) == (64, 4)
+    assert (LEFT[2], RIGHT[2], CHECKER[2]) == (128, 8, 1)
+    assert CHECKER[4] == 0
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 7, 256])
+def test_near_blank_cells_match_window(chunk_rows: int) -> None:
+    random = np.random.default_rng(0)
+    direction = np.where(random.random((30, 41)) < 0.04, 255, 1)
+    direction = pad(direction, MIN_HALO, 255)
+    near_blank = near_blank_cells(direction, chunk_rows)
+    height, width = direction.shape
+    for row in range(MIN_HALO, height - MIN_HALO):
+        for col in range(MIN_HALO, width - MIN_HALO):
+            window = direction[row - 5 : row + 5, col - 5 : col + 5]
+            assert near_blank[row, col] == ((window == 255).sum() > 5)
+    assert near_blank[:MIN_HALO].all() and near_blank[:, :MIN_HALO].all()